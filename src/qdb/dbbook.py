@@ -10,11 +10,14 @@ Database interface: Book, Genre, and Composer tables
 
 """
 
+from concurrent.futures import Future
+
 from PySide6.QtSql import QSqlQuery
 
 from qdb.fields.book import BookField
 from qdb.base import DbBase
 from qdb.dbconn import DbConn
+from qdb.dbwriter import DbWriter
 from qdb.dbgeneric import DbGenericName
 from qdb.mixin.bookid import MixinBookID
 from qdb.util import DbHelper
@@ -398,18 +401,18 @@ class DbBook(MixinBookID, DbBase):
         change_list = {"book": old_name, "*book": new_name.strip()}
         self.update(**change_list)
 
-    def update_read_date(self, book_name: str) -> bool:
-        """update the date a book was last read to today
+    def update_read_date(self, book_name: str) -> Future:
+        """update the date a book was last read to today.
+        This is queued for the background writer (see qdb.dbwriter)
 
         Args:
             book_name (str): Book title (not ID)
 
         Returns:
-            bool: True if name changed, false if stays the same
+            Future: result is True once the date is written
         """
-        query = DbHelper.prep(DbBook.SQL_UPDATE_READ_DATE)
-        query.addBindValue(book_name)
-        return query.exec()
+        return DbWriter.shared().submit(
+            DbBook.SQL_UPDATE_READ_DATE, [book_name], key=('Book.date_read', book_name))
 
     def update(self, **kwargs) -> int:
         """Update a book passing the an array of key/values
@@ -534,14 +537,13 @@ class Migrate(DbBase):
         old_id = dbobject.get_id(oldvalue, create=False)
         if old_id is None:
             return 0
-        new_id = dbobject.get_id(newvalue, create=True)
-
-        query = DbHelper.bind(DbHelper.prep(
-            sql), [new_id, old_id])
-        rtn = (query.numRowsAffected() if query.exec() else 0)
-        self._check_error(query)
-        query.finish()
-        del query
+        with DbHelper.transaction():
+            new_id = dbobject.get_id(newvalue, create=True)
+            query = DbHelper.bind(DbHelper.prep(
+                sql), [new_id, old_id])
+            rtn = (query.numRowsAffected() if query.exec() else 0)
+            self._check_error(query)
+            DbHelper.finish(query, sql)
         return rtn
 
     def composers(self, current: str = None, new: str = None) -> int:
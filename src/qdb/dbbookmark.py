@@ -27,6 +27,8 @@ class DbBookmark(MixinBookID, DbBase):
     """
     SQL_BOOKMARK_CHECK = """SELECT bookmark
         FROM Bookmark WHERE book_id = ? AND page = ?"""
+    SQL_BOOKMARK_ADD = """INSERT OR REPLACE
+        INTO Bookmark (book_id, bookmark, page) VALUES (?, ?, ?)"""
     SQL_BOOKMARK_DELETE_ALL = """DELETE
         FROM Bookmark WHERE book_id = ?"""
     SQL_BOOKMARK_DELETE_ID = """DELETE
@@ -152,6 +154,30 @@ class DbBookmark(MixinBookID, DbBase):
         del query
         return self.was_good()
 
+    def add_many(self, book: str | int, bookmarks: list) -> bool:
+        """Add several bookmarks to a book in one batch
+
+        Args:
+            book (str | int): Book name or ID
+            bookmarks (list): ( bookmark, page ) for each bookmark
+
+        Returns:
+            bool: True if all bookmarks were added (none are if any fail)
+        """
+        book_id = self.lookup_book_id(book)
+        if book_id is None:
+            return False
+        try:
+            with DbHelper.transaction():
+                if not DbHelper.execute_many(
+                        DbBookmark.SQL_BOOKMARK_ADD,
+                        [[book_id, bookmark, page] for bookmark, page in bookmarks]):
+                    raise RuntimeError('Bookmarks not saved')
+        except RuntimeError as err:
+            self.logger.error(f"add_many book {book_id}: {err}")
+            return False
+        return True
+
     def delete(self, bookmark: str, book: str | int ) -> bool:
         """Delete a bookmark from the database by bookmark name
             You should pass in named parameters rather than positional but
@@ -191,7 +217,7 @@ class DbBookmark(MixinBookID, DbBase):
         query.exec()
         rows = query.numRowsAffected()
         self._check_error(query)
-        query.finish()
+        DbHelper.finish(query, DbBookmark.SQL_BOOKMARK_DELETE_ALL)
         return self.was_good() and rows > 0
 
     def get_all(self, book: str | int | dict = None, order: str = 'page') -> list:
@@ -0,0 +1,104 @@
+"""
+Database : Book session
+
+ Everything needed to show a book is read when it is opened: the
+ BookView row, all the book settings, the bookmarks, the notes and the
+ page sizes. It is read in one transaction, so the database is locked
+ (and its cache checked) once, rather than once per query. This matters
+ when the database is on a slow network share.
+
+ The result is a BookSession that can't be changed. Anything written
+ after the book is opened goes to the tables as before; the session is
+ only what the book looked like when it was opened.
+
+ This file is part of SheetMusic
+ Copyright: 2022,2023 by Chrles Gentry
+ You should have received a copy of the GNU General Public License
+ along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+ This file is part of Sheetmusic.
+
+"""
+
+from dataclasses import dataclass, replace
+from types import MappingProxyType
+from typing import Mapping
+
+from qdb.dbbook import DbBook
+from qdb.dbbookmark import DbBookmark
+from qdb.dbbooksettings import DbBookSettings
+from qdb.dbnote import DbNote
+from qdb.dbpagegeometry import DbPageGeometry
+from qdb.fields.book import BookField
+from qdb.fields.note import NoteField
+from qdb.util import DbHelper
+
+
+def _freeze(rows: list) -> tuple[Mapping, ...]:
+    return tuple(MappingProxyType(dict(row)) for row in rows)
+
+
+@dataclass(frozen=True)
+class BookSession():
+    """ A book, as it was when it was opened """
+    book: Mapping
+    settings: Mapping
+    bookmarks: tuple[Mapping, ...]
+    notes: tuple[Mapping, ...]
+    page_sizes: tuple[tuple[float, float], ...]
+
+    @property
+    def book_id(self) -> int:
+        """ Return the book's ID """
+        return self.book[BookField.ID]
+
+    @property
+    def name(self) -> str:
+        """ Return the book's name """
+        return self.book[BookField.BOOK]
+
+    def note_pages(self) -> tuple[int, ...]:
+        """ Return the pages that have a note, in page order """
+        return tuple(sorted({note[NoteField.PAGE] for note in self.notes}))
+
+    def updated(self, book: Mapping, settings: Mapping,
+                bookmarks: list | None = None, notes: list | None = None) -> 'BookSession':
+        """ Return a new session with the book as it is now. Bookmarks
+            and notes are kept unless new ones are passed """
+        return replace(self,
+                       book=MappingProxyType(dict(book)),
+                       settings=MappingProxyType(dict(settings)),
+                       bookmarks=self.bookmarks if bookmarks is None else _freeze(bookmarks),
+                       notes=self.notes if notes is None else _freeze(notes))
+
+
+class DbBookSession():
+    """ Read a BookSession. Create this once; the table objects are kept """
+
+    def __init__(self):
+        self.dbbook = DbBook()
+        self.dbbookmark = DbBookmark()
+        self.dbbooksettings = DbBookSettings()
+        self.dbnote = DbNote()
+        self.dbgeometry = DbPageGeometry()
+
+    def load(self, book: str) -> BookSession | None:
+        """Read everything for a book in one transaction
+
+        Args:
+            book (str): Book name
+
+        Returns:
+            BookSession | None: The book or None if there is no book by that name
+        """
+        with DbHelper.transaction():
+            row = self.dbbook.getbook(book=book)
+            if not row:
+                return None
+            book_id = row[BookField.ID]
+            return BookSession(
+                book=MappingProxyType(dict(row)),
+                settings=MappingProxyType(self.dbbooksettings.get_all_settings(book_id)),
+                bookmarks=_freeze(self.dbbookmark.get_all(book_id)),
+                notes=_freeze(self.dbnote.get_all(book_id)),
+                page_sizes=tuple(self.dbgeometry.get_sizes(book_id)))
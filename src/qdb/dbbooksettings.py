@@ -10,10 +10,12 @@ Database Interface : Book Setting table
  This file is part of Sheetmusic.
 
 """
+from concurrent.futures import Future
 from typing import Any
 from PySide6.QtSql import QSqlQuery
 from qdb.base import DbBase
 from qdb.dbconn import DbConn
+from qdb.dbwriter import DbWriter
 from qdb.fields.booksetting import BookSettingField
 from qdb.keys import DbKeys
 from qdb.util import DbHelper
@@ -104,6 +106,47 @@ class DbBookSettings(MixinBookID, DbBase):
         msg = f"{label} Book: '{book}', BookID: '{book_id}' Key: '{key}' [{str(err)}]"
         self.logger.critical(msg, trace=True)
 
+    @staticmethod
+    def writer_key(book_id: int, key: str) -> tuple:
+        """ Key used for queued writes of a book setting """
+        return ('BookSetting', book_id, key)
+
+    @staticmethod
+    def _wait_for_writer(book_id: int | None, key: str | None = None) -> None:
+        """ Wait for queued writes of a setting (or all settings) for a book """
+        if key is not None:
+            DbWriter.shared().wait_for(DbBookSettings.writer_key(book_id, key))
+        else:
+            DbWriter.shared().wait_for(
+                lambda writer_key: writer_key[:2] == ('BookSetting', book_id))
+
+    def queue_setting(self, book_id: int, key: str, value=None) -> Future:
+        """Update or insert (or delete, if the value is None) a book setting
+            using the background writer (see qdb.dbwriter). Later writes of
+            the same setting replace this one if it hasn't been written yet.
+
+        Args:
+            book_id (int): Book ID
+            key (str): Setting key
+            value (any, optional): Value to set. Defaults to None.
+
+        Raises:
+            ValueError: No book or key passed
+
+        Returns:
+            Future: result is True once the setting is written
+        """
+        if book_id is None or key is None:
+            raise ValueError(f'No book or key passed BOOK: {book_id} KEY: {key}')
+        if value is None:
+            return DbWriter.shared().submit(
+                DbBookSettings.SQL_BOOKSETTING_DELETE, [book_id, key],
+                key=DbBookSettings.writer_key(book_id, key))
+        return DbWriter.shared().submit(
+            DbBookSettings.SQL_BOOKSETTING_UPSERT,
+            [book_id, key, self._encode(key, value)],
+            key=DbBookSettings.writer_key(book_id, key))
+
     def upsert_booksettings(self,
                             book: str | int = None,
                             key: str = None,
@@ -130,6 +173,7 @@ class DbBookSettings(MixinBookID, DbBase):
             raise err
         if value is None:
             return self.delete_value(book, key, ignore=True) > 0
+        DbBookSettings._wait_for_writer(sqlid, key)
         value = self._encode(key, value)
         parms = [sqlid, key, value]
         query = DbHelper.bind(DbHelper.prep(
@@ -137,9 +181,38 @@ class DbBookSettings(MixinBookID, DbBase):
         query.exec()
         rtn = not self.is_error() and query.numRowsAffected() > 0
         self._check_error(query)
-        query.finish()
+        DbHelper.finish(query, DbBookSettings.SQL_BOOKSETTING_UPSERT)
         return rtn
 
+    def upsert_many(self, book: str | int, settings: dict) -> bool:
+        """Update or insert several settings for a book in one batch.
+            Settings with a value of None are deleted
+
+        Args:
+            book (str | int): Book name or ID
+            settings (dict): key: value for each setting
+
+        Returns:
+            bool: True if all settings were saved (none are if any fail)
+        """
+        sqlid = self.lookup_book_id(book)
+        if sqlid is None:
+            return False
+        DbBookSettings._wait_for_writer(sqlid)
+        rows = [[sqlid, key, self._encode(key, value)]
+                for key, value in settings.items() if value is not None]
+        try:
+            with DbHelper.transaction():
+                for key, value in settings.items():
+                    if value is None:
+                        self.delete_value(sqlid, key, ignore=True)
+                if not DbHelper.execute_many(DbBookSettings.SQL_BOOKSETTING_UPSERT, rows):
+                    raise RuntimeError('Settings not saved')
+        except RuntimeError as err:
+            self.logger.error(f"upsert_many book {sqlid}: {err}")
+            return False
+        return True
+
     def get_all(self,
                 book: str | int = None,
                 order: str = 'key',
@@ -162,6 +235,7 @@ class DbBookSettings(MixinBookID, DbBase):
         if not book:
             raise ValueError('No book id')
         sql = DbBookSettings.SQL_BOOKSETTING_ALL.replace(':order', order)
+        DbBookSettings._wait_for_writer(self.lookup_book_id(book))
         if fetchall:
             return DbHelper.fetchrows(sql,
                                       self.lookup_book_id(book),
@@ -197,6 +271,7 @@ class DbBookSettings(MixinBookID, DbBase):
         if not key:
             raise ValueError("No lookup key")
         book_id = self.lookup_book_id(book)
+        DbBookSettings._wait_for_writer(book_id, key)
         parms = [book_id, key, key]
         rows = DbHelper.fetchrows(
             DbBookSettings.SQL_GET_VALUE, parms,
@@ -261,6 +336,7 @@ class DbBookSettings(MixinBookID, DbBase):
             book_id = self.lookup_book_id(book)
             if book_id is None:
                 raise ValueError(f"No book found for {book}")
+            DbBookSettings._wait_for_writer(book_id, key)
             parms = [book_id, key, value]
             sql = DbBookSettings.SQL_BOOKSETTING_ADD.format(
                 ('OR IGNORE ' if ignore else ''))
@@ -269,7 +345,7 @@ class DbBookSettings(MixinBookID, DbBase):
             self._check_error(query)
             rtn = self.was_good() and query.numRowsAffected() > 0
 
-            query.finish()
+            DbHelper.finish(query, sql)
         except Exception as err:
             self.logger.critical(
                 "set_value_by_id BookID: '{id}' Key: '{key}' [{str(err)}]", trace=True)
@@ -300,13 +376,14 @@ class DbBookSettings(MixinBookID, DbBase):
             if not book or key is None:
                 raise ValueError('No book or key passed')
             book_id = self.lookup_book_id(book=book)
+            DbBookSettings._wait_for_writer(book_id, key)
             parms = [self.lookup_book_id(book=book), key]
             query = DbHelper.bind(DbHelper.prep(
                 DbBookSettings.SQL_BOOKSETTING_DELETE, ), parms)
             query.exec()
             self._check_error(query)
             rowcount = query.numRowsAffected()
-            query.finish()
+            DbHelper.finish(query, DbBookSettings.SQL_BOOKSETTING_DELETE)
         except Exception as err:
             self._critical_log(
                 "delete_value.",
@@ -327,6 +404,7 @@ class DbBookSettings(MixinBookID, DbBase):
         try:
             if not book:
                 raise ValueError('No book id')
+            DbBookSettings._wait_for_writer(self.lookup_book_id(book))
             query = DbHelper.bind(
                 DbHelper.prep(DbBookSettings.SQL_BOOKSETTING_DELETE_ALL),
                 self.lookup_book_id(book))
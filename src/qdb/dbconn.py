@@ -14,6 +14,7 @@ import logging
 from PySide6.QtSql import QSqlDatabase, QSqlQuery
 
 from qdb.keys import DbKeys
+from qdb.statementcache import StatementCache
 
 
 @dataclass(init=False)
@@ -22,6 +23,7 @@ class DbVars():
     _qdb_conn = None
     _qdb_name = None
     _qdb_path = None
+    _qdb_transaction = 0
 
 
 class DbConn(DbVars):
@@ -61,6 +63,7 @@ class DbConn(DbVars):
             return DbVars._qdb_conn
 
         DbVars._qdb_path = dbpath
+        StatementCache.invalidate(dbname)
         DbVars._qdb_conn = QSqlDatabase.addDatabase(
             "QSQLITE", connectionName=dbname)
         DbVars._qdb_conn.setDatabaseName(dbpath)
@@ -102,6 +105,8 @@ class DbConn(DbVars):
     @staticmethod
     def close_db():
         """ This will close the db but doesn't destroy the db entry """
+        StatementCache.invalidate(DbConn.name())
+        DbVars._qdb_transaction = 0
         if DbVars._qdb_conn is not None and DbVars._qdb_conn.isOpen():
             DbVars._qdb_conn.commit()
             DbVars._qdb_conn.close()
@@ -195,6 +200,7 @@ class DbConn(DbVars):
 
         This will compact the database with clean indexes
         """
+        StatementCache.invalidate(DbConn.name())
         query = QSqlQuery(DbVars._qdb_conn)
         for table in DbKeys().primaryKeys:
             query.exec(f"REINDEX {table};")
@@ -276,7 +276,7 @@ class DbNote(DbBase):
                         table_name='Note',
                         field_value_dict=note )
         query = DbHelper.prep( sql )
-        DbHelper.bind( query, list( note.values() ))
+        query = DbHelper.bind( query, list( note.values() ))
         note_id = ( query.lastInsertId() if query.exec() else -1 )
         self._check_error( query )
         query.finish()
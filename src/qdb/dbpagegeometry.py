@@ -0,0 +1,132 @@
+"""
+Database : Page geometry table interface
+
+ The size of each page of a PDF is saved when the book is imported.
+ When the book is opened, all the sizes are read with one query
+ rather than asking the PDF document for every page.
+
+ A book whose sizes couldn't be read has one row for page
+ UNREADABLE_PAGE (0), so the PDF isn't scanned again each time
+ the book is opened.
+
+ This file is part of SheetMusic
+ Copyright: 2022,2023 by Chrles Gentry
+ You should have received a copy of the GNU General Public License
+ along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+ This file is part of Sheetmusic.
+
+"""
+
+from qdb.base import DbBase
+from qdb.fields.pagegeometry import PageGeometryField
+from qdb.mixin.bookid import MixinBookID
+from qdb.util import DbHelper
+
+
+class DbPageGeometry(MixinBookID, DbBase):
+    """
+        DbPageGeometry provides read/write access to the PageGeometry table.
+
+        It uses MixinBookID for book id handling
+        DbBase for generic access to database functions
+    """
+    SQL_INSERT = """INSERT OR REPLACE INTO PageGeometry
+        (book_id, page, width, height, orientation, rotation)
+        VALUES ( ?, ?, ?, ?, ?, ? )"""
+    SQL_GET_ALL = """SELECT page, width, height, orientation, rotation
+        FROM PageGeometry WHERE book_id = ? AND page > 0 ORDER BY page"""
+    SQL_GET_COUNT = """SELECT count(*) AS count
+        FROM PageGeometry WHERE book_id = ? AND page > 0"""
+    SQL_IS_UNREADABLE = """SELECT count(*) AS count
+        FROM PageGeometry WHERE book_id = ? AND page = 0"""
+    UNREADABLE_PAGE = 0
+    SQL_DELETE_ALL = """DELETE FROM PageGeometry WHERE book_id = ?"""
+
+    FIELDS = [PageGeometryField.PAGE,
+              PageGeometryField.WIDTH,
+              PageGeometryField.HEIGHT,
+              PageGeometryField.ORIENTATION,
+              PageGeometryField.ROTATION]
+
+    def __init__(self):
+        super().__init__()
+        self.setup_logger()
+
+    @staticmethod
+    def orientation(width: float, height: float) -> str:
+        """ Return the orientation name for a page size """
+        return (PageGeometryField.ORIENTATION_PORTRAIT
+                if width < height else PageGeometryField.ORIENTATION_LANDSCAPE)
+
+    def set_geometry(self, book: str | int, sizes: list, rotation: int = 0) -> bool:
+        """Replace all the page sizes for a book
+
+        Args:
+            book (str | int): Book name or ID
+            sizes (list): One (width, height) for each page, in page order
+            rotation (int, optional): Page rotation. Defaults to 0.
+
+        Returns:
+            bool: True if all pages were saved
+        """
+        book_id = self.lookup_book_id(book)
+        if book_id is None or sizes is None:
+            return False
+        rows = [[book_id, page, float(width), float(height),
+                 self.orientation(width, height), rotation]
+                for page, (width, height) in enumerate(sizes, start=1)]
+        try:
+            with DbHelper.transaction():
+                self.delete_all(book_id)
+                if not DbHelper.execute_many(DbPageGeometry.SQL_INSERT, rows):
+                    raise RuntimeError('Page sizes not saved')
+        except RuntimeError as err:
+            self.logger.error(f"set_geometry book {book_id}: {err}")
+            return False
+        return True
+
+    def mark_unreadable(self, book: str | int) -> bool:
+        """ Record that the page sizes for a book couldn't be read """
+        book_id = self.lookup_book_id(book)
+        if book_id is None:
+            return False
+        query = DbHelper.bind(DbHelper.prep(DbPageGeometry.SQL_INSERT),
+                              [book_id, DbPageGeometry.UNREADABLE_PAGE, 0.0, 0.0,
+                               PageGeometryField.ORIENTATION_PORTRAIT, 0])
+        query.exec()
+        self._check_error(query)
+        DbHelper.finish(query, DbPageGeometry.SQL_INSERT)
+        return self.was_good()
+
+    def is_unreadable(self, book: str | int) -> bool:
+        """ True if the page sizes for a book couldn't be read (see mark_unreadable) """
+        return int(DbHelper.fetchone(DbPageGeometry.SQL_IS_UNREADABLE,
+                                     self.lookup_book_id(book), default=0)) > 0
+
+    def get_geometry(self, book: str | int) -> list[dict]:
+        """ Return all the pages for a book (ordered by page) """
+        book_id = self.lookup_book_id(book)
+        if book_id is None:
+            return []
+        return DbHelper.fetchrows(DbPageGeometry.SQL_GET_ALL, book_id, DbPageGeometry.FIELDS)
+
+    def get_sizes(self, book: str | int) -> list[tuple[float, float]]:
+        """ Return (width, height) for each page. Index 0 is page 1 """
+        return [(row[PageGeometryField.WIDTH], row[PageGeometryField.HEIGHT])
+                for row in self.get_geometry(book)]
+
+    def count(self, book: str | int) -> int:
+        """ Return how many pages are stored for a book """
+        return int(DbHelper.fetchone(DbPageGeometry.SQL_GET_COUNT,
+                                     self.lookup_book_id(book), default=0))
+
+    def delete_all(self, book: str | int) -> bool:
+        """ Delete all the pages for a book """
+        query = DbHelper.bind(DbHelper.prep(
+            DbPageGeometry.SQL_DELETE_ALL), self.lookup_book_id(book))
+        query.exec()
+        rows = query.numRowsAffected()
+        self._check_error(query)
+        DbHelper.finish(query, DbPageGeometry.SQL_DELETE_ALL)
+        return self.was_good() and rows > 0
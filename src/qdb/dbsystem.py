@@ -10,9 +10,12 @@ Database : System table interface
 
 """
 
+from concurrent.futures import Future
+
 from PySide6.QtSql import QSqlQuery
 
 from qdb.dbconn import DbConn
+from qdb.dbwriter import DbWriter
 from qdb.util import DbHelper
 from qdb.base import DbBase
 
@@ -47,6 +50,7 @@ class DbSystem(DbBase):
             want rather than sucking in all of them. This is used by
             the UI interface
         """
+        DbWriter.shared().flush()
         values = {}
         query = QSqlQuery(DbConn.db())
         if query.exec("SELECT * FROM System"):
@@ -104,10 +108,39 @@ class DbSystem(DbBase):
         self.logger.error(msg)
         raise ValueError(msg)
 
+    @staticmethod
+    def writer_key(key: str) -> tuple:
+        """ Key used for queued writes of a System value """
+        return ('System', key)
+
+    def queue_value(self, key: str, value: str = None) -> Future:
+        """Replace (or delete, if value is None) a value using the
+            background writer (see qdb.dbwriter). Later writes of the
+            same key replace this one if it hasn't been written yet.
+
+        Args:
+            key (str): System key
+            value (str, optional): New value. Defaults to None.
+
+        Raises:
+            ValueError: No key passed
+
+        Returns:
+            Future: result is True once the value is written
+        """
+        if key is None or key == '':
+            raise ValueError('No key passed')
+        if value is None:
+            return DbWriter.shared().submit(
+                self.SQL_SYSTEM_DELETE, [key], key=DbSystem.writer_key(key))
+        return DbWriter.shared().submit(
+            self.SQL_SYSTEM_INSERT_REPLACE, [key, value], key=DbSystem.writer_key(key))
+
     def get_value(self, key: str, default: str = None) -> str:
         """ Fetch value from database using key """
         rtn = default
         if key:
+            DbWriter.shared().wait_for(DbSystem.writer_key(key))
             rtn = DbHelper.fetchone(self.SQL_SYSTEM_GET, param=key, default=default)
         return rtn
 
@@ -123,12 +156,12 @@ class DbSystem(DbBase):
         """
         if key is None or key == '':
             raise ValueError('No key passed')
+        DbWriter.shared().wait_for(DbSystem.writer_key(key))
         if value is None:
             query = DbHelper.bind(DbHelper.prep(self.SQL_SYSTEM_DELETE), key)
             query.exec()
             self._check_error(query)
-            query.finish()
-            del query
+            DbHelper.finish(query, self.SQL_SYSTEM_DELETE)
             return self.was_good()
 
         if replace:
@@ -142,6 +175,5 @@ class DbSystem(DbBase):
         query = DbHelper.bind(query, [key, value])
         query.exec()
         self._check_error(query)
-        query.finish()
-        del query
+        DbHelper.finish(query, sql)
         return self.was_good()
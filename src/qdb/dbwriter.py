@@ -0,0 +1,372 @@
+"""
+Database : Background writer
+
+ Small writes that the user doesn't wait for (the date a book was read,
+ book settings when a book is closed, preferences, log entries) are
+ queued here and written by a thread with its own database connection,
+ so a slow disk doesn't hold up the GUI.
+
+ Writes can have a key (e.g. ('System', 'pageLayout')). If a write for
+ the same key is still queued, it is replaced: only the last value is
+ written. Each write returns a Future that is set to True/False once it
+ has been written (or raises if it couldn't be), so callers that need
+ to know it is on disk can wait for it.
+
+ A function can also be queued (submit_call); it is passed the
+ connection to use. It runs in the writer's transaction unless it asks
+ not to (e.g. it runs VACUUM).
+
+ Until the writer is started, and inside a DbHelper.transaction, writes
+ are done straight away on the main connection. Reads always use the
+ main connection: call 'wait_for' or 'flush' before reading something
+ that may still be queued. 'stop' writes everything left in the queue.
+ The main connection belongs to the GUI (main) thread: other threads can
+ only queue writes while the writer is running.
+
+ This file is part of SheetMusic
+ Copyright: 2022,2023 by Chrles Gentry
+ You should have received a copy of the GNU General Public License
+ along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+ This file is part of Sheetmusic.
+
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import Future
+from dataclasses import dataclass, field
+from itertools import count
+from typing import Callable
+
+from PySide6.QtSql import QSqlDatabase, QSqlQuery
+
+from qdb.dbconn import DbConn
+from qdb.statementcache import StatementCache
+from qdb.util import DbHelper
+
+
+@dataclass
+class DbWrite():
+    """ One queued write and everyone waiting for it """
+    sql: str
+    params: list
+    many: bool = False
+    futures: list = field(default_factory=list)
+    # A function passed the connection to use, instead of the SQL
+    call: Callable[[QSqlDatabase], object] | None = None
+    # Run in the writer's transaction (with the other writes queued)
+    transaction: bool = True
+
+    def resolve(self, result: bool = None, error: Exception = None) -> None:
+        """ Set the result (or error) for everyone waiting """
+        for future in self.futures:
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+
+class DbWriter():
+    """ Queue of writes done by a thread with its own connection """
+    CONNECTION = 'SheetMusicWriter'
+    # Sqlite waits this long for the main connection to finish with the database
+    BUSY_TIMEOUT = 30000
+
+    _shared = None
+
+    def __init__(self):
+        self._lock = threading.Condition()
+        self._pending = OrderedDict()
+        self._writing = set()
+        self._thread = None
+        self._stopping = False
+        self._path = None
+        self._unkeyed = count()
+
+    @staticmethod
+    def shared() -> 'DbWriter':
+        """ Return the writer used by the program """
+        if DbWriter._shared is None:
+            DbWriter._shared = DbWriter()
+        return DbWriter._shared
+
+    def is_running(self) -> bool:
+        """ True if writes are being done by the thread """
+        return self._thread is not None and self._thread.is_alive()
+
+    def start(self, dbpath: str) -> bool:
+        """Start the writer thread for the database file
+
+        Args:
+            dbpath (str): Path to the library database. An in-memory
+                database can't be shared, so its writes stay on the main connection
+
+        Returns:
+            bool: True if the thread is running
+        """
+        if self.is_running():
+            return True
+        if not dbpath or dbpath == ':memory:':
+            return False
+        self._path = dbpath
+        self._stopping = False
+        self._thread = threading.Thread(
+            target=self._run, name=DbWriter.CONNECTION, daemon=True)
+        self._thread.start()
+        return True
+
+    def stop(self, timeout: float = 30.0) -> bool:
+        """ Write everything queued and stop the thread. Return False if the
+            thread is still writing after 'timeout' seconds: what is left
+            stays with the thread (it is still stopping) """
+        if self._thread is None:
+            return True
+        with self._lock:
+            self._stopping = True
+            self._lock.notify_all()
+        self._thread.join(timeout)
+        if self._thread.is_alive():
+            logging.warning("DbWriter: still writing after %s seconds (%d queued)",
+                            timeout, self.pending())
+            return False
+        self._thread = None
+        self._write_stranded()
+        return True
+
+    def submit(self, sql: str, params: list = None, key=None, many: bool = False) -> Future:
+        """Queue a write
+
+        Args:
+            sql (str): SQL with positional ('?') parameters
+            params (list, optional): Values to bind. Defaults to None.
+            key (hashable, optional): Writes with the same key replace each
+                other; only the last one queued is written. Defaults to None.
+            many (bool, optional): params is a list of rows (see
+                DbHelper.execute_many). Defaults to False.
+
+        Returns:
+            Future: result is True if the write worked
+
+        Raises:
+            RuntimeError: called from another thread while the writer isn't running
+        """
+        future = Future()
+        write = DbWrite(sql, list(params or []), many, [future])
+        if many and not write.params:
+            future.set_result(True)
+            return future
+        return self._queue(write, key)
+
+    def submit_call(self, function: Callable[[QSqlDatabase], object], key=None,
+                    transaction: bool = True) -> Future:
+        """Queue a function that does its own writes. It is passed the
+            connection to use
+
+        Args:
+            function (Callable[[QSqlDatabase], object]): Function to call
+            key (hashable, optional): As for submit. Defaults to None.
+            transaction (bool, optional): Run inside the writer's
+                transaction. Pass False for work that can't be done in a
+                transaction (e.g. VACUUM). Defaults to True.
+
+        Returns:
+            Future: result is what the function returns
+
+        Raises:
+            RuntimeError: called from another thread while the writer isn't running
+        """
+        future = Future()
+        return self._queue(DbWrite('', [], False, [future], function, transaction), key)
+
+    def _queue(self, write: DbWrite, key) -> Future:
+        future = write.futures[0]
+        # A DbHelper.transaction is on the main connection, in the main thread
+        main_thread = threading.current_thread() is threading.main_thread()
+        if not self.is_running() or (main_thread and DbHelper.in_transaction()):
+            if not main_thread:
+                raise RuntimeError('DbWriter is not running: '
+                                   'only the main thread can write on the main connection')
+            self.wait_for(key)
+            with self._lock:
+                replaced = self._pending.pop(key, None) if key is not None else None
+            if replaced is not None:
+                write.futures.extend(replaced.futures)
+            self._write_now([write])
+            return future
+        with self._lock:
+            if key is None:
+                key = (DbWriter, next(self._unkeyed))
+            replaced = self._pending.pop(key, None)
+            if replaced is not None:
+                write.futures = replaced.futures + write.futures
+            self._pending[key] = write
+            self._lock.notify_all()
+        return future
+
+    def pending(self) -> int:
+        """ Number of writes queued """
+        with self._lock:
+            return len(self._pending)
+
+    def _is_pending(self, match) -> bool:
+        if callable(match):
+            return any(match(key) for key in self._pending) or \
+                any(match(key) for key in self._writing)
+        return match in self._pending or match in self._writing
+
+    def wait_for(self, match, timeout: float = None) -> bool:
+        """Wait until there is no write queued or being written for a key
+
+        Args:
+            match (hashable | Callable): The key, or a function that is
+                passed each key and returns True for the ones to wait for
+            timeout (float, optional): Seconds to wait. Defaults to None (no limit)
+
+        Returns:
+            bool: False on timeout
+        """
+        if match is None:
+            return True
+        with self._lock:
+            if not self._pending and not self._writing:
+                return True
+            done = self._lock.wait_for(
+                lambda: not self._is_pending(match) or not self.is_running(),
+                timeout)
+        self._write_stranded()
+        return done
+
+    def flush(self, timeout: float = None) -> bool:
+        """ Wait until everything queued has been written. Return False on timeout """
+        with self._lock:
+            done = self._lock.wait_for(
+                lambda: not self._pending and not self._writing or not self.is_running(),
+                timeout)
+        self._write_stranded()
+        return done
+
+    def _write_stranded(self) -> None:
+        """ If the thread has stopped (e.g. it couldn't open the database),
+            write what it left on the main connection """
+        if not self.is_running() and self._pending:
+            self._write_now(self._take_all())
+
+    def _take_all(self) -> list[DbWrite]:
+        with self._lock:
+            writes = list(self._pending.values())
+            self._pending.clear()
+        return writes
+
+    @staticmethod
+    def _execute(query: QSqlQuery, write: DbWrite) -> bool:
+        if write.many:
+            for column in zip(*write.params):
+                query.addBindValue(list(column))
+            rtn = query.execBatch()
+        else:
+            for value in write.params:
+                query.addBindValue(value)
+            rtn = query.exec()
+        if not rtn:
+            logging.error("DbWriter: %s\n\t%s", query.lastError().text(), write.sql)
+        return rtn
+
+    def _write_now(self, writes: list[DbWrite]) -> None:
+        """ Do writes on the main connection """
+        for write in writes:
+            if write.call is not None:
+                DbWriter._call_alone(DbConn.db(), write)
+                continue
+            try:
+                query = DbHelper.prep(write.sql)
+                rtn = DbWriter._execute(query, write)
+                DbHelper.finish(query, write.sql)
+                write.resolve(rtn)
+            except (RuntimeError, ValueError) as err:
+                write.resolve(error=err)
+
+    @staticmethod
+    def _call_alone(db: QSqlDatabase, write: DbWrite) -> None:
+        """ Run a queued function on its own (not in the writer's transaction) """
+        try:
+            write.resolve(write.call(db))
+        except Exception as err:  # pylint: disable=broad-except
+            write.resolve(error=err)
+
+    def _write_batch(self, db: QSqlDatabase, statements: StatementCache,
+                     writes: list[DbWrite]) -> None:
+        """ Do a batch of writes, in one transaction, on the writer connection """
+        results = []
+        in_transaction = db.transaction()
+        for write in writes:
+            if write.call is not None:
+                try:
+                    results.append(write.call(db))
+                except Exception as err:  # pylint: disable=broad-except
+                    results.append(err)
+                continue
+            query = statements.take(write.sql)
+            if query is None:
+                query = QSqlQuery(db)
+                if not query.prepare(write.sql):
+                    results.append(RuntimeError(
+                        f"Could not prepare SQL {write.sql};\nError '{query.lastError().text()}'"))
+                    continue
+            results.append(DbWriter._execute(query, write))
+            statements.put(write.sql, query)
+        if in_transaction and not db.commit():
+            error = RuntimeError(f"Commit failed: '{db.lastError().text()}'")
+            db.rollback()
+            results = [error] * len(writes)
+        for write, result in zip(writes, results):
+            if isinstance(result, Exception):
+                write.resolve(error=result)
+            else:
+                write.resolve(result)
+
+    def _run(self) -> None:
+        db = QSqlDatabase.addDatabase("QSQLITE", DbWriter.CONNECTION)
+        db.setDatabaseName(self._path)
+        db.setConnectOptions(f"QSQLITE_BUSY_TIMEOUT={DbWriter.BUSY_TIMEOUT}")
+        if not db.open():
+            logging.critical("DbWriter: can't open '%s': %s",
+                             self._path, db.lastError().text())
+            del db
+            QSqlDatabase.removeDatabase(DbWriter.CONNECTION)
+            with self._lock:
+                self._lock.notify_all()
+            return
+        statements = StatementCache()
+        while True:
+            with self._lock:
+                self._lock.wait_for(lambda: self._pending or self._stopping)
+                if not self._pending and self._stopping:
+                    break
+                # Everything queued so far is written in one transaction
+                # (functions that can't be in a transaction run after it)
+                keys = list(self._pending)
+                writes = [self._pending.pop(key) for key in keys]
+                self._writing = set(keys)
+            try:
+                batch = [write for write in writes if write.transaction]
+                if batch:
+                    self._write_batch(db, statements, batch)
+                for write in writes:
+                    if not write.transaction:
+                        DbWriter._call_alone(db, write)
+            except Exception as err:  # pylint: disable=broad-except
+                logging.critical("DbWriter: %s", str(err))
+                for write in writes:
+                    write.resolve(error=err)
+            finally:
+                with self._lock:
+                    self._writing = set()
+                    self._lock.notify_all()
+        statements.clear()
+        db.close()
+        del db
+        QSqlDatabase.removeDatabase(DbWriter.CONNECTION)
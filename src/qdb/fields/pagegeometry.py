@@ -0,0 +1,26 @@
+"""
+Database Fields: PageGeometry
+
+ This file is part of SheetMusic
+ Copyright: 2022,2023 by Chrles Gentry
+ You should have received a copy of the GNU General Public License
+ along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+from dataclasses import dataclass
+
+@dataclass(init=False, frozen=True)
+class PageGeometryField:
+    """ PageGeometry columns. Sizes are the PDF point sizes """
+    BOOK_ID = 'book_id'  # Book ID
+    PAGE = 'page'  # Page number (starts at 1)
+    WIDTH = 'width'  # Width in points
+    HEIGHT = 'height'  # Height in points
+    ORIENTATION = 'orientation'  # ORIENTATION_PORTRAIT or ORIENTATION_LANDSCAPE
+    ROTATION = 'rotation'  # Rotation in degrees
+
+    ORIENTATION_PORTRAIT = 'portrait'
+    ORIENTATION_LANDSCAPE = 'landscape'
+
+    # Key used to pass the list of page sizes when a book is imported
+    KEY_PAGES = 'page_geometry'
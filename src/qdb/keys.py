@@ -51,6 +51,7 @@ class DbKeys():
     VALUE_PAGES_STACK_3 = "stack_3"
 
     VALUE_SMART_PAGES = True
+    VALUE_PROGRESSIVE_DISPLAY = False
     VALUE_REOPEN_LAST = True
     VALUE_SCRIPT_CMD = '/bin/bash'
     VALUE_SCRIPT_SPLIT = ';'  # Split script variables with this char
@@ -64,6 +65,23 @@ class DbKeys():
     VALUE_SHEETMUSIC_INDEX = "index.doc"
     VALUE_RENDER_PDF = False
     VALUE_USE_TOML_FILE = True
+    VALUE_PAGE_CACHE_SIZE = 256    # Megabytes
+    VALUE_PAGE_CACHE_SIZES = [64, 128, 256, 512, 1024]
+    VALUE_PAGE_DISK_CACHE_SIZE = 512     # Megabytes
+    VALUE_PAGE_DISK_CACHE_SIZES = [0, 256, 512, 1024, 2048, 4096]
+    VALUE_PAGE_DISK_CACHE_DIR = 'pagecache'
+    VALUE_PDF_RENDER_PROCESSES = 0     # Render in the program
+    VALUE_PDF_RENDER_PROCESSES_LIST = [0, 1, 2, 4]
+    VALUE_WARM_BOOKS = 3    # Recently closed books kept in memory
+    VALUE_WARM_BOOKS_LIST = [0, 1, 2, 3, 4, 6]
+    VALUE_PAGE_STORE = False
+    VALUE_PAGE_FORMAT = 'colour'
+    VALUE_PAGE_FORMATS = {'Colour': 'colour',
+                          'Greyscale': 'grey',
+                          'Black and white': 'mono'}
+    VALUE_PAGE_STORE_DIR = 'pagestore'
+    VALUE_THUMBNAIL_DIR = 'thumbnails'
+    VALUE_SLIDER_SCRUB = True
 
     ###
     #       STORED IN ONLY IN QPREFERENCES
@@ -77,7 +95,9 @@ class DbKeys():
     SETTING_PAGE_LAYOUT = 'layout'  # Page layout (1/2)
     SETTING_KEEP_ASPECT = 'aspectRatio'  # Keep aspect ratio when resizing
     SETTING_SMART_PAGES = 'smart_pages'  # Use alternate pages for two page displays
+    SETTING_PROGRESSIVE_DISPLAY = 'progressive'  # Quick page display then smooth
     SETTING_RENDER_PDF = 'viewer_pdf'
+    SETTING_PAGE_FORMAT = 'pageFormat'  # Hold pages in colour, greyscale or mono
 
     ###
     #       STORED ONLY IN System table
@@ -108,6 +128,18 @@ class DbKeys():
     SETTING_SHOW_FILEPATH = 'recentFilepath'
     # Read/Write toml file for configuration
     SETTING_USE_TOML_FILE = 'use_toml_file'
+    # Memory (MB) used to hold decoded pages
+    SETTING_PAGE_CACHE_SIZE = 'pageCacheSize'
+    # Disk space (MB) used to hold rendered PDF pages. 0 is off
+    SETTING_PAGE_DISK_CACHE_SIZE = 'pageDiskCacheSize'
+    # Number of processes used to render PDF pages ahead. 0 is off
+    SETTING_PDF_RENDER_PROCESSES = 'pdfRenderProcesses'
+    # Number of recently closed books kept in memory. 0 is off
+    SETTING_WARM_BOOKS = 'warmBooks'
+    # Build a page store (pre-decoded pages) for each book
+    SETTING_PAGE_STORE = 'pageStore'
+    # Show low resolution pages while the page slider is dragged
+    SETTING_SLIDER_SCRUB = 'sliderScrub'
 
     #       window settings
     SETTING_WIN_GEOMETRY = 'geometry'
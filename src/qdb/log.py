@@ -9,8 +9,13 @@ Database interface: Logging interface
  This file is part of Sheetmusic.
 
 """
-from inspect import stack
+import sys
+import threading
+import time
+from concurrent.futures import Future
 from dataclasses import dataclass
+from qdb.dbconn import DbConn
+from qdb.dbwriter import DbWriter
 from qdb.util import DbHelper
 
 @dataclass(init=False, frozen=True)
@@ -43,13 +48,19 @@ class Trace():
         Returns:
             list: _description_
         """
-        slen = min( len( stack() ), depth+start)
         scalls = []
-        counter = 1
-        for index in range( start, slen ):
-            sdict = stack()[index]
-            scalls.append( f"{counter}: {sdict[3]:>20s}@{sdict[2]:4d} File:{sdict[1]}")
-            counter += 1
+        try:
+            # sys._getframe(0) is this frame, as stack()[0] would be
+            frame = sys._getframe( start ) # pylint: disable=W0212
+        except ValueError:
+            return scalls
+        for counter in range( 1, depth+1 ):
+            if frame is None:
+                break
+            code = frame.f_code
+            scalls.append(
+                f"{counter}: {code.co_name:>20s}@{frame.f_lineno:4d} File:{code.co_filename}")
+            frame = frame.f_back
         return scalls
 
     @staticmethod
@@ -74,64 +85,133 @@ class Trace():
 
 class DbLog:
     """ Generic logging to database.
-    This will filter and log messages until a log limit is reached"""
+    This will filter and log messages until a log limit is reached.
+
+    Messages are checked against the level before anything else is done.
+    Records are kept in memory and written in one batch insert (by the
+    background writer, see qdb.dbwriter) once there are BUFFER_SIZE of
+    them, the oldest is FLUSH_SECONDS old, or a critical message is
+    logged. Call DbLog.flush to write them now. Other threads only
+    hand records to the writer while it is running; until then they
+    are kept for the GUI thread's next flush.
+    """
 
-    INSERT = "INSERT INTO Log ( level, class, method , msg  ) VALUES (?, ?, ? ,? )"
+    INSERT = "INSERT INTO Log ( level, class, method , msg, date_added ) VALUES (?, ?, ? ,?, ? )"
+    # Same as sqlite's current_timestamp (UTC)
+    DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
     SQL_LEVEL  = 'SELECT value FROM System WHERE key="logging_enabled"'
     SQL_CLEAR  = 'DELETE FROM Log WHERE level <= ?'
+    BUFFER_SIZE = 100
+    FLUSH_SECONDS = 2.0
+
     _loglevel = None
+    _buffer = []
+    _buffer_started = 0.0
+    _buffer_lock = threading.Lock()
 
     def __init__(self, classname:str='', level:int=None):
         self.setlevel( level )
         self.setclass( classname )
 
+    @staticmethod
+    def system_level()->int:
+        """ Return the level set in the System table. It is read once;
+            call reload_level when it is changed """
+        if DbLog._loglevel is None:
+            if not DbConn.is_open():
+                return LOG.disabled
+            DbLog._loglevel = int( DbHelper.fetchone( DbLog.SQL_LEVEL , default=LOG.disabled ) )
+        return DbLog._loglevel
+
+    @staticmethod
+    def reload_level()->None:
+        """ Read the level from the System table the next time it is needed """
+        DbLog._loglevel = None
+
     def setlevel( self, loglevel:int=None)->None:
         """ Set what 'level' you want.
-        Levels are defined in the DbLog.SQL_LEVEL"""
-        if loglevel is None and DbLog._loglevel is None:
-            loglevel = int( DbHelper.fetchone( DbLog.SQL_LEVEL , default=LOG.disabled ) )
-        self._loglevel = max( min( LOG.critical , loglevel ), LOG.disabled )
+        If None, the level in the System table (DbLog.SQL_LEVEL) is used"""
+        if loglevel is not None:
+            loglevel = max( min( LOG.critical , loglevel ), LOG.disabled )
+        self._loglevel = loglevel
 
     def setclass( self, proc:str )->None:
         """ Set the classname for logging """
         self._classname = proc
 
+    def is_enabled( self, level:int )->bool:
+        """ True if messages of 'level' will be logged """
+        loglevel = self._loglevel if self._loglevel is not None else DbLog.system_level()
+        return level >= loglevel > LOG.disabled
+
     def log( self, level:int , method:str, msg:str , trace=False)->None:
         """ Log a message and any trace requested."""
-        if level >= self._loglevel and self._loglevel > 0 :
-            query = DbHelper.prep( DbLog.INSERT )
-            if trace:
-                msg = Trace.callstr( msg , start=2)
-            query = DbHelper.bind( query, [ level, self._classname,  method, msg ] )
-            query.exec()
-            query.finish()
-            del query
+        if not self.is_enabled( level ):
+            return
+        if trace:
+            msg = Trace.callstr( msg , start=2)
+        with DbLog._buffer_lock:
+            if not DbLog._buffer:
+                DbLog._buffer_started = time.monotonic()
+            # The time it was logged, not when the buffer is written
+            DbLog._buffer.append( [ level, self._classname,  method, msg,
+                                    time.strftime( DbLog.DATE_FORMAT, time.gmtime() ) ] )
+            full = ( len( DbLog._buffer ) >= DbLog.BUFFER_SIZE or
+                     time.monotonic() - DbLog._buffer_started >= DbLog.FLUSH_SECONDS )
+        if full or level >= LOG.critical:
+            DbLog.flush()
+
+    @staticmethod
+    def flush()->None:
+        """ Write the buffered records in one batch """
+        if threading.current_thread() is not threading.main_thread() and \
+                not DbWriter.shared().is_running():
+            return
+        with DbLog._buffer_lock:
+            rows = DbLog._buffer
+            DbLog._buffer = []
+        if rows and DbConn.is_open():
+            try:
+                DbWriter.shared().submit( DbLog.INSERT, rows, many=True )
+            except RuntimeError:
+                # The writer stopped: put them back for the GUI thread
+                with DbLog._buffer_lock:
+                    DbLog._buffer[0:0] = rows
+
+    @staticmethod
+    def pending()->int:
+        """ Number of records not yet written """
+        return len( DbLog._buffer )
 
+    # pylint: disable=W0212
     def debug( self, msg:str , trace=False):
         """ output a debug message with optional trace"""
-        return self.log( LOG.debug , stack()[1].function , msg , trace )
+        if self.is_enabled( LOG.debug ):
+            self.log( LOG.debug , sys._getframe(1).f_code.co_name , msg , trace )
 
     def info( self, msg:str , trace=False ):
         """ output a Info message with optional trace"""
-        return self.log( LOG.info , stack()[1].function , msg , trace)
+        if self.is_enabled( LOG.info ):
+            self.log( LOG.info , sys._getframe(1).f_code.co_name , msg , trace)
 
     def warning(self, msg:str ,trace=True ):
         """ output a Warning message with optional trace"""
-        return self.log( LOG.warning , stack()[1].function , msg , trace)
+        if self.is_enabled( LOG.warning ):
+            self.log( LOG.warning , sys._getframe(1).f_code.co_name , msg , trace)
 
     def critical(self, msg:str , trace=True):
         """ output a critical message with optional trace"""
-        return self.log( LOG.critical, stack()[1].function, msg , trace )
+        if self.is_enabled( LOG.critical ):
+            self.log( LOG.critical, sys._getframe(1).f_code.co_name, msg , trace )
 
     def error( self,  msg:str , trace=True ):
         """ output an error message with option trace """
-        return self.log( LOG.critical, stack()[1].function , msg , trace)
-
-    def clear(self, level:int):
-        """ Clear the log file and cleanup """
-        query = DbHelper.prep( DbLog.SQL_CLEAR )
-        query = DbHelper.bind( query , [ level ])
-        query.exec()
-        query.finish()
-        del query
-        DbHelper.prep( 'VACUUM;').exec()
+        if self.is_enabled( LOG.critical ):
+            self.log( LOG.critical, sys._getframe(1).f_code.co_name , msg , trace)
+    # pylint: enable=W0212
+
+    def clear(self, level:int)->Future:
+        """ Clear the log records at or below 'level'. This is done by the
+            background writer; the space is freed by qdb.logretention """
+        DbLog.flush()
+        return DbWriter.shared().submit( DbLog.SQL_CLEAR, [ level ] )
@@ -0,0 +1,171 @@
+"""
+Database : Log retention
+
+ Log records are kept for a number of days and up to a number of
+ records, both set for each level (debug records go first). Older and
+ extra records are deleted a batch at a time by the background writer
+ (see qdb.dbwriter), and the space they used is given back a few pages
+ at a time with 'PRAGMA incremental_vacuum', so the library is never
+ rewritten by a full VACUUM while the program is in use.
+
+ The database must use 'auto_vacuum = INCREMENTAL' for the space to be
+ given back (see Setup.set_incremental_vacuum).
+
+ 'PRAGMA incremental_vacuum' frees one page each time it is stepped but
+ returns no columns, so QSqlQuery only steps it once for each exec. It
+ is run once for each page, in one transaction, on the connection it is
+ given. It mustn't be run through Python's sqlite3: that is a second
+ copy of the SQLite library and doesn't see the locks Qt's copy holds.
+
+ This file is part of SheetMusic
+ Copyright: 2022,2023 by Chrles Gentry
+ You should have received a copy of the GNU General Public License
+ along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+ This file is part of Sheetmusic.
+
+"""
+
+from concurrent.futures import Future
+
+from PySide6.QtSql import QSqlDatabase, QSqlQuery
+
+from qdb.dbconn import DbConn
+from qdb.dbwriter import DbWriter
+from qdb.log import LOG
+from qdb.util import DbHelper
+
+
+class LogRetention():
+    """ Retention policy for the Log table and the step that enforces it """
+    # Days records of each level are kept
+    MAX_DAYS = {LOG.debug: 7, LOG.info: 30, LOG.warning: 90, LOG.critical: 365}
+    # Most records of each level kept (the newest are kept)
+    MAX_ROWS = {LOG.debug: 20000, LOG.info: 10000, LOG.warning: 5000, LOG.critical: 5000}
+    # Most records deleted, and pages freed, in one step
+    BATCH_ROWS = 500
+    VACUUM_PAGES = 64
+    # Seconds between steps; sooner while there is more to delete
+    INTERVAL_SECONDS = 60
+    BUSY_SECONDS = 1
+
+    AUTO_VACUUM_INCREMENTAL = 2
+
+    SQL_DELETE_OLD = """DELETE FROM Log WHERE id IN (
+        SELECT id FROM Log
+        WHERE level = ? AND date_added < datetime('now', ?)
+        LIMIT ? )"""
+    SQL_DELETE_EXTRA = """DELETE FROM Log WHERE id IN (
+        SELECT id FROM Log
+        WHERE level = ?
+        ORDER BY date_added DESC LIMIT ? OFFSET ? )"""
+    SQL_AUTO_VACUUM = "PRAGMA auto_vacuum"
+    SQL_FREE_PAGES = "PRAGMA freelist_count"
+    SQL_VACUUM_STEP = "PRAGMA incremental_vacuum(1)"
+
+    _shared = None
+
+    def __init__(self,
+                 max_days: dict = None,
+                 max_rows: dict = None,
+                 batch_rows: int = BATCH_ROWS,
+                 vacuum_pages: int = VACUUM_PAGES):
+        self.max_days = dict(max_days if max_days is not None else LogRetention.MAX_DAYS)
+        self.max_rows = dict(max_rows if max_rows is not None else LogRetention.MAX_ROWS)
+        self.batch_rows = max(1, int(batch_rows))
+        self.vacuum_pages = max(0, int(vacuum_pages))
+        self._last = None
+
+    @staticmethod
+    def shared() -> 'LogRetention':
+        """ Return the policy used by the program """
+        if LogRetention._shared is None:
+            LogRetention._shared = LogRetention()
+        return LogRetention._shared
+
+    def _delete(self, query: QSqlQuery, sql: str, params: list) -> int:
+        query.prepare(sql)
+        for value in params:
+            query.addBindValue(value)
+        return query.numRowsAffected() if query.exec() else 0
+
+    def _pragma(self, query: QSqlQuery, sql: str) -> int:
+        """ Return the value of a pragma (0 if it can't be read) """
+        if query.exec(sql) and query.next():
+            return int(query.value(0))
+        return 0
+
+    def vacuum(self, db: QSqlDatabase) -> int:
+        """Free up to 'vacuum_pages' pages of the database file
+
+        Args:
+            db (QSqlDatabase): Connection to the database. Nothing is
+                freed for an in-memory database or inside a DbHelper.transaction
+
+        Returns:
+            int: Number of pages freed
+        """
+        path = db.databaseName()
+        if self.vacuum_pages == 0 or not path or path == ':memory:' or \
+                (db.connectionName() == DbConn.name() and DbHelper.in_transaction()):
+            return 0
+        query = QSqlQuery(db)
+        if self._pragma(query, LogRetention.SQL_AUTO_VACUUM) != \
+                LogRetention.AUTO_VACUUM_INCREMENTAL:
+            query.finish()
+            return 0
+        free_pages = self._pragma(query, LogRetention.SQL_FREE_PAGES)
+        if not free_pages:
+            query.finish()
+            return 0
+        in_transaction = db.transaction()
+        query.prepare(LogRetention.SQL_VACUUM_STEP)
+        for _ in range(min(free_pages, self.vacuum_pages)):
+            if not query.exec():
+                break
+        # The step is left part way through until the query is finished
+        query.finish()
+        if in_transaction and not db.commit():
+            db.rollback()
+        freed = free_pages - self._pragma(query, LogRetention.SQL_FREE_PAGES)
+        query.finish()
+        return freed
+
+    def step(self, db: QSqlDatabase) -> int:
+        """Delete up to 'batch_rows' records that are too old, or more than
+            are kept for their level, then free up to 'vacuum_pages' pages
+
+        Args:
+            db (QSqlDatabase): Connection to use
+
+        Returns:
+            int: Number of records deleted
+        """
+        query = QSqlQuery(db)
+        deleted = 0
+        for level, days in sorted(self.max_days.items()):
+            if deleted < self.batch_rows and days is not None:
+                deleted += self._delete(query, LogRetention.SQL_DELETE_OLD,
+                                        [level, f'-{int(days)} days', self.batch_rows - deleted])
+        for level, rows in sorted(self.max_rows.items()):
+            if deleted < self.batch_rows and rows is not None:
+                deleted += self._delete(query, LogRetention.SQL_DELETE_EXTRA,
+                                        [level, self.batch_rows - deleted, int(rows)])
+        query.finish()
+        self.vacuum(db)
+        return deleted
+
+    def run(self) -> Future:
+        """ Queue a step for the background writer (unless one is still queued) """
+        if self._last is None or self._last.done():
+            self._last = DbWriter.shared().submit_call(
+                self.step, key=LogRetention, transaction=False)
+        return self._last
+
+    def next_interval(self) -> int:
+        """ Seconds until the next step should run """
+        last = self._last
+        if last is not None and last.done() and last.exception() is None \
+                and last.result() >= self.batch_rows:
+            return LogRetention.BUSY_SECONDS
+        return LogRetention.INTERVAL_SECONDS
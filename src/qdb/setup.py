@@ -11,12 +11,16 @@ You should have received a copy of the GNU General Public License
 import logging
 import os.path
 import os
+from concurrent.futures import Future
 from decimal import Decimal, getcontext
 
-from PySide6.QtSql import QSqlQuery
+from PySide6.QtSql import QSqlDatabase, QSqlQuery
 from constants import ProgramConstants
 from qdb.dbconn import DbConn
+from qdb.dbwriter import DbWriter
 from qdb.keys import DbKeys
+from qdb.logretention import LogRetention
+from qdb.statementcache import StatementCache
 from qdb.util import DbHelper
 from util.convert import to_bool
 
@@ -34,6 +38,11 @@ class Setup():
         update_n_n: Incremental update to database
         update_null: update when nothing happening
     """
+    SQL_AUTO_VACUUM = "PRAGMA auto_vacuum"
+    SQL_SET_INCREMENTAL = "PRAGMA auto_vacuum = INCREMENTAL"
+    # Free pages (4K each) before an existing database is rebuilt for incremental vacuum
+    VACUUM_FREE_PAGES = 2048
+
     def __init__(self, location: str = None):
         del location
         self.query = QSqlQuery(DbConn.db())
@@ -46,6 +55,9 @@ class Setup():
         """ Create tables in database.
             Only use during initialisation
         """
+        StatementCache.invalidate(DbConn.name())
+        # Only takes effect for a new (empty) database: see set_incremental_vacuum
+        self.query.exec(Setup.SQL_SET_INCREMENTAL)
         tables = [
             """Log        (
                             id            INTEGER PRIMARY KEY ASC,
@@ -120,6 +132,19 @@ class Setup():
                                 FOREIGN KEY (book_id)
                                 REFERENCES Book(book_id)
                                 ON DELETE CASCADE)
+            """,
+            """PageGeometry ( book_id     INTEGER NOT NULL,
+                           page        INTEGER NOT NULL,
+                           width       REAL NOT NULL,
+                           height      REAL NOT NULL,
+                           orientation TEXT NOT NULL
+                                CHECK( orientation in ('portrait','landscape')) DEFAULT 'portrait',
+                           rotation    INTEGER NOT NULL DEFAULT 0,
+                           PRIMARY KEY (book_id, page),
+                           CONSTRAINT fk_pagegeometry
+                                FOREIGN KEY (book_id)
+                                REFERENCES Book(book_id)
+                                ON DELETE CASCADE)
             """
         ]
         # Non unique indexes
@@ -212,8 +237,10 @@ class Setup():
         WARNING:
             You really don't want to do this casually. It will wipe out ALL the data
         """
+        StatementCache.invalidate(DbConn.name())
         tables = [
-            "Book", "Bookmark", "Booksetting", "Composer", "Genre", "Log", "Note", "System"
+            "Book", "Bookmark", "Booksetting", "Composer", "Genre", "Log", "Note", "PageGeometry",
+            "System"
         ]
         views = ["BookView", "BookmarkView", "BookSettingView"]
 
@@ -223,6 +250,38 @@ class Setup():
             self.query.exec(f"DROP VIEW IF EXISTS {view};")
         DbConn.commit()
 
+    def set_incremental_vacuum(self, free_pages: int = None) -> Future:
+        """ Make sure the database gives space back a few pages at a time
+            (see qdb.logretention). An existing database has to be rebuilt
+            (VACUUM) for this. That is done by the background writer, and only
+            once there are at least 'free_pages' (default VACUUM_FREE_PAGES)
+            pages to give back. The result is True if the database was changed
+        """
+        if free_pages is None:
+            free_pages = Setup.VACUUM_FREE_PAGES
+        return DbWriter.shared().submit_call(
+            lambda db: Setup._incremental_vacuum(db, free_pages),
+            key=(Setup, 'auto_vacuum'), transaction=False)
+
+    @staticmethod
+    def _incremental_vacuum(db: QSqlDatabase, free_pages: int) -> bool:
+        """ Rebuild the database for incremental vacuum (runs on the writer) """
+        query = QSqlQuery(db)
+        def value(sql: str) -> int:
+            return int(query.value(0)) if query.exec(sql) and query.next() else 0
+        if value(Setup.SQL_AUTO_VACUUM) == LogRetention.AUTO_VACUUM_INCREMENTAL:
+            return False
+        if value(LogRetention.SQL_FREE_PAGES) < free_pages:
+            return False
+        if db.connectionName() == DbConn.name():
+            StatementCache.invalidate(DbConn.name())
+        rtn = query.exec(Setup.SQL_SET_INCREMENTAL) and query.exec('VACUUM')
+        if not rtn:
+            logging.getLogger('sheetmusic.Setup').error(
+                "Could not set incremental vacuum: %s", query.lastError().text())
+        query.finish()
+        return rtn
+
     def _update_null(self, current: Decimal) -> Decimal:
         """ Used to increment by .1 when nothing is to be done"""
         current += Decimal(0.1)
@@ -299,6 +358,7 @@ class Setup():
             shell = DbKeys.VALUE_SCRIPT_CMD
         data = {
             DbKeys.SETTING_KEEP_ASPECT:         DbKeys.VALUE_KEEP_ASPECT,
+            DbKeys.SETTING_PROGRESSIVE_DISPLAY: DbKeys.VALUE_PROGRESSIVE_DISPLAY,
             DbKeys.SETTING_DEFAULT_PATH_MUSIC:
                 os.path.expanduser(DbKeys.VALUE_DEFAULT_DIR),
             DbKeys.SETTING_PATH_USER_SCRIPT:
@@ -315,6 +375,13 @@ class Setup():
             DbKeys.SETTING_LAST_IMPORT_DIR:     DbKeys.VALUE_LAST_IMPORT_DIR,
             DbKeys.SETTING_NAME_IMPORT:         DbKeys.VALUE_NAME_IMPORT_FILE_1,
             DbKeys.SETTING_LOGGING_ENABLED:     False,
+            DbKeys.SETTING_PAGE_CACHE_SIZE:     DbKeys.VALUE_PAGE_CACHE_SIZE,
+            DbKeys.SETTING_PAGE_DISK_CACHE_SIZE: DbKeys.VALUE_PAGE_DISK_CACHE_SIZE,
+            DbKeys.SETTING_PDF_RENDER_PROCESSES: DbKeys.VALUE_PDF_RENDER_PROCESSES,
+            DbKeys.SETTING_WARM_BOOKS:          DbKeys.VALUE_WARM_BOOKS,
+            DbKeys.SETTING_PAGE_STORE:          DbKeys.VALUE_PAGE_STORE,
+            DbKeys.SETTING_PAGE_FORMAT:         DbKeys.VALUE_PAGE_FORMAT,
+            DbKeys.SETTING_SLIDER_SCRUB:        DbKeys.VALUE_SLIDER_SCRUB,
             DbKeys.SETTING_VERSION:             ProgramConstants.VERSION_MAIN,
         }
 
@@ -0,0 +1,114 @@
+"""
+Database : Prepared statement cache
+
+ Preparing an SQL statement costs more than running it for the small
+ lookups that are done all the time (system values, book ids, log
+ entries). DbHelper keeps the statements it has prepared here, one
+ cache for each connection, keyed by the SQL text. A statement is
+ taken out of the cache while it is used and put back when it is
+ finished, so the same SQL can be used in nested calls.
+
+ The cache is limited in size and drops the least recently used SQL.
+ It is cleared when the connection is closed or the schema changes.
+
+ This file is part of SheetMusic
+ Copyright: 2022,2023 by Chrles Gentry
+ You should have received a copy of the GNU General Public License
+ along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+ This file is part of Sheetmusic.
+
+"""
+
+from collections import OrderedDict
+
+from PySide6.QtSql import QSql, QSqlQuery
+
+
+class StatementCache():
+    """ LRU of prepared, unused QSqlQuery statements for one connection """
+    DEFAULT_SIZE = 64
+    # Statements that change (or rebuild) the schema. Cached statements
+    # are dropped before these run.
+    SCHEMA_CHANGES = ('ALTER', 'ATTACH', 'CREATE', 'DETACH', 'DROP', 'REINDEX', 'VACUUM')
+
+    _caches = {}
+
+    def __init__(self, max_size: int = DEFAULT_SIZE):
+        self._statements = OrderedDict()
+        self._max_size = max(0, int(max_size))
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def for_connection(name: str | None) -> 'StatementCache':
+        """ Return the cache for a connection name """
+        cache = StatementCache._caches.get(name)
+        if cache is None:
+            cache = StatementCache()
+            StatementCache._caches[name] = cache
+        return cache
+
+    @staticmethod
+    def invalidate(name: str | None = None) -> None:
+        """ Drop the statements for a connection (or all connections if None) """
+        if name is None:
+            for cache in StatementCache._caches.values():
+                cache.clear()
+        elif name in StatementCache._caches:
+            StatementCache._caches[name].clear()
+
+    @staticmethod
+    def is_schema_change(sql: str) -> bool:
+        """ True if the SQL changes the schema """
+        words = sql.split(None, 1)
+        return bool(words) and words[0].upper().rstrip(';') in StatementCache.SCHEMA_CHANGES
+
+    @property
+    def max_size(self) -> int:
+        """ Maximum number of statements held """
+        return self._max_size
+
+    def set_max_size(self, max_size: int) -> None:
+        """ Set the maximum number of statements and trim to fit """
+        self._max_size = max(0, int(max_size))
+        self._trim()
+
+    def __len__(self) -> int:
+        return len(self._statements)
+
+    def __contains__(self, sql: str) -> bool:
+        return sql in self._statements
+
+    def _trim(self) -> None:
+        while len(self._statements) > self._max_size:
+            self._statements.popitem(last=False)
+
+    def take(self, sql: str) -> QSqlQuery | None:
+        """ Remove and return the prepared statement for the SQL (None if
+            there isn't one). It still holds the values of its last use:
+            exec starts positional binding from the first value again, and
+            DbHelper.bind prepares a new statement if fewer are bound """
+        query = self._statements.pop(sql, None)
+        if query is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return query
+
+    def put(self, sql: str, query: QSqlQuery) -> None:
+        """ Keep a statement that is finished with for the next use.
+            A SELECT is reset once it has read past its last row. One that
+            still has rows is dropped (and so finalized) rather than kept:
+            it would hold a read lock on the database """
+        if query.isSelect() and query.isActive() and query.at() != QSql.AfterLastRow:
+            if query.next():
+                return
+        if not sql or self._max_size == 0 or sql in self._statements:
+            return
+        self._statements[sql] = query
+        self._trim()
+
+    def clear(self) -> None:
+        """ Drop all the statements """
+        self._statements.clear()
@@ -2,9 +2,11 @@
 import logging
 import  base64
 import  pickle
+from contextlib import contextmanager
 
 from PySide6.QtSql import QSqlQuery
-from qdb.dbconn    import DbConn
+from qdb.dbconn    import DbConn, DbVars
+from qdb.statementcache import StatementCache
 
 
 class DbHelper:
@@ -20,12 +22,20 @@ class DbHelper:
         """
         return sqlstatement.replace( '*', ','.join( column_names))
 
+    @staticmethod
+    def statements()->StatementCache:
+        """ Return the prepared statement cache for the current connection """
+        return StatementCache.for_connection( DbConn.name() )
+
     @staticmethod
     def prep(  sqlstatement:str)->QSqlQuery:
         """
         Prepare an SQL statement to be used with
         parameter binding
 
+        If the statement was prepared before and given back with
+        DbHelper.finish, that one is used rather than preparing it again.
+
         Args:
             sqlstatement (str): Sql to prepare
 
@@ -38,12 +48,135 @@ class DbHelper:
         """
         if not DbConn.is_open():
             raise RuntimeError('DB Not open')
+        if StatementCache.is_schema_change( sqlstatement ):
+            DbHelper.statements().clear()
+        else:
+            query = DbHelper.statements().take( sqlstatement )
+            if query is not None:
+                return query
+        return DbHelper._prepare( sqlstatement )
+
+    @staticmethod
+    def _prepare( sqlstatement:str )->QSqlQuery:
+        """ Prepare a new statement, without looking in the cache """
         query=DbConn.query()
         if query.prepare( sqlstatement ):
             return query
         raise ValueError(
             f"Could not prepare SQL {sqlstatement};\nError '{ query.lastError().text()}'" )
 
+    @staticmethod
+    def finish( query:QSqlQuery, sqlstatement:str=None )->None:
+        """ Finish with a query from DbHelper.prep. The statement is reset and
+            kept so the next prep of the same SQL doesn't prepare it again.
+            Don't use the query after this.
+
+        Args:
+            query (QSqlQuery): Query returned by prep
+            sqlstatement (str, optional): SQL it was prepared with.
+                Defaults to query.lastQuery()
+        """
+        DbHelper.statements().put(
+            sqlstatement if sqlstatement is not None else query.lastQuery(), query )
+
+    @staticmethod
+    def in_transaction()->bool:
+        """ True if called inside a DbHelper.transaction block """
+        return DbVars._qdb_transaction > 0
+
+    @staticmethod
+    def _savepoint( command:str )->None:
+        """ Run a savepoint command for the current transaction level """
+        query = DbConn.query()
+        if not query.exec( f"{command} dbhelper_{DbVars._qdb_transaction}" ):
+            raise RuntimeError(
+                f"{command} failed: '{query.lastError().text()}'" )
+
+    @staticmethod
+    @contextmanager
+    def transaction():
+        """
+        Run a block of database changes as one transaction:
+
+            with DbHelper.transaction():
+                book_id = DbBook().add( **book )
+                DbHelper.execute_many( sql, rows )
+
+        The changes are committed when the block ends and rolled back if
+        the block raises an exception (the exception is passed on).
+        A transaction inside another one uses a savepoint: an exception
+        only rolls back the inner block, and nothing is written until
+        the outermost block commits.
+
+        Raises:
+            RuntimeError: database not open, or the transaction could
+                not be started or committed
+
+        Yields:
+            QSqlDatabase: Database connection
+        """
+        if not DbConn.is_open():
+            raise RuntimeError('DB Not open')
+        db = DbConn.db()
+        if DbVars._qdb_transaction == 0:
+            if not db.transaction():
+                raise RuntimeError(
+                    f"Could not start transaction: '{db.lastError().text()}'" )
+        else:
+            DbHelper._savepoint( 'SAVEPOINT' )
+        DbVars._qdb_transaction += 1
+        try:
+            yield db
+        except BaseException:
+            DbVars._qdb_transaction -= 1
+            if DbVars._qdb_transaction > 0:
+                DbHelper._savepoint( 'ROLLBACK TO' )
+                DbHelper._savepoint( 'RELEASE' )
+            else:
+                db.rollback()
+            raise
+        DbVars._qdb_transaction -= 1
+        if DbVars._qdb_transaction > 0:
+            DbHelper._savepoint( 'RELEASE' )
+        elif not db.commit():
+            error = db.lastError().text()
+            db.rollback()
+            raise RuntimeError( f"Could not commit transaction: '{error}'" )
+
+    @staticmethod
+    def execute_many( sqlstatement:str, rows:list )->bool:
+        """
+        Run one statement for many rows of values (QSqlQuery.execBatch).
+        Use it inside DbHelper.transaction so all the rows are written
+        in one commit.
+
+        Args:
+            sqlstatement (str): SQL with positional ('?') parameters
+            rows (list): a list (or tuple) of values for each row.
+                All rows must have the same number of values
+
+        Raises:
+            ValueError: rows have a different number of values
+
+        Returns:
+            bool: True if every row was executed (also True for no rows)
+        """
+        rows = [ list( row ) for row in rows ]
+        if not rows:
+            return True
+        if any( len( row ) != len( rows[0] ) for row in rows ):
+            raise ValueError( 'Rows have a different number of values' )
+        query = DbHelper.prep( sqlstatement )
+        for column in zip( *rows ):
+            query.addBindValue( list( column ) )
+        rtn = query.execBatch()
+        if not rtn:
+            logging.critical(
+                "execute_many error: %s\n\t%s Rows: %d",
+                query.lastError().text(), sqlstatement, len( rows ) )
+        DbHelper.finish( query, sqlstatement )
+        return rtn
+
     @staticmethod
     def bind( query:QSqlQuery , param , name:str=None )->QSqlQuery:
         """Bind parameters to an SQL query
@@ -68,8 +201,12 @@ class DbHelper:
             err: RuntimeError with the exception string
 
         Returns:
-            QSqlQuery: query with bound values
+            QSqlQuery: query with bound values. This is a new statement
+                if the query (from the cache) still held more values than
+                are bound now
         """
+        if len( query.boundValues() ) > DbHelper._value_count( param ):
+            query = DbHelper._prepare( query.lastQuery() )
         if param:
             try:
                 if isinstance( param, list ):
@@ -90,6 +227,15 @@ class DbHelper:
                 raise RuntimeError( 'Invalid parameter passed') from err
         return query
 
+    @staticmethod
+    def _value_count( param )->int:
+        """ Number of values DbHelper.bind binds for param """
+        if not param:
+            return 0
+        if isinstance( param, ( list, dict ) ):
+            return len( param )
+        return 1
+
     @staticmethod
     def fetchone( sql:str ,
                  param=None,
@@ -115,7 +261,7 @@ class DbHelper:
         logging.debug("\tLast error: %s Return: %s", query.lastError(), str(rtn) )
         if endquery is not None:
             endquery( query )
-        query.finish()
+        DbHelper.finish( query, sql )
         return rtn
 
     @staticmethod
@@ -139,7 +285,7 @@ class DbHelper:
             record = {}
         if endquery is not None:
             endquery( query )
-        query.finish()
+        DbHelper.finish( query, sql )
         if debug:
             logging.debug("fechrow: Result: %s", record )
         return record
@@ -158,7 +304,7 @@ class DbHelper:
             rtn =  []
         if endquery is not None:
             endquery( query )
-        query.finish()
+        DbHelper.finish( query, sql )
         return rtn
 
     @staticmethod
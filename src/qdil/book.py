@@ -16,15 +16,17 @@ import os
 import shutil
 
 from PySide6.QtWidgets import QMessageBox
-from PySide6.QtPdf import QPdfDocument
 
 from qdb.dbbook import DbBook
 from qdb.dbbookmark import DbBookmark
+from qdb.dbbooksession import BookSession, DbBookSession
 from qdb.dbbooksettings import DbBookSettings
+from qdb.dbpagegeometry import DbPageGeometry
 from qdb.dbsystem import DbSystem
 from qdb.fields.book import BookField
 from qdb.fields.bookproperty import BookPropertyField
 from qdb.fields.booksetting import BookSettingField
+from qdb.fields.pagegeometry import PageGeometryField
 from qdb.keys import DbKeys
 from qdb.mixin.tomlbook import MixinTomlBook
 from qdb.util import DbHelper
@@ -108,6 +110,9 @@ class DilBook(DbBook):
         self.path_source = None
 
         self.dbooksettings = DbBookSettings()
+        self.dbgeometry = DbPageGeometry()
+        self.dbsession = DbBookSession()
+        self.session = None
         self._dset = DilProperties()
 
         self.clear()
@@ -202,36 +207,62 @@ class DilBook(DbBook):
                 rtn= qmsg_box.buttonRole(qmsg_box.clickedButton())
         return rtn
 
-    def _fix_book(self):
-        """ Fix any data for the book that may be missing or in error """
-        if (BookSettingField.KEY_DIMENSIONS not in self.book or
-            self.book[BookSettingField.KEY_DIMENSIONS] is None or
-            not isinstance(self.book[BookSettingField.KEY_DIMENSIONS], PdfDimensions) or
-                not self.book[BookSettingField.KEY_DIMENSIONS].isSet):
+    def _scan_page_sizes(self, book_id: int) -> list:
+        """ Read the page sizes from the source PDF and save them. If they
+            can't be read, that is saved instead so it is only tried once """
+        sizes = []
+        source = self.book[BookField.SOURCE]
+        if source and os.path.isfile(source):
+            from PySide6.QtPdf import QPdfDocument  # pylint: disable=import-outside-toplevel
             pdfdoc = QPdfDocument()
-            rtn = pdfdoc.load(self.book[BookField.SOURCE])
-            if rtn != QPdfDocument.Error.None_:
-                return
-            dimension = PdfDimensions()
-            dimension.checkSizeDocument(pdfdoc)
-            self.set_property(BookSettingField.KEY_DIMENSIONS, dimension)
+            if pdfdoc.load(source) == QPdfDocument.Error.None_:
+                sizes = PdfDimensions.documentSizes(pdfdoc)
+            pdfdoc.close()
+        if sizes:
+            self.dbgeometry.set_geometry(book_id, sizes)
+        else:
+            self.dbgeometry.mark_unreadable(book_id)
+        return sizes
 
-    def open(self, book: str, page=None, file_type="png", on_error=None) -> QMessageBox.ButtonRole:
+    def _fix_book(self):
+        """ Fix any data for the book that may be missing or in error
+
+            The PDF page sizes come from the PageGeometry table. PDF books
+            imported before the table existed are scanned once and saved.
+        """
+        book_id = self.book[BookField.ID]
+        sizes = list(self.session.page_sizes) if self.session is not None else []
+        if not sizes and self.is_pdf() and not self.dbgeometry.is_unreadable(book_id):
+            sizes = self._scan_page_sizes(book_id)
+        if not sizes:
+            return
+        dimension = PdfDimensions()
+        dimension.setPageSizes(sizes)
+        self.book[BookSettingField.KEY_DIMENSIONS] = dimension
+
+    def open(self, book: str, page=None, file_type="png", on_error=None,
+             session: BookSession | None = None) -> QMessageBox.ButtonRole:
         """
             Close current book and open new one. Use BookView for data
 
-            Each book read will also include all the BookSettings
+            Each book read will also include all the BookSettings. The book,
+            settings, bookmarks, notes and page sizes are read together
+            (see DbBookSession) and kept in 'session'. If the book was
+            open a short time ago, pass the session it had when it was
+            closed (see current_session) and nothing is read.
         """
         del file_type
         self.close()
-        open_book = self.getbook(book=book)
+        if session is None or session.name != book:
+            session = self.dbsession.load(book)
+        open_book = dict(session.book) if session is not None else None
 
         rtn = self._check_book(book, open_book, on_error)
         if rtn == QMessageBox.AcceptRole:
+            self.session = session
             self.book = open_book
 
-            self.book.update(
-                self.dbooksettings.get_all_settings(self.book[BookField.ID]))
+            self.book.update(session.settings)
             self.set_paths()
             self.update_read_date(self.book[BookField.BOOK])
             if page is not None:
@@ -255,6 +286,20 @@ class DilBook(DbBook):
             self.write_properties()
         self.clear()
 
+    def current_session(self, bookmarks: list | None = None,
+                        notes: list | None = None) -> BookSession | None:
+        """ Return the session for the book as it is now (None if not open).
+
+            The book and settings include any changes made since it was
+            opened. Pass the bookmarks and notes if they have changed.
+        """
+        if self.book is None or self.session is None:
+            return None
+        book = {key: self.book.get(key, value) for key, value in self.session.book.items()}
+        settings = {key: value for key, value in self.book.items()
+                    if key not in book and key != BookSettingField.KEY_DIMENSIONS}
+        return self.session.updated(book, settings, bookmarks, notes)
+
     def is_open(self) -> bool:
         """ Return True if a book is currently open """
         return self.book is not None
@@ -265,12 +310,13 @@ class DilBook(DbBook):
             The return will be the books record (in dict format)
         """
         bookname = kwargs[BookField.NAME]
+        page_sizes = kwargs.pop(PageGeometryField.KEY_PAGES, None)
         settings, new_book = self._split_parms(kwargs)
-        record_id = self.add(**new_book)
-
-        for key, value in settings.items():
-            self.dbooksettings.upsert_booksettings(
-                book=record_id, key=key, value=value)
+        with DbHelper.transaction():
+            record_id = self.add(**new_book)
+            self.dbooksettings.upsert_many(record_id, settings)
+            if page_sizes:
+                self.dbgeometry.set_geometry(record_id, page_sizes)
         return self.getbook(book=bookname)
 
     def delete_pages(self, book_location) -> bool:
@@ -292,10 +338,12 @@ class DilBook(DbBook):
         book_id = None
         if book is not None and BookField.ID in book:
             book_id = book[BookField.ID]
-            DbBook().del_by_column(BookField.ID, book_id)
+            with DbHelper.transaction():
+                DbBook().del_by_column(BookField.ID, book_id)
+                self.dbooksettings.delete_all_values(book=book_id, ignore=True)
+                self.dbgeometry.delete_all(book_id)
+                DbBookmark().delete_all(book_id)
             self.delete_pages(book[BookField.LOCATION])
-            self.dbooksettings.delete_all_values(book=book_id, ignore=True)
-            DbBookmark().delete_all(book_id)
         return book_id is not None
 
     def update_incomplete_books_ui(self):
@@ -340,6 +388,7 @@ class DilBook(DbBook):
             Use this after 'close' a book
         """
         self.book = None
+        self.session = None
         self.changes = {}
         # Set whenever the dirpath alters
         self.book_path_format = ""
@@ -600,7 +649,7 @@ class DilBook(DbBook):
         """ Return True if book is a png. """
         return not self.is_pdf()
 
-    def get_id( self, book=str|int|dict|None)->int:
+    def get_id( self, book:str|int|dict|None=None)->int:
         """ Return either the current book id or look one up"""
         if book is None and self.is_open():
             return self.book[ BookField.ID ]
@@ -615,8 +664,7 @@ class DilBook(DbBook):
         db = {}
         for key, value in self.changes.items():
             if key not in self.column_view:
-                self.dbooksettings.upsert_booksettings(
-                    book_id, key, value, ignore=True)
+                self.dbooksettings.queue_setting(book_id, key, value)
             else:
                 db[key] = value
         if len(db) > 0:
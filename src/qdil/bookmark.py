@@ -27,6 +27,7 @@ from PySide6.QtWidgets  import QInputDialog, QMessageBox
 from qdb.fields.bookmark import BookmarkField
 from qdb.dbbookmark     import DbBookmark
 from ui.bookmark        import UiBookmark
+from util.pageindex     import BookmarkIndex
 
 class DilBookmark( DbBookmark):
     """High level bookmark class, wraps DbBookmark
@@ -38,18 +39,29 @@ class DilBookmark( DbBookmark):
         super().__init__()
         self.bookmark = None
         self.book_name = None
+        self.index = BookmarkIndex()
         self.open( book )
 
-    def open(self, book: str | int ):
-        """ Open bookmark for book """
+    def open(self, book: str | int, bookmarks: list | tuple | None = None ):
+        """ Open bookmark for book. The bookmarks are kept in 'index' so
+            lookups don't use the database. Pass 'bookmarks' if they
+            have already been read (e.g. from the book session) """
         self.close()
         self.book_id   = self.lookup_book_id(book)
+        if bookmarks is None:
+            bookmarks = super().get_all( book=self.book_id ) if self.book_id else []
+        self.index.load( bookmarks )
 
     def close(self):
         """Close book. Name and bookmarks are deleted.
         """
         self.bookmark = None
         self.book_name = None
+        self.index.clear()
+
+    def refresh(self):
+        """ Reload the index after bookmarks were changed """
+        self.index.load( super().get_all( book=self.book_id ) if self.book_id else [] )
 
     def is_open( self )->bool:
         """return open status
@@ -64,61 +76,72 @@ class DilBookmark( DbBookmark):
         Get number of pages
 
         Returns:
-            int: Number of pages in book
+            int: Number of bookmarks in book
         """
-        return super().get_count( book=self.book_name )
+        return len( self.index )
 
     def all( self )->list:
         """
             get all bookmarks complete data
         """
-        return super().get_all( book=self.book_name )
+        return self.index.all()
 
     def get_list(self )->list:
         """
             This returns just the names of bookmarks as a name list
             (Other bookmark fields are ignored )
         """
-        bmk = super().get_all( book=self.book_name )
-        return [ bookmark[ BookmarkField.NAME ] for bookmark in bmk ]
+        return [ bookmark[ BookmarkField.NAME ] for bookmark in self.index.all() ]
 
     def lookup_bookmark( self, page:int)->dict:
         """ Lookup bookmark for current book and page """
-        return super().get_bookmark_for_page( book=self.book_name, page=page )
+        return self.index.for_page( page )
 
     def first(self):
         """ Return first bookmark for current book """
-        return super().get_first( book = self.book_name )
+        return self.index.first()
 
     def last(self):
         """ Return last bookmark for current book """
-        return super().get_last( book = self.book_name )
+        return self.index.last()
 
     def get_previous(self, page:int)->dict:
         """ Get previous boookmark from this page. return a dictionary with page/content """
-        return super().get_previous_bookmark_for_page(book=self.book_name, page=page)
+        return self.index.previous( page )
 
     def get_next(self, page:int)->dict:
         """ Get next """
-        return super().get_next_bookmark_for_page(book=self.book_name, page=page )
+        return self.index.next( page )
 
     def is_last( self, bookmark:dict )->bool:
         """
             Pass in the bookmark dictionary we returned and determine if this is the last
         """
-        next_mark = super().get_next_bookmark_for_page(
-                    book=self.book_name,
-                    page=bookmark[BookmarkField.PAGE ])
-        return( next_mark is None or next_mark[BookmarkField.PAGE] is None )
+        return self.index.is_last( bookmark )
 
     def is_first( self, bookmark:dict)->bool:
         """
             Pass in the bookmark dictionary we returned and determine if this is the first
         """
-        prev = super().get_previous_bookmark_for_page(
-                        book=self.book_name,
-                        page=bookmark[BookmarkField.PAGE ])
-        return  prev is None or prev[BookmarkField.PAGE] is  None
+        return self.index.is_first( bookmark )
+
+    def add(self, book: str | int, bookmark: str, page: int) -> bool:
+        """ Add a bookmark to the database and the index """
+        rtn = super().add( book, bookmark, page )
+        self.refresh()
+        return rtn
+
+    def delete(self, bookmark: str, book: str | int ) -> bool:
+        """ Delete a bookmark from the database and the index """
+        rtn = super().delete( bookmark, book )
+        self.refresh()
+        return rtn
+
+    def delete_all(self, book: str | int) -> bool:
+        """ Delete all the bookmarks for the book and clear the index """
+        rtn = super().delete_all( book )
+        self.refresh()
+        return rtn
 
     def save(self, name:str=None, page:int=0, layout:str=None )->None:
         '''
@@ -131,7 +154,7 @@ class DilBookmark( DbBookmark):
         del layout
         if name is None:
             name = f'Page-{page}'
-        super().add( self.book_name, name, page )
+        self.add( self.book_id, name, page )
 
     def current_book(self , book:str, page_relative:int, page_absolute:int ):
         """Prompt for current page number
@@ -163,7 +186,7 @@ class DilBookmark( DbBookmark):
             if ui_bmk.action_ == 'go':
                 new_page = ui_bmk.selected_page
                 if new_page :
-                    bookm = super().get_bookmark_for_page( book=self.book_name, page=new_page )
+                    bookm = self.index.for_page( new_page )
                 elif ui_bmk.selected_page :
                     #pylint: disable=C0209
                     title = "{}:   {}\n{}:   {}\n{}:    {}\n{}:    {}".format(
@@ -185,6 +208,7 @@ class DilBookmark( DbBookmark):
                         DbBookmark().delete(
                             book=book_name ,
                             bookmark=ui_bmk.selectedBookmark )
+                        self.refresh()
                     qbox.close()
                     del qbox
         ui_bmk.close()
@@ -336,6 +336,8 @@ class DilPreferences():
         """ Set key to a value for a book """
         if self.systempref.contains(key):
             self.systempref.set_value(key, value)
+        elif replace:
+            self.dbsystem.queue_value(key, value)
         else:
             self.dbsystem.set_value(key, value, replace=replace, ignore=ignore)
         return value
@@ -0,0 +1,304 @@
+"""
+Benchmark: page turns
+
+ Runs the program without a display (Qt 'offscreen' platform) against
+ synthetic books and reports page turn speed as JSON.
+
+ PNG and PDF books are generated at each resolution and page count.
+ Each book is opened with SheetMusic.open_book and, for every page
+ layout, pages are turned forward to the end and back again with
+ page_forward / page_previous. A turn is timed until the event queue
+ (and so the page paint) is empty.
+
+ Everything (settings, library and books) is kept in a temporary
+ directory so your own library is never touched.
+
+    python run_benchmark.py --pages 20 100 --dpi 150 300 --output bench.json
+
+ This file is part of SheetMusic
+ Copyright: 2022,2023 by Chrles Gentry
+ You should have received a copy of the GNU General Public License
+ along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+ This file is part of Sheetmusic.
+
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+# pylint: disable=wrong-import-position
+import PySide6
+from PySide6.QtCore import QCoreApplication, QPointF, QSettings, QSizeF
+from PySide6.QtGui import QColor, QImage, QPageSize, QPainter, QPdfWriter, QPen
+from PySide6.QtWidgets import QApplication
+
+from qdb.dbconn import DbConn
+from qdb.dbsystem import DbSystem
+from qdb.fields.book import BookField
+from qdb.keys import DbKeys
+from qdb.setup import Setup
+from qdil.book import DilBook
+from qdil.preferences import SystemPreferences
+from ui.bottomsheet import BottomSheet
+from util.latency import LatencyRecorder
+# pylint: enable=wrong-import-position
+
+LETTER_INCHES = (8.5, 11)
+BOOK_TYPES = [DbKeys.VALUE_PNG, DbKeys.VALUE_PDF]
+LAYOUTS = list(BottomSheet._layout)   # pylint: disable=protected-access
+
+
+# -----------------------------------------------
+#        SYNTHETIC BOOKS
+# -----------------------------------------------
+
+def _draw_page(painter: QPainter, width: float, height: float, page: int) -> None:
+    """ Draw something that looks like a page of music: staves and notes """
+    painter.fillRect(0, 0, int(width), int(height), QColor('white'))
+    pen = QPen(QColor('black'))
+    pen.setWidthF(max(height / 1500, 1.0))
+    painter.setPen(pen)
+    painter.setBrush(QColor('black'))
+    margin = width * 0.08
+    spacing = height / 110
+    staves = 10
+    for staff in range(staves):
+        top = height * 0.08 + staff * (height * 0.85 / staves)
+        for line in range(5):
+            y = top + line * spacing
+            painter.drawLine(QPointF(margin, y), QPointF(width - margin, y))
+        for note in range(24):
+            x = margin + (note + 1) * (width - 2 * margin) / 26
+            y = top + ((note * 7 + page * 3 + staff) % 9) * spacing / 2
+            painter.drawEllipse(QPointF(x, y), spacing * 0.6, spacing * 0.45)
+
+
+def make_png_book(directory: str, pages: int, dpi: int) -> str:
+    """ Create a directory of 'page-nnn.png' files. Return the directory """
+    os.makedirs(directory, exist_ok=True)
+    width, height = int(LETTER_INCHES[0] * dpi), int(LETTER_INCHES[1] * dpi)
+    for page in range(1, pages + 1):
+        qimage = QImage(width, height, QImage.Format_RGB32)
+        painter = QPainter(qimage)
+        _draw_page(painter, width, height, page)
+        painter.end()
+        qimage.save(os.path.join(
+            directory, f'{DbKeys.VALUE_FILE_PREFIX}-{page:03d}.{DbKeys.VALUE_PNG}'))
+    return directory
+
+
+def make_pdf_book(filename: str, pages: int, dpi: int) -> str:
+    """ Create a PDF (vector pages at 'dpi'). Return the filename """
+    writer = QPdfWriter(filename)
+    writer.setResolution(dpi)
+    writer.setPageSize(QPageSize(QSizeF(*LETTER_INCHES), QPageSize.Inch))
+    painter = QPainter(writer)
+    width, height = LETTER_INCHES[0] * dpi, LETTER_INCHES[1] * dpi
+    for page in range(1, pages + 1):
+        if page > 1:
+            writer.newPage()
+        _draw_page(painter, width, height, page)
+    painter.end()
+    return filename
+
+
+def add_book(name: str, location: str, pages: int, book_type: str) -> None:
+    """ Add the book to the library """
+    DilBook().new_book(**{
+        BookField.NAME: name,
+        BookField.SOURCE: location,
+        BookField.LOCATION: location,
+        BookField.SOURCE_TYPE: book_type,
+        BookField.TOTAL_PAGES: pages,
+        BookField.NUMBER_STARTS: 1,
+        BookField.NUMBER_ENDS: pages,
+    })
+
+
+def make_books(directory: str, book_types: list, page_counts: list, dpis: list) -> list[dict]:
+    """ Create and add all the books. Return a description of each """
+    books = []
+    for book_type in book_types:
+        for pages in page_counts:
+            for dpi in dpis:
+                name = f'bench-{book_type}-{pages}p-{dpi}dpi'
+                location = os.path.join(directory, name)
+                if book_type == DbKeys.VALUE_PDF:
+                    make_pdf_book(location + '.pdf', pages, dpi)
+                    location += '.pdf'
+                else:
+                    make_png_book(location, pages, dpi)
+                add_book(name, location, pages, book_type)
+                books.append({'name': name, 'book_type': book_type,
+                              'pages': pages, 'dpi': dpi})
+    return books
+
+
+# -----------------------------------------------
+#        MEASUREMENT
+# -----------------------------------------------
+
+def peak_rss_mb() -> float | None:
+    """ Return the peak resident memory of this process (MB) """
+    try:
+        import resource  # pylint: disable=import-outside-toplevel
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return round(peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), 1)
+
+
+def percentiles(times: list[float]) -> dict:
+    """ Return latency statistics (ms) for a list of times (seconds) """
+    if not times:
+        return {}
+    msecs = sorted(t * 1000 for t in times)
+    cuts = statistics.quantiles(msecs, n=100, method='inclusive') if len(msecs) > 1 \
+        else [msecs[0]] * 99
+    return {'mean': round(statistics.fmean(msecs), 3),
+            'p50': round(cuts[49], 3),
+            'p95': round(cuts[94], 3),
+            'p99': round(cuts[98], 3),
+            'max': round(msecs[-1], 3)}
+
+
+def _turn(app: QApplication, turn) -> float:
+    """ Turn one page and wait until it has been painted """
+    start = time.perf_counter()
+    turn()
+    app.processEvents()
+    return time.perf_counter() - start
+
+
+def run_layout(app: QApplication, window, book: dict, layout: str, passes: int) -> dict:
+    """ Turn through the whole book (forward then back) in one layout """
+    window.open_book(book['name'])
+    window._set_display_page_layout(layout)  # pylint: disable=protected-access
+    window.goto_page(1)
+    app.processEvents()
+    LatencyRecorder.shared().reset()
+    forward = []
+    backward = []
+    for _ in range(passes):
+        while window.ui.pager.get_highest_page_shown() < book['pages']:
+            forward.append(_turn(app, window.page_forward))
+        while window.ui.pager.get_lowest_page_shown() > 1:
+            backward.append(_turn(app, window.page_previous))
+    seconds = sum(forward) + sum(backward)
+    turns = len(forward) + len(backward)
+    return {**book,
+            'layout': layout,
+            'turns': turns,
+            'seconds': round(seconds, 4),
+            'turns_per_second': round(turns / seconds, 2) if seconds else None,
+            'latency_ms': percentiles(forward + backward),
+            'forward_ms': percentiles(forward),
+            'backward_ms': percentiles(backward),
+            'spans': [dict(zip(LatencyRecorder.CSV_HEADER, row))
+                      for row in LatencyRecorder.shared().rows()],
+            'peak_rss_mb': peak_rss_mb()}
+
+
+# -----------------------------------------------
+#        SETUP AND MAIN
+# -----------------------------------------------
+
+def setup_library(directory: str, settings: dict) -> None:
+    """ Point the program settings and library at 'directory' """
+    QSettings.setDefaultFormat(QSettings.IniFormat)
+    QSettings.setPath(QSettings.IniFormat, QSettings.UserScope,
+                      os.path.join(directory, 'settings'))
+    syspref = SystemPreferences()
+    syspref.dbdirectory = directory
+    DbConn.open_db(syspref.dbpath)
+    setup = Setup(syspref.dbpath)
+    setup.init_data()
+    setup.system_update()
+    system = DbSystem()
+    for key, value in settings.items():
+        system.set_value(key, value, replace=True)
+
+
+def parse_args(argv: list) -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description='Headless page turn benchmark')
+    parser.add_argument('--types', nargs='+', default=BOOK_TYPES, choices=BOOK_TYPES,
+                        help='Book types to test')
+    parser.add_argument('--pages', nargs='+', type=int, default=[20, 100],
+                        help='Page counts of the synthetic books')
+    parser.add_argument('--dpi', nargs='+', type=int, default=[150, 300],
+                        help='Resolutions (dots per inch) of the synthetic books')
+    parser.add_argument('--layouts', nargs='+', default=LAYOUTS, choices=LAYOUTS,
+                        help='Page layouts to test')
+    parser.add_argument('--passes', type=int, default=1,
+                        help='Times to go through each book (forward and back)')
+    parser.add_argument('--set', nargs='*', default=[], metavar='KEY=VALUE',
+                        help='System settings to use, e.g. pageStore=1')
+    parser.add_argument('--output', default=None,
+                        help='File for the JSON results (default: standard output)')
+    parser.add_argument('--keep', default=None,
+                        help='Directory to use (and keep) instead of a temporary one')
+    return parser.parse_args(argv)
+
+
+def run(args: argparse.Namespace, directory: str) -> dict:
+    """ Create the library and books, then time every book in every layout """
+    # pylint: disable=import-outside-toplevel
+    from sheetmusic import SheetMusic
+    settings = dict(item.split('=', 1) for item in args.set)
+    setup_library(directory, settings)
+    started = time.perf_counter()
+    books = make_books(os.path.join(directory, 'books'), args.types, args.pages, args.dpi)
+    generate_seconds = time.perf_counter() - started
+
+    app = QApplication.instance()
+    window = SheetMusic()
+    window.show()
+    results = []
+    for book in books:
+        for layout in args.layouts:
+            results.append(run_layout(app, window, book, layout, args.passes))
+    window.close()
+    return {'platform': platform.platform(),
+            'python': platform.python_version(),
+            'pyside': PySide6.__version__,
+            'qt': PySide6.QtCore.qVersion(),
+            'qpa_platform': os.environ.get('QT_QPA_PLATFORM'),
+            'settings': settings,
+            'generate_seconds': round(generate_seconds, 2),
+            'results': results,
+            'peak_rss_mb': peak_rss_mb()}
+
+
+def main(argv: list) -> int:
+    args = parse_args(argv)
+    QCoreApplication.setOrganizationName('OrganMonkey project')
+    QCoreApplication.setApplicationName('SheetMusic_Benchmark')
+    _app = QApplication([sys.argv[0]])
+    if args.keep:
+        os.makedirs(args.keep, exist_ok=True)
+        report = run(args, args.keep)
+    else:
+        with tempfile.TemporaryDirectory(prefix='sheetmusic-bench-') as directory:
+            report = run(args, directory)
+    DbConn.destroy_connection()
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output:
+            output.write(text + '\n')
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -16,16 +16,19 @@ import platform
 import sys
 from genericpath import isfile
 
-from PySide6.QtCore import QEvent, QObject, Qt, QTimer
-from PySide6.QtWidgets import QApplication, QMainWindow,  QMessageBox, QDialog, QFileDialog
+from PySide6.QtCore import QEvent, QObject, Qt, QThreadPool, QTimer
+from PySide6.QtWidgets import (QApplication, QMainWindow,  QMessageBox, QDialog, QFileDialog,
+                               QLabel)
 from PySide6.QtGui import QPixmap, QAction, QPixmapCache
 
 from constants import ProgramConstants
 from qdb.dbconn import DbConn
 from qdb.dbnote import DbNote
 from qdb.dbsystem import DbSystem
+from qdb.dbwriter import DbWriter
 from qdb.keys import DbKeys
-from qdb.log import DbLog, Trace
+from qdb.log import DbLog
+from qdb.logretention import LogRetention
 from qdb.setup import Setup
 
 from qdb.fields.book import BookField
@@ -40,22 +43,34 @@ from qdil.preferences import DilPreferences, SystemPreferences
 from ui.about import UiAbout
 from ui.addbook import UiAddBook
 from ui.bookmark import UiBookmark, UiBookmarkEdit, UiBookmarkAdd
+from ui.bookpages import BookPagesJob, BookPagesSignals
 from ui.file import Openfile, Deletefile, Reimportfile
-from ui.help import UiHelp
 from ui.library import UiLibraryConsolidate, UiLibraryCheck, UiLibraryStats
 from ui.main import UiMain
-from ui.note import UiNote
 from ui.page import PageNumber
+from ui.pagestorejob import PageStoreBuilder, PageStoreJob
+from ui.performance import UiPerformance
 from ui.preferences import UiPreferences
 from ui.properties import UiProperties
 from ui.runscript import RunSilentRunDeep,UiRunSimpleNote, UiRunScript
-
-from util.convert import to_bool, decode, encode
+from ui.thumbnails import ThumbnailMaker
+
+from util.convert import to_bool, to_int, decode, encode
+from util.diskcache import PageDiskCache
+from util.latency import LatencyRecorder
+from util.pagecache import PageCache
+from util.pageformat import PageFormat
+from util.pageindex import NotePages
+from util.pagestore import PageStore
+from util.pdfprocess import PdfRenderProcess
+from util.snapshot import ResumeSnapshot, SnapshotKey
+from util.thumbindex import ThumbnailIndex
 from util.toolconvert import (ImportSettings, UiImportPdfDirectory,
                               UiImportSetting, UiConvertFilenames,
                               UiConvertPDFDocumentDirectory,
                               UiImportPDFDocuments)
 from util.toollist import GenerateToolList
+from util.warmbooks import WarmBooks
 
 
 class SheetMusic(QMainWindow):
@@ -74,6 +89,9 @@ class SheetMusic(QMainWindow):
         self.direction = None
         self._qtimer_wheel = None
         self._notelist = None
+        # Pages of the open book that have notes
+        self.note_pages = NotePages()
+        self._notes_changed = False
 
         self._load_ui()
         self.logger = DbLog('main_window')
@@ -87,17 +105,151 @@ class SheetMusic(QMainWindow):
 
         del tl
 
+        self._set_page_cache_budget()
+        self.page_store_builder = PageStoreBuilder()
+        self.page_store_builder.signals.finished.connect(self._page_store_finished)
+        self.thumbnails = ThumbnailMaker()
+        self.thumbnails.signals.ready.connect(self._thumbnail_ready)
+        self.book_pages_signals = BookPagesSignals()
+        self.book_pages_signals.finished.connect(self._book_pages_found)
+
+        # Slider scrubbing: changes are shown at most once a screen refresh
+        self._slider_scrub = DbKeys.VALUE_SLIDER_SCRUB
+        self._scrub_page = 0
+        self._scrub_timer = QTimer()
+        self._scrub_timer.setSingleShot(True)
+        self._scrub_timer.timeout.connect(self._scrub_frame)
+
+        # Image of the pages shown when the program last closed
+        self._resume_overlay = None
+
         self._perform_resize = False
         self._qtimer = QTimer()
         self._qtimer.timeout.connect(self._set_page_size)
         self._qtimer.setSingleShot(True)
 
+        # Buffered log records are written even when nothing else is logged
+        self._log_timer = QTimer()
+        self._log_timer.timeout.connect(DbLog.flush)
+        self._log_timer.start(int(DbLog.FLUSH_SECONDS * 1000))
+        # Old log records are deleted a batch at a time in the background
+        self._log_cleanup_timer = QTimer()
+        self._log_cleanup_timer.setSingleShot(True)
+        self._log_cleanup_timer.timeout.connect(self._log_cleanup)
+        self._log_cleanup_timer.start(LogRetention.INTERVAL_SECONDS * 1000)
+
+    def _log_cleanup(self) -> None:
+        """ Queue a log retention step and set when the next one runs """
+        retention = LogRetention.shared()
+        # Sooner if the last step found a full batch to delete
+        interval = retention.next_interval()
+        retention.run()
+        self._log_cleanup_timer.start(interval * 1000)
+
     def _load_ui(self) -> None:
         """ Set the data interface preferences, main UI, initialise the main UI"""
         self.dilpref = DilPreferences()
         self.ui = UiMain()
         self.ui.setup_ui(self)
 
+    def _set_page_cache_budget(self) -> None:
+        """ Set the memory budget for decoded pages, the disk space for
+            rendered PDF pages, the PDF render processes and the number
+            of recent books kept in memory from preferences """
+        PageCache.shared().set_budget_mb(to_int(
+            self.dilpref.get_value(DbKeys.SETTING_PAGE_CACHE_SIZE),
+            default=DbKeys.VALUE_PAGE_CACHE_SIZE))
+        PageDiskCache.setup(
+            os.path.join(self.dilpref.dbdirectory, DbKeys.VALUE_PAGE_DISK_CACHE_DIR),
+            to_int(self.dilpref.get_value(DbKeys.SETTING_PAGE_DISK_CACHE_SIZE),
+                   default=DbKeys.VALUE_PAGE_DISK_CACHE_SIZE))
+        PdfRenderProcess.setup(
+            to_int(self.dilpref.get_value(DbKeys.SETTING_PDF_RENDER_PROCESSES),
+                   default=DbKeys.VALUE_PDF_RENDER_PROCESSES))
+        WarmBooks.setup(
+            to_int(self.dilpref.get_value(DbKeys.SETTING_WARM_BOOKS),
+                   default=DbKeys.VALUE_WARM_BOOKS))
+
+    def _page_store_filename(self) -> str:
+        """ Return the page store filename for the current book """
+        return PageStore.filename_for_book(
+            os.path.join(self.dilpref.dbdirectory, DbKeys.VALUE_PAGE_STORE_DIR),
+            self.dlbook.get_id())
+
+    def _find_book_pages(self) -> None:
+        """ Find the page files and the source digest in the background.
+            The page store and thumbnails are opened when they are found """
+        QThreadPool.globalInstance().start(BookPagesJob(
+            self.book_pages_signals,
+            self.dlbook.get_id(),
+            self.dlbook.count(),
+            self.dlbook.get_property(BookField.LOCATION),
+            None if self.dlbook.is_pdf() else self.dlbook.book_path_format))
+
+    def _book_pages_found(self, book_id: int, sources: list, digest: bytes | None) -> None:
+        """ Open the page store and thumbnails if the book is still open """
+        if self.dlbook.is_open() and self.dlbook.get_id() == book_id:
+            self._open_page_store(sources, digest)
+            self._open_thumbnails(sources, digest)
+
+    def _open_page_store(self, sources: list, digest: bytes | None) -> None:
+        """ Use the book's page store if it is up to date. If there
+            isn't one, build it in the background """
+        if self.ui.page_widget().usepdf or \
+                not to_bool(self.dilpref.get_value(DbKeys.SETTING_PAGE_STORE),
+                            DbKeys.VALUE_PAGE_STORE):
+            return
+        if digest is None:
+            return
+        filename = self._page_store_filename()
+        store = PageStore()
+        if store.open(filename, digest):
+            self.ui.page_widget().set_page_store(store)
+            return
+        screen = QApplication.primaryScreen()
+        self.page_store_builder.build(PageStoreJob(
+            self.page_store_builder.signals,
+            self.dlbook.get_id(),
+            filename,
+            sources,
+            int(screen.size().height() * screen.devicePixelRatio()),
+            render_pdf=self.ui.page_widget().RENDER_PDF,
+            image_format=(PageStore.FORMAT_MONO
+                          if self._page_format() == PageFormat.MONO
+                          else PageStore.FORMAT_GREY),
+            digest=digest))
+
+    def _open_thumbnails(self, sources: list, digest: bytes | None) -> None:
+        """ Open the thumbnail index used by the slider preview.
+            Thumbnails are only made when the slider is used """
+        self.thumbnails.open_book(
+            ThumbnailIndex.filename_for_book(
+                os.path.join(self.dilpref.dbdirectory, DbKeys.VALUE_THUMBNAIL_DIR),
+                self.dlbook.get_id()),
+            sources,
+            render_pdf=self.ui.page_widget().RENDER_PDF,
+            digest=digest)
+
+    def _thumbnail_ready(self, generation: int, page: int) -> None:
+        """ A thumbnail was made. Show it if the preview is waiting for it """
+        if generation == self.thumbnails.generation():
+            self.ui.slider_preview.update_page(
+                self.ui.slider_page_position, page, self.thumbnails.thumbnail(page))
+            if page == self._scrub_page and self.ui.slider_page_position.isSliderDown():
+                self._scrub_timer.start(self._scrub_interval())
+
+    def _page_format(self) -> str:
+        """ Return the page format (colour, grey, mono) for the current book """
+        return self.dlbook.get_property(
+            DbKeys.SETTING_PAGE_FORMAT, DbKeys.VALUE_PAGE_FORMAT, system=True)
+
+    def _page_store_finished(self, book_id: int, filename: str, success: bool) -> None:
+        """ A page store was built. If the book is still open start using it """
+        if success and self.dlbook.is_open() and self.dlbook.get_id() == book_id:
+            store = PageStore()
+            if store.open(filename):
+                self.ui.page_widget().set_page_store(store)
+
     def _page_list(self, start_page: int, len_list: int) -> list:
         """creates a list, MAX_PAGES long, of the pages.
         The first entry will always be the one requests.
@@ -148,7 +300,7 @@ class SheetMusic(QMainWindow):
         return self._load_page_widget(plist[0], plist[1], plist[2])
 
     def _load_page_widget(self, pg1: int, pg2: int, pg3: int):
-        self.logger.debug(Trace.callstr())
+        self.logger.debug('Load pages', trace=True)
         page1 = self.dlbook.page_filepath(pg1)
         page2 = self.dlbook.page_filepath(pg2)
         page3 = self.dlbook.page_filepath(pg3)
@@ -181,10 +333,9 @@ class SheetMusic(QMainWindow):
                 self.bookmark.is_last(bookmark))
 
     def _update_note_indicator(self, page_number: int):
-        nlist = self.get_note_list(self.dlbook.get_id())
-        if len(nlist):
-            self.ui.set_book_note((0 in nlist))
-            self.ui.set_page_note((page_number in nlist), page_number)
+        if len(self.note_pages):
+            self.ui.set_book_note(self.note_pages.has(0))
+            self.ui.set_page_note(self.note_pages.has(page_number), page_number)
         else:
             self.ui.set_book_note(False)
             self.ui.set_page_note(False)
@@ -219,12 +370,70 @@ class SheetMusic(QMainWindow):
         """
         if book_id is not None and (self._notelist is None or refresh):
             self._notelist = {}
-            dbnote = DbNote()
-            returnlist = dbnote.get_all(book_id)
+            session = self.dlbook.session
+            if not refresh and session is not None and session.book_id == book_id:
+                returnlist = session.notes
+            else:
+                returnlist = DbNote().get_all(book_id)
             for note in returnlist:
-                self._notelist[note[NoteField.PAGE]] = note
+                self._notelist[note[NoteField.PAGE]] = dict(note)
         return self._notelist
 
+    def _resume_snapshot_key(self, book: str, location: str, page: int) -> SnapshotKey:
+        """ Return the snapshot key for a book page in the current page area """
+        return SnapshotKey(book, location, int(page or 0),
+                           self.ui.stacks.size(), self.ui.stacks.devicePixelRatioF())
+
+    def _save_resume_snapshot(self) -> None:
+        """ Save the pages shown so the next start can show them at once """
+        filename = ResumeSnapshot.filename_for_directory(self.dilpref.dbdirectory)
+        if not self.dlbook.is_open():
+            ResumeSnapshot.remove(filename)
+            return
+        key = self._resume_snapshot_key(
+            self.dlbook.title, self.dlbook.get_property(BookField.LOCATION),
+            self.dlbook.pagenumber)
+        if not ResumeSnapshot.save(filename, self.ui.stacks.grab().toImage(), key,
+                                   self.dlbook.get_property(DbKeys.SETTING_PAGE_LAYOUT)):
+            ResumeSnapshot.remove(filename)
+
+    def show_resume_snapshot(self) -> bool:
+        """Show the pages saved when the program last closed, if they are
+        for the book that is about to be reopened and the page area is the
+        same size. Call after the window is shown and before open_lastbook;
+        the snapshot is taken down when the book has been opened.
+
+        Returns:
+            bool: True if the snapshot is shown
+        """
+        if not decode(self.dilpref.get_value(DbKeys.SETTING_LAST_BOOK_REOPEN),
+                      code=DbKeys.ENCODE_BOOL, default=True):
+            return False
+        recent = self.dlbook.recent()
+        if not recent:
+            return False
+        key = self._resume_snapshot_key(recent[0][BookField.NAME],
+                                        recent[0][BookField.LOCATION],
+                                        recent[0][BookField.LAST_READ])
+        qimage, _ = ResumeSnapshot.load(
+            ResumeSnapshot.filename_for_directory(self.dilpref.dbdirectory), key)
+        if qimage is None:
+            return False
+        self._resume_overlay = QLabel(self.ui.stacks)
+        self._resume_overlay.setPixmap(QPixmap.fromImage(qimage))
+        self._resume_overlay.setGeometry(self.ui.stacks.rect())
+        self._resume_overlay.raise_()
+        self._resume_overlay.show()
+        self._resume_overlay.repaint()
+        return True
+
+    def _hide_resume_snapshot(self) -> None:
+        """ The book is showing: remove the snapshot """
+        if self._resume_overlay is not None:
+            self._resume_overlay.hide()
+            self._resume_overlay.deleteLater()
+            self._resume_overlay = None
+
     def open_book(self, new_book: str, page=None) -> None:
         """Close current book and open new book to requested page
 
@@ -232,28 +441,44 @@ class SheetMusic(QMainWindow):
             new_book (str): Name of new book to open
             page (_type_, optional): _description_. Defaults to None.
         """
-        self.close_book()
-        self.logger.debug(f"BEGIN '{new_book}'")
-        self.logger.debug(Trace.callstr())
+        self.close_book(collect=False)
+        self.logger.debug(f"BEGIN '{new_book}'", trace=True)
+        warm = WarmBooks.shared().take(new_book)
         q_rtn = QMessageBox.Retry
         while q_rtn == QMessageBox.Retry:
-            q_rtn = self.dlbook.open(new_book, page)
+            q_rtn = self.dlbook.open(
+                new_book, page, session=warm.session if warm is not None else None)
+        self._notes_changed = False
 
         if q_rtn == QMessageBox.AcceptRole:
             book_layout = self.dlbook.get_property(
                 BookPropertyField.LAYOUT, system=True)
             smart_page_turn = to_bool(self.dlbook.get_property(
                 DbKeys.SETTING_SMART_PAGES, system=True))
+            progressive = to_bool(self.dlbook.get_property(
+                DbKeys.SETTING_PROGRESSIVE_DISPLAY, system=True),
+                DbKeys.VALUE_PROGRESSIVE_DISPLAY)
+            page_format = self._page_format()
             aspect_ratio = self.dlbook.keep_aspect_ratio
             self.dlbook.pagenumber = self.dlbook.last_pageread
 
             self.ui.show_pager(self.dlbook.get_filetype(),
                                self.dlbook.renderbookpdf())
             self.ui.page_widget().set_display(book_layout)
+            LatencyRecorder.shared().set_context(self.dlbook.get_filetype(), book_layout)
+            self.ui.page_widget().set_page_source(
+                self.dlbook.page_filepath, self.dlbook.count(), self.dlbook.get_id())
             self.ui.page_widget().set_smartpage(smart_page_turn)
+            self.ui.page_widget().set_progressive(progressive)
+            self.ui.page_widget().set_page_format(page_format)
+            self._find_book_pages()
+            self._slider_scrub = to_bool(
+                self.dilpref.get_value(DbKeys.SETTING_SLIDER_SCRUB), DbKeys.VALUE_SLIDER_SCRUB)
             self.ui.page_widget().keep_aspect_ratio = aspect_ratio
             self.ui.page_widget().dimensions = \
                 self.dlbook.get_property(BookSettingField.KEY_DIMENSIONS)
+            if warm is not None:
+                warm.restore(PageCache.shared())
             self._load_pages()
 
             # Update page and menu displays
@@ -263,7 +488,8 @@ class SheetMusic(QMainWindow):
             self.ui.action_aspect_ratio.setChecked(aspect_ratio)
             self.ui.action_smart_pages.setChecked(smart_page_turn)
 
-            self.bookmark.open(new_book)
+            self.bookmark.open(self.dlbook.get_id(), self.dlbook.session.bookmarks)
+            self.note_pages.load(self.dlbook.session.note_pages())
             self._update_menu_bmk_nav(self.bookmark.lookup_bookmark(page))
 
             self.ui.page_widget().show()
@@ -273,12 +499,31 @@ class SheetMusic(QMainWindow):
             if q_rtn == QMessageBox.DestructiveRole:
                 self.dlbook.del_book(new_book)
             self.open_lastbook(noretry=new_book)
+        if warm is not None:
+            warm.release()
         self.logger.debug(f'END "{new_book}"')
 
-    def close_book(self) -> None:
-        """ Close the book, save a pointer to it, and hide the menu items. """
+    def _keep_warm(self) -> None:
+        """ Keep the book being closed in memory so it opens quickly again """
+        notes = DbNote().get_all(self.dlbook.get_id()) if self._notes_changed else None
+        WarmBooks.shared().keep(
+            self.dlbook.title,
+            session=self.dlbook.current_session(self.bookmark.all(), notes),
+            pdf_path=(self.dlbook.page_filepath(0, required=False)
+                      if self.dlbook.is_pdf() else None),
+            pages=self.ui.page_widget().cached_pages())
+
+    def close_book(self, collect: bool = True) -> None:
+        """ Close the book, save a pointer to it, and hide the menu items.
+
+            When another book is opened straight away, pass collect=False:
+            memory isn't garbage collected and the book is kept warm
+            (see WarmBooks) either way.
+        """
         self._notelist = None
+        self.note_pages.clear()
         if self.dlbook.is_open():
+            self._keep_warm()
             self.dilpref.set_value(
                 key=DbKeys.SETTING_LAST_BOOK_NAME,
                 value=encode(
@@ -286,11 +531,19 @@ class SheetMusic(QMainWindow):
                         code=DbKeys.ENCODE_STR )
             )
             self.dlbook.close()
+            self.thumbnails.close()
             self.ui.pager.clear()
-            QPixmapCache().clear()
         self._set_menu_book_options(False)
         self.ui.main_window.hide()
-        gc.collect()
+        if collect:
+            gc.collect()
+
+    def _reopen_book(self) -> None:
+        """ Open the current book again, reading everything from the start """
+        title = self.dlbook.title
+        self.close_book(collect=False)
+        WarmBooks.shared().discard(title)
+        self.open_book(title)
 
     def setup_wheel_timer(self) -> None:
         """ Setup an interval timer """
@@ -344,7 +597,8 @@ class SheetMusic(QMainWindow):
 
     def _set_page_size(self):
         self.ui.page_widget().resize(self.ui.stacks.size())
-        self._reload_pages()
+        if not self.ui.page_widget().rescale_pages():
+            self._reload_pages()
 
     def event_resize(self, event):
         """ Set a timer for resizing """
@@ -362,23 +616,41 @@ class SheetMusic(QMainWindow):
             replace=True,
             value=encode(DbKeys.ENCODE_STR, self.import_dir)
         )
+        self.page_store_builder.cancel()
+        self.page_store_builder.wait()
+        self._save_resume_snapshot()
         self.close_book()
+        WarmBooks.shared().clear()
+        self.thumbnails.close()
+        PdfRenderProcess.setup(0)
+        self._log_timer.stop()
+        self._log_cleanup_timer.stop()
+        DbLog.flush()
+        DbWriter.shared().stop()
         DbConn.close_db()
 
+    @LatencyRecorder.timed('page_previous')
     def page_previous(self) -> None:
         """ Move to previous page """
+        LatencyRecorder.shared().start_turn()
         pg = self.ui.pager.get_lowest_page_shown()-1
-        if self.dlbook.is_valid_page(pg):
+        if not self.dlbook.is_valid_page(pg):
+            LatencyRecorder.shared().cancel_turn()
+        else:
             is_endpage = pg == 1
             self.ui.pager.previous_page(
                 self.dlbook.page_filepath(pg), pg, end=is_endpage)
             self.dlbook.pagenumber = pg
             self.update_status_bar()
 
+    @LatencyRecorder.timed('page_forward')
     def page_forward(self) -> None:
         """ Move to next page """
+        LatencyRecorder.shared().start_turn()
         pg = self.ui.pager.get_highest_page_shown()+1
-        if self.dlbook.is_valid_page(pg):
+        if not self.dlbook.is_valid_page(pg):
+            LatencyRecorder.shared().cancel_turn()
+        else:
             self.dlbook.pagenumber = pg
             number_pages = self.dlbook.count()
             self.ui.pager.next_page(self.dlbook.page_filepath(pg),
@@ -511,12 +783,15 @@ class SheetMusic(QMainWindow):
         # HELP:
         self.ui.action_help_about.triggered.connect(self._action_help_about)
         self.ui.action_help.triggered.connect(self._action_help)
+        self.ui.action_help_performance.triggered.connect(self._action_help_performance)
 
         # INTERNAL
         self.ui.slider_page_position.valueChanged.connect(
             self._action_slider_changed)
         self.ui.slider_page_position.sliderReleased.connect(
             self._action_slider_released)
+        self.ui.slider_page_position.sliderPressed.connect(
+            self._action_slider_pressed)
 
         # self.ui.action_bookmark.triggered.connect(self.action_goto_bookmark)
         # self.ui.twoPagesSide.installEventFilter( self)
@@ -534,6 +809,8 @@ class SheetMusic(QMainWindow):
                     f'Recent book "{last_book_name}" noretry: "{noretry}"')
                 if noretry != last_book_name:
                     self.open_book(recent[0][BookField.NAME])
+        # Pages are now loaded: take the snapshot down once they are painted
+        QTimer.singleShot(0, self._hide_resume_snapshot)
 
     def set_title(self, bookmark: str = None) -> None:
         """ Title is made of the title and bookmark if there is one """
@@ -551,17 +828,54 @@ class SheetMusic(QMainWindow):
             self.ui.action_bookmark_next.setDisabled(self.bookmark.is_last(bmk))
             self.goto_page(bmk[BookmarkField.PAGE])
 
+    def _action_slider_pressed(self) -> None:
+        """ Slider is being dragged: make any missing thumbnails,
+            nearest to the current page first """
+        self.thumbnails.fill(self.dlbook.pagenumber)
+
     def _action_slider_changed(self, absolute_page_number) -> None:
-        """ The slider has changed so update page numbers """
+        """ The slider has changed so update page numbers. While the
+            slider is dragged, changes are held until the next frame """
+        if self.ui.slider_page_position.isSliderDown():
+            self._scrub_page = absolute_page_number
+            if not self._scrub_timer.isActive():
+                self._scrub_timer.start(self._scrub_interval())
+            return
         self._update_pages_shown(absolute_page_number)
         self._update_note_indicator(absolute_page_number)
 
+    def _scrub_interval(self) -> int:
+        """ Milliseconds between frames while scrubbing (the screen refresh) """
+        screen = self.screen() or QApplication.primaryScreen()
+        return max(int(1000 / max(screen.refreshRate(), 1.0)), 1)
+
+    def _scrub_frame(self) -> None:
+        """ Show the last slider position: page numbers, the preview
+            and (if set) low resolution pages. Earlier positions are skipped """
+        if not self.ui.slider_page_position.isSliderDown() or not self._scrub_page:
+            return
+        page = self._scrub_page
+        self._update_pages_shown(page)
+        self._update_note_indicator(page)
+        self.ui.slider_preview.show_page(
+            self.ui.slider_page_position,
+            page,
+            self.ui.label_page_relative.text(),
+            self.thumbnails.thumbnail(page))
+        if self._slider_scrub and self.dlbook.is_open():
+            self.ui.pager.scrub_frame(self._page_list(page, self.ui.pager.number_pages()),
+                                      self.thumbnails.index.image)
+
     def _action_slider_released(self) -> None:
-        """ Slider released so update the progress bar. """
+        """ Slider released so show the final page at full quality """
+        self._scrub_timer.stop()
+        self._scrub_page = 0
+        self.ui.slider_preview.hide()
         self.goto_page(self.sender().value())
 
     def _action_note(self, page: int, seq: int, title_suffix: str):
         """ Add a note to a page """
+        from ui.note import UiNote  # pylint: disable=import-outside-toplevel
         dbnote = DbNote()
         uinote = UiNote()
         book_id = self.dlbook.get_id()
@@ -576,11 +890,17 @@ class SheetMusic(QMainWindow):
         if uinote.exec():
             if uinote.delete() and NoteField.ID in note:
                 dbnote.delete_note(note)
+                self.note_pages.set(page, dbnote.count(book_id, page) > 0)
+                self._notelist = None
+                self._notes_changed = True
             elif uinote.text_changed():
                 note[NoteField.NOTE] = uinote.text()
                 note[NoteField.LOCATION] = uinote.location()
                 dbnote.add(note)
-                self.ui.set_book_note(True)
+                self.note_pages.set(page)
+                self._notelist = None
+                self._notes_changed = True
+            self._update_note_indicator(self.dlbook.pagenumber)
 
     def action_clicked_bookmark(self) -> None:
         """ menu clicked on bookmark """
@@ -649,6 +969,7 @@ class SheetMusic(QMainWindow):
     def _action_file_delete(self) -> None:
         df = Deletefile()
         if df.delete():
+            WarmBooks.shared().discard(df.book_name)
             self.logger.info(f'Deleted book {df.book_name}')
 
     def _show_import_status(self, good_completion, number_files: int):
@@ -722,6 +1043,7 @@ class SheetMusic(QMainWindow):
 
             if uiconvert.process_file(book[BookField.SOURCE]):
                 uiconvert.add_books_to_library()
+                WarmBooks.shared().discard(rif.book_name)
             del uiconvert
         del rif
 
@@ -735,9 +1057,11 @@ class SheetMusic(QMainWindow):
 
     def _action_file_library_consolidate(self) -> None:
         UiLibraryConsolidate().exec()
+        WarmBooks.shared().clear()
 
     def _action_file_library_check(self) -> None:
         UiLibraryCheck().exec()
+        WarmBooks.shared().clear()
 
     def _action_file_library_stats(self) -> None:
         UiLibraryStats().exec()
@@ -788,8 +1112,7 @@ class SheetMusic(QMainWindow):
         property_editor = UiProperties(self.dlbook.get_properties())
         if property_editor.exec():
             if self.dlbook.update_properties(property_editor.get_changes()):
-                bookname = self.dlbook.title
-                self.open_book(bookname)
+                self._reopen_book()
 
     def _action_edit_preferences(self) -> None:
         try:
@@ -800,10 +1123,13 @@ class SheetMusic(QMainWindow):
             changes = pref.get_changes()
             if len(changes) > 0:
                 self.dilpref.save_all(changes)
+                DbLog.reload_level()
+                self._set_page_cache_budget()
+                WarmBooks.shared().clear()
             # settings = self.dilpref.get_all()
             # self.ui.set_navigation_shortcuts(settings)
             # self.ui.set_bookmark_shortcuts(settings)
-                self.open_book(self.dlbook.title)
+                self._reopen_book()
         except Exception as err:
             err_str = str(err)
             self.logger.critical(
@@ -830,7 +1156,8 @@ class SheetMusic(QMainWindow):
     # VIEW ACTIONS
     def _action_refresh(self) -> None:
         QPixmapCache().clear()
-        self.open_book(self.dlbook.title)
+        PageCache.shared().discard_book(self.dlbook.get_id())
+        self._reopen_book()
 
     def _action_view_one_page(self) -> None:
         self._set_display_page_layout(DbKeys.VALUE_PAGES_SINGLE)
@@ -859,7 +1186,8 @@ class SheetMusic(QMainWindow):
     def _action_view_aspect_ratio(self, state) -> None:
         self.dlbook.keep_aspect_ratio = state
         self.ui.pager.keep_aspect_ratio = state
-        self._load_pages()
+        if not self.ui.pager.rescale_pages():
+            self._load_pages()
 
     def _action_view_smart_pages(self, state: bool) -> None:
         self.dlbook.set_property(DbKeys.SETTING_SMART_PAGES, state)
@@ -1016,7 +1344,12 @@ class SheetMusic(QMainWindow):
     def _action_help_about(self) -> None:
         UiAbout().exec()
 
+    def _action_help_performance(self) -> None:
+        UiPerformance().exec()
+
     def _action_help(self) -> None:
+        # QtHelp is only loaded when help is first asked for
+        from ui.help import UiHelp  # pylint: disable=import-outside-toplevel
         try:
             DbConn.close_db()
             uihelp = UiHelp(self, self.get_main_path())
@@ -1049,6 +1382,7 @@ class SheetMusic(QMainWindow):
         depending on what value is in the book entry"""
         self.dlbook.set_property(DbKeys.SETTING_PAGE_LAYOUT, value)
         self.ui.pager.set_display(value)
+        LatencyRecorder.shared().set_context(self.dlbook.get_filetype(), value)
         self._set_menu_page_options(value)
         self._load_pages()
 
@@ -1138,6 +1472,9 @@ if __name__ == "__main__":
     setup.init_data()
     setup.logging(mainDirectory)
     setup.system_update()
+    # Writes the user doesn't wait for are done in the background from here on
+    DbWriter.shared().start(dbLocation)
+    setup.set_incremental_vacuum()
 
     logger = logging.getLogger('main')
 
@@ -1149,9 +1486,12 @@ if __name__ == "__main__":
     window.restore_window_from_settings()
     window.show()
 
+    q_app.processEvents()
+    window.show_resume_snapshot()
     window.open_lastbook()
     window.setup_wheel_timer()
     window.show()
     rtn = q_app.exec()
+    DbWriter.shared().stop()
     DbConn.destroy_connection()
     sys.exit(rtn)
@@ -0,0 +1,52 @@
+"""
+Test frame: Book pages finder
+
+ This file is part of SheetMusic
+ Copyright: 2022,2023 by Chrles Gentry
+ You should have received a copy of the GNU General Public License
+ along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+#pylint: disable=C0115
+#pylint: disable=C0116
+
+import os
+import tempfile
+import unittest
+
+from ui.bookpages import BookPagesJob, BookPagesSignals
+from util.pagestore import PageStore
+
+class TestBookPages( unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path_format = os.path.join( self.tmp.name, 'page-{0:03d}.png' )
+        for page in ( 1, 3 ):
+            with open( self.path_format.format( page ), 'wb' ) as page_file:
+                page_file.write( b'page' )
+        self.results = []
+        self.signals = BookPagesSignals()
+        self.signals.finished.connect( lambda *args: self.results.append( args ) )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_pages(self):
+        BookPagesJob( self.signals, 7, 3, self.tmp.name, self.path_format ).run()
+        book_id, sources, digest = self.results[0]
+        self.assertEqual( book_id, 7 )
+        self.assertEqual( sources,
+            [ self.path_format.format( 1 ), None, self.path_format.format( 3 ) ] )
+        self.assertEqual( digest, PageStore.source_digest( self.tmp.name ) )
+
+    def test_pdf(self):
+        pdf = self.path_format.format( 1 )
+        BookPagesJob( self.signals, 7, 2, pdf ).run()
+        self.assertEqual( self.results[0][1], [ pdf, pdf ] )
+        BookPagesJob( self.signals, 7, 2, os.path.join( self.tmp.name, 'missing.pdf' ) ).run()
+        self.assertEqual( self.results[1][1:], ( [ None, None ], None ) )
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,91 @@
+"""
+Test frame: Rendered page disk cache
+
+ This file is part of SheetMusic
+ Copyright: 2022,2023 by Chrles Gentry
+ You should have received a copy of the GNU General Public License
+ along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+#ignore too many methods, missing doc strings
+#pylint: disable=C0115
+#pylint: disable=C0116
+#pylint: disable=R0904
+
+import os
+import tempfile
+import time
+import unittest
+
+from util.diskcache import PageDiskCache
+
+class TestPageDiskCache( unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.source = os.path.join( self.tmp.name, 'book.pdf')
+        with open( self.source, 'wb') as pdf:
+            pdf.write( b'%PDF-1.4 test')
+        self.cache = PageDiskCache( os.path.join( self.tmp.name, 'cache'), 1024*1024 )
+        self.data = bytes( range(256) ) * 40     # 10 rows of 1024 bytes
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_key(self):
+        key = PageDiskCache.key( self.source, 1, 100, 200 )
+        self.assertEqual( len(key), PageDiskCache.DIGEST_SIZE )
+        self.assertEqual( key, PageDiskCache.key( self.source, 1, 100, 200 ) )
+        self.assertNotEqual( key, PageDiskCache.key( self.source, 2, 100, 200 ) )
+        self.assertNotEqual( key, PageDiskCache.key( self.source, 1, 100, 201 ) )
+        self.assertIsNone( PageDiskCache.key( self.source + 'x', 1, 100, 200 ) )
+
+    def test_key_changes_with_file(self):
+        key = PageDiskCache.key( self.source, 1, 100, 200 )
+        with open( self.source, 'ab') as pdf:
+            pdf.write( b'more')
+        self.assertNotEqual( key, PageDiskCache.key( self.source, 1, 100, 200 ) )
+
+    def test_write_read(self):
+        key = PageDiskCache.key( self.source, 1, 256, 10 )
+        self.assertIsNone( self.cache.read( key ) )
+        self.assertTrue( self.cache.write( key, 5, 256, 10, 1024, self.data ) )
+        self.assertEqual( self.cache.read( key ), (5, 256, 10, 1024, self.data) )
+        self.assertGreater( self.cache.used(), 0 )
+
+    def test_corrupt_entry(self):
+        key = PageDiskCache.key( self.source, 1, 256, 10 )
+        self.cache.write( key, 5, 256, 10, 1024, self.data )
+        filename = self.cache._filename( key )
+        with open( filename, 'r+b') as entry:
+            entry.seek( -4, os.SEEK_END )
+            entry.write( b'xxxx')
+        self.assertIsNone( self.cache.read( key ) )
+        self.assertFalse( os.path.isfile( filename ) )
+
+    def test_eviction(self):
+        self.cache.set_max_bytes( 0 )
+        self.assertFalse( self.cache.write(
+            PageDiskCache.key( self.source, 1, 256, 10 ), 5, 256, 10, 1024, self.data ) )
+        self.cache.set_max_bytes( 1024*1024 )
+        keys = [ PageDiskCache.key( self.source, page, 256, 10 ) for page in range(1,6) ]
+        for key in keys:
+            self.cache.write( key, 5, 256, 10, 1024, self.data )
+        entry_size = os.path.getsize( self.cache._filename( keys[0] ) )
+        # Make the first entry the oldest, then limit to 3 entries
+        old = time.time() - 100
+        os.utime( self.cache._filename( keys[0] ), (old, old) )
+        self.cache.set_max_bytes( entry_size * 3 )
+        self.assertLessEqual( self.cache.used(), entry_size * 3 )
+        self.assertIsNone( self.cache.read( keys[0] ) )
+
+    def test_clear(self):
+        key = PageDiskCache.key( self.source, 1, 256, 10 )
+        self.cache.write( key, 5, 256, 10, 1024, self.data )
+        self.cache.clear()
+        self.assertEqual( self.cache.used(), 0 )
+        self.assertIsNone( self.cache.read( key ) )
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,109 @@
+"""
+Test frame: Page turn latency
+
+ This file is part of SheetMusic
+ Copyright: 2022,2023 by Chrles Gentry
+ You should have received a copy of the GNU General Public License
+ along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+#ignore too many methods, missing doc strings
+#pylint: disable=C0115
+#pylint: disable=C0116
+#pylint: disable=R0904
+
+import csv
+import os
+import tempfile
+import unittest
+
+from util.latency import LatencyHistogram, LatencyRecorder
+
+class TestLatencyHistogram( unittest.TestCase):
+
+    def test_empty(self):
+        histogram = LatencyHistogram()
+        self.assertEqual( histogram.percentile( 50 ), 0.0 )
+        self.assertEqual( histogram.mean(), 0.0 )
+
+    def test_percentiles(self):
+        histogram = LatencyHistogram()
+        for msecs in range( 1, 101 ):
+            histogram.add( float( msecs ) )
+        self.assertEqual( histogram.count, 100 )
+        self.assertAlmostEqual( histogram.mean(), 50.5 )
+        # Buckets grow by 5% so values are within 5%
+        self.assertAlmostEqual( histogram.percentile( 50 ), 50, delta=2.5 )
+        self.assertAlmostEqual( histogram.percentile( 95 ), 95, delta=4.75 )
+        self.assertAlmostEqual( histogram.percentile( 99 ), 99, delta=4.95 )
+        self.assertEqual( histogram.percentile( 100 ), 100 )
+        self.assertEqual( histogram.minimum, 1 )
+
+    def test_extremes(self):
+        histogram = LatencyHistogram()
+        histogram.add( 0.0 )
+        histogram.add( 1e12 )
+        self.assertEqual( histogram.counts[0], 1 )
+        self.assertEqual( histogram.counts[-1], 1 )
+        self.assertEqual( histogram.percentile( 100 ), 1e12 )
+
+
+class TestLatencyRecorder( unittest.TestCase):
+
+    def setUp(self):
+        self.recorder = LatencyRecorder()
+
+    def test_context(self):
+        self.recorder.set_context( 'pdf', '1page' )
+        self.recorder.add( 'next_page', 1.0, 1.010 )
+        self.recorder.set_context( 'png', '2side' )
+        self.recorder.add( 'next_page', 1.0, 1.002 )
+        self.recorder.add( 'next_page', 1.0, 1.004 )
+        rows = self.recorder.rows()
+        self.assertEqual( len( rows ), 2 )
+        self.assertEqual( rows[0][0:4], ['next_page', 'pdf', '1page', 1] )
+        self.assertEqual( rows[1][0:4], ['next_page', 'png', '2side', 2] )
+        self.assertAlmostEqual( rows[1][4], 3.0, places=3 )
+
+    def test_span(self):
+        with self.recorder.span( 'block' ):
+            pass
+        self.assertEqual( self.recorder.rows()[0][3], 1 )
+
+    def test_turn(self):
+        self.recorder.painted()
+        self.assertEqual( self.recorder.rows(), [] )
+        self.recorder.start_turn()
+        self.recorder.cancel_turn()
+        self.recorder.painted()
+        self.assertEqual( self.recorder.rows(), [] )
+        self.recorder.start_turn()
+        self.recorder.painted()
+        self.recorder.painted()
+        self.assertEqual( self.recorder.rows()[0][0], LatencyRecorder.TURN )
+        self.assertEqual( self.recorder.rows()[0][3], 1 )
+
+    def test_disabled_and_reset(self):
+        self.recorder.enabled = False
+        self.recorder.add( 'a', 0.0, 1.0 )
+        self.assertEqual( self.recorder.rows(), [] )
+        self.recorder.enabled = True
+        self.recorder.add( 'a', 0.0, 1.0 )
+        self.recorder.reset()
+        self.assertEqual( self.recorder.rows(), [] )
+
+    def test_csv(self):
+        self.recorder.add( 'a', 0.0, 0.5 )
+        with tempfile.TemporaryDirectory() as tmp:
+            filename = os.path.join( tmp, 'timings.csv')
+            self.assertEqual( self.recorder.write_csv( filename ), 1 )
+            with open( filename, newline='', encoding='utf-8') as csvfile:
+                rows = list( csv.reader( csvfile ) )
+        self.assertEqual( rows[0], LatencyRecorder.CSV_HEADER )
+        self.assertEqual( rows[1][0], 'a' )
+        self.assertEqual( float( rows[1][5] ), 500.0 )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,150 @@
+"""
+Test frame: Page cache
+
+ This file is part of SheetMusic
+ Copyright: 2022,2023 by Chrles Gentry
+ You should have received a copy of the GNU General Public License
+ along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+#ignore too many methods, missing doc strings
+#pylint: disable=C0115
+#pylint: disable=C0116
+#pylint: disable=R0904
+
+import unittest
+
+from util.pagecache import PageCache
+
+class TestPageCache( unittest.TestCase):
+
+    def setUp(self):
+        # 'images' are just strings: the size is the length of the string
+        self.cache = PageCache( budget=100, sizeof=len )
+
+    def key(self, page:int, book:int=1 )->tuple:
+        return PageCache.key( book, page, 800, 600, 1.0, True )
+
+    def test_key(self):
+        self.assertEqual( self.key(1), (1, 1, 800, 600, 1.0, True ) )
+        self.assertNotEqual( self.key(1),
+            PageCache.key( 1, 1, 800, 600, 2.0, True ) )
+        self.assertNotEqual( self.key(1),
+            PageCache.key( 1, 1, 800, 600, 1.0, False ) )
+
+    def test_put_get(self):
+        self.assertIsNone( self.cache.get( self.key(1) ) )
+        self.assertTrue( self.cache.put( self.key(1), 'a'*10 ) )
+        self.assertEqual( self.cache.get( self.key(1) ), 'a'*10 )
+        self.assertEqual( self.cache.used, 10 )
+        self.assertEqual( self.cache.hits, 1 )
+        self.assertEqual( self.cache.misses, 1 )
+
+    def test_replace(self):
+        self.cache.put( self.key(1), 'a'*10 )
+        self.cache.put( self.key(1), 'b'*20 )
+        self.assertEqual( len(self.cache), 1 )
+        self.assertEqual( self.cache.used, 20 )
+
+    def test_lru_eviction(self):
+        for page in range(1,5):
+            self.cache.put( self.key(page), str(page)*30 )
+        # Only 3 fit in 100 bytes; page 1 is the oldest
+        self.assertEqual( len(self.cache), 3 )
+        self.assertNotIn( self.key(1), self.cache )
+        # touch page 2, add 5: page 3 should go
+        self.cache.get( self.key(2) )
+        self.cache.put( self.key(5), '5'*30 )
+        self.assertIn( self.key(2), self.cache )
+        self.assertNotIn( self.key(3), self.cache )
+        self.assertLessEqual( self.cache.used, self.cache.budget )
+
+    def test_peek(self):
+        self.cache.put( self.key(1), '1'*30 )
+        self.cache.put( self.key(2), '2'*30 )
+        self.cache.put( self.key(3), '3'*30 )
+        # peek doesn't count or touch: page 1 is still the oldest
+        self.assertEqual( self.cache.peek( self.key(1) ), '1'*30 )
+        self.assertIsNone( self.cache.peek( self.key(9) ) )
+        self.assertEqual( self.cache.hits + self.cache.misses, 0 )
+        self.cache.put( self.key(4), '4'*30 )
+        self.assertNotIn( self.key(1), self.cache )
+
+    def test_too_large(self):
+        self.assertFalse( self.cache.put( self.key(1), 'a'*101 ) )
+        self.assertEqual( self.cache.used, 0 )
+
+    def test_set_budget(self):
+        for page in range(1,4):
+            self.cache.put( self.key(page), str(page)*30 )
+        self.cache.set_budget( 40 )
+        self.assertEqual( len(self.cache), 1 )
+        self.assertIn( self.key(3), self.cache )
+        self.cache.set_budget_mb( 1 )
+        self.assertEqual( self.cache.budget, PageCache.MEGABYTE )
+
+    def test_resident(self):
+        for page in range(1,4):
+            self.cache.put( self.key(page), str(page)*30 )
+        self.cache.set_resident( 1, 'x'*30 )
+        self.assertEqual( self.cache.resident, 30 )
+        self.assertEqual( len(self.cache), 2 )
+        self.assertNotIn( self.key(1), self.cache )
+        # replacing the resident image for an owner doesn't double count
+        self.cache.set_resident( 1, 'x'*10 )
+        self.assertEqual( self.cache.resident, 10 )
+        self.cache.set_resident( 1, None )
+        self.assertEqual( self.cache.resident, 0 )
+
+    def test_resident_share(self):
+        # Residents can't take more than their share: pages are still cached
+        self.assertTrue( self.cache.set_resident( 1, 'x'*40 ) )
+        self.assertFalse( self.cache.set_resident( 2, 'y'*20 ) )
+        self.assertEqual( self.cache.resident, 40 )
+        self.assertTrue( self.cache.put( self.key(1), 'a'*50 ) )
+        # the same image again doesn't add to the residents
+        source = 'S'*10
+        self.assertTrue( self.cache.set_resident( 3, source ) )
+        self.assertTrue( self.cache.set_resident( 4, source ) )
+        self.assertEqual( self.cache.resident, 50 )
+
+    def test_source(self):
+        self.assertTrue( self.cache.put( self.key(1), 'a'*10, 'S'*30 ) )
+        self.assertEqual( self.cache.source( self.key(1) ), 'S'*30 )
+        self.assertEqual( self.cache.used, 40 )
+        self.assertTrue( self.cache.put( self.key(2), 'b'*10 ) )
+        self.assertIsNone( self.cache.source( self.key(2) ) )
+        self.assertIsNone( self.cache.source( self.key(3) ) )
+        # the source counts against the budget
+        self.assertFalse( self.cache.put( self.key(4), 'c'*10, 'S'*95 ) )
+
+    def test_counted_once(self):
+        # A source held by pages and by a page widget is only counted once
+        source = 'S'*30
+        self.cache.set_resident( 1, source )
+        self.assertTrue( self.cache.put( self.key(1), 'a'*10, source ) )
+        self.assertTrue( self.cache.put( self.key(2), 'b'*10, source ) )
+        self.assertEqual( self.cache.used, 50 )
+        self.assertEqual( self.cache.resident, 30 )
+        self.cache.set_resident( 1, None )
+        self.assertEqual( self.cache.used, 50 )
+        self.cache.clear()
+        self.assertEqual( self.cache.used, 0 )
+
+    def test_discard_book(self):
+        self.cache.put( self.key(1, book=1), 'a' )
+        self.cache.put( self.key(1, book=2), 'b' )
+        self.cache.discard_book( 1 )
+        self.assertNotIn( self.key(1, book=1), self.cache )
+        self.assertIn( self.key(1, book=2), self.cache )
+        self.assertEqual( self.cache.used, 1 )
+
+    def test_clear(self):
+        self.cache.put( self.key(1), 'a' )
+        self.cache.clear()
+        self.assertEqual( len(self.cache), 0 )
+        self.assertEqual( self.cache.used, 0 )
+
+if __name__ == "__main__":
+    unittest.main()
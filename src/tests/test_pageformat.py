@@ -0,0 +1,74 @@
+"""
+Test frame: Page image format
+
+ This file is part of SheetMusic
+ Copyright: 2022,2023 by Chrles Gentry
+ You should have received a copy of the GNU General Public License
+ along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+#ignore too many methods, missing doc strings
+#pylint: disable=C0115
+#pylint: disable=C0116
+#pylint: disable=R0904
+
+import unittest
+
+from PySide6.QtGui import QColor, QImage, QPainter, Qt
+
+from util.pageformat import PageFormat
+
+class TestPageFormat( unittest.TestCase):
+
+    def page(self, background: QColor, ink: QColor = None) -> QImage:
+        qimage = QImage( 200, 300, QImage.Format_ARGB32 )
+        qimage.fill( background )
+        if ink is not None:
+            painter = QPainter( qimage )
+            painter.fillRect( 10, 10, 180, 100, ink )
+            painter.end()
+        return qimage
+
+    def test_grey_detect(self):
+        self.assertTrue( PageFormat.is_grey( self.page( Qt.white, Qt.black ) ) )
+        self.assertTrue( PageFormat.is_grey( self.page( QColor( 128, 130, 127 ) ) ) )
+        self.assertFalse( PageFormat.is_grey( self.page( Qt.white, Qt.red ) ) )
+
+    def test_mono_detect(self):
+        self.assertTrue( PageFormat.is_mono( self.page( Qt.white, Qt.black ) ) )
+        self.assertFalse( PageFormat.is_mono( self.page( Qt.white, Qt.gray ) ) )
+
+    def test_convert(self):
+        black_white = self.page( Qt.white, Qt.black )
+        shaded = self.page( Qt.white, Qt.gray )
+        colour = self.page( Qt.white, Qt.blue )
+        self.assertEqual( PageFormat.convert( black_white, PageFormat.COLOUR ).format(),
+                          QImage.Format_ARGB32 )
+        self.assertEqual( PageFormat.convert( black_white, PageFormat.GREY ).format(),
+                          QImage.Format_Grayscale8 )
+        self.assertEqual( PageFormat.convert( black_white, PageFormat.MONO ).format(),
+                          QImage.Format_Mono )
+        self.assertEqual( PageFormat.convert( shaded, PageFormat.MONO ).format(),
+                          QImage.Format_Grayscale8 )
+        self.assertEqual( PageFormat.convert( colour, PageFormat.MONO ).format(),
+                          QImage.Format_ARGB32 )
+
+    def test_scaled_format(self):
+        mono = PageFormat.convert( self.page( Qt.white, Qt.black ), PageFormat.MONO )
+        scaled = mono.scaled( 100, 150, Qt.KeepAspectRatio, Qt.SmoothTransformation )
+        self.assertEqual( PageFormat.scaled_format( scaled, mono ).format(),
+                          QImage.Format_Grayscale8 )
+        colour = self.page( Qt.white, Qt.blue )
+        self.assertIs( PageFormat.scaled_format( colour, colour ), colour )
+
+    def test_memory(self):
+        page = self.page( Qt.white, Qt.black )
+        grey = PageFormat.convert( page, PageFormat.GREY )
+        mono = PageFormat.convert( page, PageFormat.MONO )
+        self.assertEqual( page.sizeInBytes(), grey.sizeInBytes() * 4 )
+        self.assertLess( mono.sizeInBytes() * 25, page.sizeInBytes() )
+
+
+if __name__ == "__main__":
+    unittest.main()
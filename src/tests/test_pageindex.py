@@ -0,0 +1,95 @@
+"""
+Test frame: Page indexes
+
+ This file is part of SheetMusic
+ Copyright: 2022,2023 by Chrles Gentry
+ You should have received a copy of the GNU General Public License
+ along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+#ignore too many methods, missing doc strings
+#pylint: disable=C0115
+#pylint: disable=C0116
+#pylint: disable=R0904
+
+import unittest
+
+from qdb.fields.bookmark import BookmarkField
+from util.pageindex import BookmarkIndex, NotePages
+
+def _bookmark( name, page ):
+    return { BookmarkField.NAME: name, BookmarkField.PAGE: page }
+
+class TestBookmarkIndex( unittest.TestCase):
+
+    def setUp(self):
+        self.index = BookmarkIndex( [
+            _bookmark( 'bk20', 20 ), _bookmark( 'bk05', 5 ), _bookmark( 'bk10', 10 ) ] )
+
+    def test_order(self):
+        self.assertEqual( len( self.index ), 3 )
+        self.assertEqual( [ bmk[ BookmarkField.NAME ] for bmk in self.index.all() ],
+                          [ 'bk05', 'bk10', 'bk20' ] )
+        self.assertEqual( self.index.first()[ BookmarkField.NAME ], 'bk05' )
+        self.assertEqual( self.index.last()[ BookmarkField.NAME ], 'bk20' )
+
+    def test_for_page(self):
+        self.assertIsNone( self.index.for_page( 4 ) )
+        self.assertIsNone( self.index.for_page( None ) )
+        self.assertEqual( self.index.for_page( 5 )[ BookmarkField.NAME ], 'bk05' )
+        self.assertEqual( self.index.for_page( 12 )[ BookmarkField.NAME ], 'bk10' )
+        self.assertEqual( self.index.for_page( 99 )[ BookmarkField.NAME ], 'bk20' )
+
+    def test_next_previous(self):
+        self.assertEqual( self.index.next( 1 )[ BookmarkField.NAME ], 'bk05' )
+        self.assertEqual( self.index.next( 12 )[ BookmarkField.NAME ], 'bk20' )
+        self.assertIsNone( self.index.next( 20 ) )
+        self.assertEqual( self.index.previous( 12 )[ BookmarkField.NAME ], 'bk05' )
+        self.assertIsNone( self.index.previous( 5 ) )
+        self.assertIsNone( self.index.previous( 2 ) )
+
+    def test_first_last(self):
+        self.assertTrue( self.index.is_first( _bookmark( 'bk05', 5 ) ) )
+        self.assertFalse( self.index.is_first( _bookmark( 'bk10', 10 ) ) )
+        self.assertTrue( self.index.is_last( _bookmark( 'bk20', 20 ) ) )
+        self.assertFalse( self.index.is_last( _bookmark( 'bk10', 10 ) ) )
+
+    def test_copy(self):
+        self.index.first()[ BookmarkField.PAGE ] = 99
+        self.assertEqual( self.index.first()[ BookmarkField.PAGE ], 5 )
+
+    def test_empty(self):
+        self.index.clear()
+        self.assertEqual( len( self.index ), 0 )
+        self.assertEqual( self.index.all(), [] )
+        for value in ( self.index.first(), self.index.last(),
+                       self.index.for_page( 1 ), self.index.next( 1 ), self.index.previous( 1 ) ):
+            self.assertIsNone( value )
+
+class TestNotePages( unittest.TestCase):
+
+    def test_set(self):
+        pages = NotePages( [ 0, 3, 17 ] )
+        self.assertEqual( len( pages ), 3 )
+        self.assertTrue( pages.has( 0 ) )
+        self.assertTrue( pages.has( 17 ) )
+        self.assertFalse( pages.has( 4 ) )
+        self.assertFalse( pages.has( 1000 ) )
+        self.assertFalse( pages.has( None ) )
+        pages.set( 3 )
+        self.assertEqual( len( pages ), 3 )
+
+    def test_unset(self):
+        pages = NotePages( [ 3 ] )
+        pages.set( 3, False )
+        pages.set( 500, False )
+        self.assertEqual( len( pages ), 0 )
+        self.assertFalse( pages.has( 3 ) )
+        pages.load( [ 1, 2 ] )
+        self.assertEqual( len( pages ), 2 )
+        pages.clear()
+        self.assertFalse( pages.has( 1 ) )
+
+if __name__ == "__main__":
+    unittest.main()
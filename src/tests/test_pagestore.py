@@ -0,0 +1,105 @@
+"""
+Test frame: Raw page store
+
+ This file is part of SheetMusic
+ Copyright: 2022,2023 by Chrles Gentry
+ You should have received a copy of the GNU General Public License
+ along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+#ignore too many methods, missing doc strings
+#pylint: disable=C0115
+#pylint: disable=C0116
+#pylint: disable=R0904
+
+import os
+import tempfile
+import unittest
+
+from PySide6.QtGui import QColor, QImage
+
+from util.pagestore import PageStore, PageStoreWriter
+
+class TestPageStore( unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.filename = os.path.join( self.tmp.name, 'store', '1.sps')
+        self.store = PageStore()
+
+    def tearDown(self):
+        self.store.close()
+        self.tmp.cleanup()
+
+    def page(self, width: int, height: int, grey: int) -> QImage:
+        qimage = QImage( width, height, QImage.Format_RGB32 )
+        qimage.fill( QColor( grey, grey, grey ) )
+        return qimage
+
+    def write(self, pages: list, fmt=PageStore.FORMAT_GREY, digest=b'digest') -> bool:
+        writer = PageStoreWriter( self.filename, len(pages), fmt, digest )
+        for qimage in pages:
+            writer.add( qimage )
+        return writer.finish()
+
+    def test_write_read(self):
+        self.assertTrue( self.write( [ self.page( 30, 40, 10 ), self.page( 41, 20, 200 ) ] ) )
+        self.assertTrue( self.store.open( self.filename ) )
+        self.assertEqual( self.store.page_count(), 2 )
+        page = self.store.image( 2 )
+        self.assertEqual( page.format(), QImage.Format_Grayscale8 )
+        self.assertEqual( page.width(), 41 )
+        self.assertEqual( page.height(), 20 )
+        self.assertEqual( page.pixelColor( 40, 19 ).red(), 200 )
+        self.assertEqual( self.store.image( 1 ).pixelColor( 0, 0 ).red(), 10 )
+        self.assertIsNone( self.store.image( 3 ) )
+        self.assertIsNone( self.store.image( 0 ) )
+
+    def test_mono(self):
+        self.write( [ self.page( 33, 10, 0 ) ], PageStore.FORMAT_MONO )
+        self.assertTrue( self.store.open( self.filename ) )
+        self.assertEqual( self.store.image( 1 ).format(), QImage.Format_Mono )
+
+    def test_missing_page(self):
+        self.write( [ self.page( 10, 10, 0 ), QImage(), self.page( 10, 10, 0 ) ] )
+        self.assertTrue( self.store.open( self.filename ) )
+        self.assertTrue( self.store.has_page( 1 ) )
+        self.assertFalse( self.store.has_page( 2 ) )
+        self.assertTrue( self.store.has_page( 3 ) )
+
+    def test_digest(self):
+        self.write( [ self.page( 10, 10, 0 ) ], digest=b'a' )
+        self.assertFalse( self.store.open( self.filename, b'b'.ljust(20, b'\0') ) )
+        self.assertTrue( self.store.open( self.filename, b'a'.ljust(20, b'\0') ) )
+
+    def test_invalid_file(self):
+        self.assertFalse( self.store.open( self.filename ) )
+        os.makedirs( os.path.dirname( self.filename ) )
+        with open( self.filename, 'wb') as store:
+            store.write( b'not a page store at all' )
+        self.assertFalse( self.store.open( self.filename ) )
+        self.assertFalse( self.store.is_open() )
+
+    def test_close_with_image(self):
+        self.write( [ self.page( 10, 10, 99 ) ] )
+        self.store.open( self.filename )
+        page = self.store.image( 1 )
+        self.store.close()
+        self.assertEqual( page.pixelColor( 0, 0 ).red(), 99 )
+
+    def test_source_digest(self):
+        book = os.path.join( self.tmp.name, 'book')
+        os.makedirs( book )
+        with open( os.path.join( book, 'page-001.png'), 'wb') as png:
+            png.write( b'1' )
+        digest = PageStore.source_digest( book )
+        self.assertEqual( digest, PageStore.source_digest( book ) )
+        with open( os.path.join( book, 'page-002.png'), 'wb') as png:
+            png.write( b'2' )
+        self.assertNotEqual( digest, PageStore.source_digest( book ) )
+        self.assertIsNone( PageStore.source_digest( book + 'x' ) )
+
+
+if __name__ == "__main__":
+    unittest.main()
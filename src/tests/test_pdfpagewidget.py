@@ -0,0 +1,56 @@
+"""
+Test frame: PDF page label
+
+ This file is part of SheetMusic
+ Copyright: 2022,2023 by Chrles Gentry
+ You should have received a copy of the GNU General Public License
+ along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+#pylint: disable=C0115
+#pylint: disable=C0116
+
+import os
+import tempfile
+import unittest
+
+from PySide6.QtCore import QSize
+from PySide6.QtGui import QPageSize, QPainter, QPdfWriter
+from PySide6.QtPdf import QPdfDocument
+
+from ui.pdfpagewidget import PdfLabel
+from util.pagecache import PageCache
+
+class TestPdfLabel( unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join( self.tmp.name, 'score.pdf' )
+        writer = QPdfWriter( self.path )
+        writer.setPageSize( QPageSize( QPageSize.A4 ) )
+        painter = QPainter( writer )
+        painter.drawText( 100, 100, 'Page 1' )
+        painter.end()
+        self.document = QPdfDocument( None )
+        self.document.load( self.path )
+        PageCache._shared = None
+
+    def tearDown(self):
+        self.document.close()
+        PageCache._shared = None
+        self.tmp.cleanup()
+
+    def test_close_releases_resident(self):
+        label = PdfLabel( 'page' )
+        label.resize( QSize( 300, 400 ) )
+        label.set_doc( self.document )
+        self.assertTrue( label.navigate( 1 ) )
+        self.assertGreater( PageCache.shared().resident, 0 )
+        label.close()
+        self.assertIsNone( label.resident() )
+        self.assertEqual( PageCache.shared().resident, 0 )
+        self.assertIsNone( label.pdf_document )
+
+if __name__ == "__main__":
+    unittest.main()
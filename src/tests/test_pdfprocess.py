@@ -0,0 +1,84 @@
+"""
+Test frame: PDF render processes
+
+ This file is part of SheetMusic
+ Copyright: 2022,2023 by Chrles Gentry
+ You should have received a copy of the GNU General Public License
+ along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+#ignore too many methods, missing doc strings
+#pylint: disable=C0115
+#pylint: disable=C0116
+#pylint: disable=R0904
+
+import os
+import tempfile
+import unittest
+
+from PySide6.QtCore import QSize
+from PySide6.QtPdf import QPdfDocument
+
+from util.pdfprocess import PdfRenderProcess
+
+# Two pages: page 1 is filled black, page 2 is left empty (transparent)
+PDF = b'''%PDF-1.4
+1 0 obj << /Type /Catalog /Pages 2 0 R >> endobj
+2 0 obj << /Type /Pages /Kids [3 0 R 5 0 R] /Count 2 >> endobj
+3 0 obj << /Type /Page /Parent 2 0 R /MediaBox [0 0 200 300] /Contents 4 0 R >> endobj
+4 0 obj << /Length 27 >> stream
+0 g 0 0 200 300 re f
+endstream endobj
+5 0 obj << /Type /Page /Parent 2 0 R /MediaBox [0 0 200 300] >> endobj
+trailer << /Root 1 0 R >>
+%%EOF
+'''
+
+class TestPdfRenderProcess( unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.tmp = tempfile.TemporaryDirectory()
+        cls.pdf = os.path.join( cls.tmp.name, 'book.pdf')
+        with open( cls.pdf, 'wb') as pdf:
+            pdf.write( PDF )
+        cls.processes = PdfRenderProcess( 2 )
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.processes.close()
+        cls.tmp.cleanup()
+
+    def test_render(self):
+        page = self.processes.render( self.pdf, 1, QSize( 100, 150 ) )
+        self.assertEqual( page.size(), QSize( 100, 150 ) )
+        self.assertEqual( page.format(), PdfRenderProcess.IMAGE_FORMAT )
+        self.assertEqual( page.pixelColor( 50, 75 ).alpha(), 255 )
+        self.assertEqual( page.pixelColor( 50, 75 ).red(), 0 )
+        page = self.processes.render( self.pdf, 2, QSize( 100, 150 ) )
+        self.assertEqual( page.pixelColor( 50, 75 ).alpha(), 0 )
+
+    def test_same_as_document(self):
+        document = QPdfDocument()
+        document.load( self.pdf )
+        expected = document.render( 0, QSize( 40, 60 ) ).convertToFormat(
+            PdfRenderProcess.IMAGE_FORMAT )
+        document.close()
+        self.assertEqual( self.processes.render( self.pdf, 1, QSize( 40, 60 ) ), expected )
+
+    def test_errors(self):
+        self.assertTrue( self.processes.render( self.pdf + 'x', 1, QSize( 10, 10 ) ).isNull() )
+        self.assertTrue( self.processes.render( self.pdf, 1, QSize( 0, 0 ) ).isNull() )
+
+    def test_setup(self):
+        self.assertIsNone( PdfRenderProcess.setup( 0 ) )
+        processes = PdfRenderProcess.setup( 1 )
+        self.assertIs( PdfRenderProcess.shared(), processes )
+        self.assertIs( PdfRenderProcess.setup( 1 ), processes )
+        self.assertIsNone( PdfRenderProcess.setup( 0 ) )
+        self.assertIsNone( PdfRenderProcess.shared() )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+"""
+Test frame: Shared PDF documents
+
+ This file is part of SheetMusic
+ Copyright: 2022,2023 by Chrles Gentry
+ You should have received a copy of the GNU General Public License
+ along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+#pylint: disable=C0115
+#pylint: disable=C0116
+
+import os
+import tempfile
+import unittest
+
+from PySide6.QtGui import QPainter, QPdfWriter
+from PySide6.QtPdf import QPdfDocument
+
+from util.pdfregistry import PdfDocumentRegistry
+
+class TestPdfDocumentRegistry( unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join( self.tmp.name, 'score.pdf' )
+        writer = QPdfWriter( self.path )
+        painter = QPainter( writer )
+        painter.drawText( 100, 100, 'Page 1' )
+        painter.end()
+
+    def tearDown(self):
+        while PdfDocumentRegistry.references( self.path ) > 0:
+            PdfDocumentRegistry.release( self.path )
+        self.tmp.cleanup()
+
+    def test_shared(self):
+        first, err = PdfDocumentRegistry.acquire( self.path )
+        self.assertEqual( err, QPdfDocument.Error.None_ )
+        second, _ = PdfDocumentRegistry.acquire( self.path )
+        self.assertIs( first, second )
+        self.assertFalse( PdfDocumentRegistry.release( self.path ) )
+        self.assertTrue( PdfDocumentRegistry.release( self.path ) )
+        self.assertEqual( first.status(), QPdfDocument.Status.Null )
+
+    def test_worker_kept_while_open(self):
+        shared, _ = PdfDocumentRegistry.acquire( self.path )
+        with PdfDocumentRegistry.worker_document( self.path ) as document:
+            self.assertIsNot( document, shared )
+            self.assertEqual( document.pageCount(), 1 )
+        self.assertEqual( PdfDocumentRegistry.idle_documents( self.path ), 1 )
+        with PdfDocumentRegistry.worker_document( self.path ) as again:
+            self.assertIs( again, document )
+        # Released with the book
+        PdfDocumentRegistry.release( self.path )
+        self.assertEqual( PdfDocumentRegistry.idle_documents( self.path ), 0 )
+        self.assertEqual( document.status(), QPdfDocument.Status.Null )
+
+    def test_worker_closed_with_book(self):
+        PdfDocumentRegistry.acquire( self.path )
+        with PdfDocumentRegistry.worker_document( self.path ) as document:
+            # The book is closed (and opened again) while the worker renders
+            PdfDocumentRegistry.release( self.path )
+            PdfDocumentRegistry.acquire( self.path )
+        self.assertEqual( document.status(), QPdfDocument.Status.Null )
+        self.assertEqual( PdfDocumentRegistry.idle_documents( self.path ), 0 )
+
+    def test_worker_book_not_open(self):
+        with PdfDocumentRegistry.worker_document( self.path ) as document:
+            self.assertIsNotNone( document )
+        self.assertEqual( document.status(), QPdfDocument.Status.Null )
+        self.assertEqual( PdfDocumentRegistry.idle_documents( self.path ), 0 )
+        with PdfDocumentRegistry.worker_document(
+                os.path.join( self.tmp.name, 'missing.pdf' ) ) as document:
+            self.assertIsNone( document )
+
+if __name__ == "__main__":
+    unittest.main()
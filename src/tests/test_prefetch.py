@@ -0,0 +1,129 @@
+"""
+Test frame: Page prefetch and rescaling prefetched pages
+
+ This file is part of SheetMusic
+ Copyright: 2022,2023 by Chrles Gentry
+ You should have received a copy of the GNU General Public License
+ along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+#pylint: disable=C0115
+#pylint: disable=C0116
+
+import os
+import tempfile
+import unittest
+
+from PySide6.QtCore import QSize
+from PySide6.QtGui import QColor, QImage
+
+from ui.label import LabelWidget
+from ui.prefetch import PagePrefetch, PageRender, PrefetchSignals
+from util.pagecache import PageCache
+
+class TestPrefetchRescale( unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join( self.tmp.name, 'page-001.png' )
+        page = QImage( 1200, 1600, QImage.Format_RGB32 )
+        page.fill( QColor( 'white' ) )
+        page.save( self.path )
+        self.results = []
+        self.signals = PrefetchSignals()
+        self.signals.finished.connect(
+            lambda *args: self.results.append( args ) )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def render(self, resident_size:QSize=None)->tuple:
+        key = PageCache.key( 1, 1, 300, 400, 1.0, True )
+        PageRender( self.signals, 0, key, self.path,
+                    resident_size=resident_size ).run()
+        self.assertEqual( len( self.results ), 1 )
+        return self.results[0]
+
+    def test_source_returned(self):
+        _, _, qimage, source = self.render()
+        self.assertEqual( qimage.size(), QSize( 300, 400 ) )
+        self.assertEqual( source.size(), QSize( 1200, 1600 ) )
+
+    def test_source_limited(self):
+        _, _, _, source = self.render( QSize( 600, 600 ) )
+        self.assertEqual( source.size(), QSize( 450, 600 ) )
+
+    def test_source_limited_one_side(self):
+        # Only the height is over the limit
+        _, _, _, source = self.render( QSize( 2000, 1000 ) )
+        self.assertEqual( source.size(), QSize( 750, 1000 ) )
+
+    def test_resident_share(self):
+        # A source over the residents' share of the budget isn't kept
+        _, _, _, source = self.render()
+        PageCache._shared = PageCache( budget=source.sizeInBytes() )
+        try:
+            label = LabelWidget( 'page' )
+            self.assertTrue( label.set_source_image( source ) )
+            self.assertIsNone( label.resident() )
+            self.assertEqual( PageCache.shared().resident, 0 )
+            self.assertFalse( label.rescale() )
+            label.close()
+        finally:
+            PageCache._shared = None
+
+    def test_decoded_source(self):
+        # A page store page is scaled, not loaded or rendered
+        page = QImage( self.path )
+        key = PageCache.key( 1, 1, 300, 400, 1.0, True )
+        PageRender( self.signals, 0, key, page, render_pdf=True ).run()
+        _, _, qimage, source = self.results[0]
+        self.assertEqual( qimage.size(), QSize( 300, 400 ) )
+        self.assertEqual( source.size(), page.size() )
+
+    def test_stale_result(self):
+        # A render from before a cancel doesn't end the new request for the page
+        generation, key, qimage, source = self.render()
+        prefetch = PagePrefetch()
+        prefetch._pending.add( key )
+        prefetch.cancel()
+        prefetch._pending.add( key )
+        prefetch._finished( generation, key, qimage, source )
+        self.assertTrue( prefetch.is_requested( key ) )
+        self.assertFalse( prefetch.is_ready( key ) )
+        prefetch._finished( generation + 1, key, qimage, source )
+        self.assertTrue( prefetch.is_ready( key ) )
+
+    def test_prefetched_page_rescales(self):
+        generation, key, qimage, source = self.render()
+        prefetch = PagePrefetch()
+        prefetch._finished( generation, key, qimage, source )
+        label = LabelWidget( 'page' )
+        self.assertTrue( label.set_content( *prefetch.take( key ) ) )
+        self.assertIs( label.resident(), source )
+        # a resize doesn't need the file
+        os.remove( self.path )
+        self.assertTrue( label.rescale() )
+        label.close()
+
+    def test_source_counted_once(self):
+        # The cache and the widget share the source: a copy shares its data
+        _, key, qimage, source = self.render()
+        cache = PageCache( budget=100 * PageCache.MEGABYTE )
+        self.assertTrue( cache.put( key, qimage, source ) )
+        cache.set_resident( 1, QImage( source ) )
+        self.assertEqual( cache.used, qimage.sizeInBytes() + source.sizeInBytes() )
+        self.assertEqual( cache.resident, source.sizeInBytes() )
+
+    def test_scaled_page_rescales(self):
+        # No source (e.g. a page store page): rescale from the page itself
+        _, _, qimage, _ = self.render()
+        label = LabelWidget( 'page' )
+        self.assertTrue( label.set_content( qimage ) )
+        self.assertTrue( label.rescale() )
+        label.close()
+        self.assertFalse( label.rescale() )
+
+if __name__ == "__main__":
+    unittest.main()
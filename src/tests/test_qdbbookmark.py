@@ -235,6 +235,17 @@ class TestDbBookmark(unittest.TestCase):
         val = self.obj.last_page( 'test1',21)
         self.assertIsNone( val ,"Last bookmark at 20")
 
+    def test_add_many(self):
+        self.assertTrue( self.obj.add_many( 'test2', [ ('bkz3', 15), ('bkz1', 12) ] ) )
+        bk = self.obj.get_all( 'test2' )
+        self.assertEqual( len(bk), 3 )
+        self.assertEqual( self.obj.get_name_for_page( 'test2', 12 ), 'bkz1' )
+        self.assertTrue( self.obj.add_many( 'test2', [] ) )
+        self.assertFalse( self.obj.add_many( 'junk', [ ('bk', 1) ] ) )
+        # One bad row: nothing is added
+        self.assertFalse( self.obj.add_many( 'test2', [ ('bkz4', 16), (None, 17) ] ) )
+        self.assertEqual( len( self.obj.get_all( 'test2' ) ), 3 )
+
     def test_delbookmark_no_book( self):
         self.obj.delete( book='junk', bookmark='test01')
 
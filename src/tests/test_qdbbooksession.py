@@ -0,0 +1,103 @@
+"""
+Test frame: DbBookSession
+
+ This file is part of SheetMusic
+ Copyright: 2022,2023 by Chrles Gentry
+ You should have received a copy of the GNU General Public License
+ along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+#disable no docstrings, too many public methods
+#pylint: disable=C0115
+#pylint: disable=C0116
+#pylint: disable=R0904
+
+import dataclasses
+import unittest
+
+from PySide6.QtSql  import QSqlQuery
+from qdb.dbbooksession import DbBookSession
+from qdb.dbconn     import DbConn
+from qdb.dbpagegeometry import DbPageGeometry
+from qdb.fields.book import BookField
+from qdb.fields.bookmark import BookmarkField
+from qdb.fields.note import NoteField
+from qdb.setup      import Setup
+
+
+class TestDbBookSession(unittest.TestCase):
+
+    def setUp(self):
+        db = DbConn.open_db(':memory:')
+        self.setup = Setup(':memory:')
+        self.setup.drop_tables()
+        self.setup.create_tables()
+        query = QSqlQuery( db )
+        for sql in (
+            "INSERT INTO Book ( book,location,source,total_pages) VALUES( 'test1','/loc','/src',30)",
+            "INSERT INTO Book ( book,location,source,total_pages) VALUES( 'test2','/loc','/src',10)",
+            "INSERT INTO Bookmark ( book_id,bookmark,page) VALUES( 1,'bk10',10)",
+            "INSERT INTO Bookmark ( book_id,bookmark,page) VALUES( 1,'bk05',5)",
+            "INSERT INTO Bookmark ( book_id,bookmark,page) VALUES( 2,'bkz',1)",
+            "INSERT INTO BookSetting ( book_id,key,value) VALUES( 1,'layout','side_2')",
+            "INSERT INTO BookSetting ( book_id,key,value) VALUES( 2,'layout','single')",
+            "INSERT INTO Note ( book_id,page,sequence,note) VALUES( 1,7,0,'seven')",
+            "INSERT INTO Note ( book_id,page,sequence,note) VALUES( 1,3,0,'three')",
+            "INSERT INTO Note ( book_id,page,sequence,note) VALUES( 1,3,1,'three again')",
+            "INSERT INTO Note ( book_id,page,sequence,note) VALUES( 2,1,0,'other')",
+        ):
+            self.assertTrue( query.exec( sql ), sql )
+        DbPageGeometry().set_geometry( 'test1', [ (612.0, 792.0), (792.0, 612.0) ] )
+        self.obj = DbBookSession()
+
+    def test_load(self):
+        session = self.obj.load( 'test1' )
+        self.assertIsNotNone( session )
+        self.assertEqual( session.book_id, 1 )
+        self.assertEqual( session.name, 'test1' )
+        self.assertEqual( session.book[ BookField.TOTAL_PAGES ], 30 )
+        self.assertEqual( dict( session.settings ), { 'layout': 'side_2' } )
+        self.assertEqual( [ bmk[ BookmarkField.PAGE ] for bmk in session.bookmarks ], [5, 10] )
+        self.assertEqual( [ note[ NoteField.NOTE ] for note in session.notes ],
+                          [ 'three', 'three again', 'seven' ] )
+        self.assertEqual( session.note_pages(), (3, 7) )
+        self.assertEqual( session.page_sizes, ( (612.0, 792.0), (792.0, 612.0) ) )
+
+    def test_no_book(self):
+        self.assertIsNone( self.obj.load( 'nothere' ) )
+        session = self.obj.load( 'test2' )
+        self.assertEqual( session.page_sizes, () )
+        self.assertEqual( session.note_pages(), (1,) )
+
+    def test_updated(self):
+        session = self.obj.load( 'test1' )
+        book = dict( session.book )
+        book[ BookField.LAST_READ ] = 12
+        new_session = session.updated( book, { 'layout': 'single' },
+                                       bookmarks=[ { BookmarkField.NAME: 'bk01', BookmarkField.PAGE: 1 } ] )
+        self.assertEqual( new_session.book[ BookField.LAST_READ ], 12 )
+        self.assertEqual( new_session.settings[ 'layout' ], 'single' )
+        self.assertEqual( len( new_session.bookmarks ), 1 )
+        self.assertIs( new_session.notes, session.notes )
+        self.assertEqual( session.settings[ 'layout' ], 'side_2' )
+        with self.assertRaises( TypeError ):
+            new_session.bookmarks[0][ BookmarkField.PAGE ] = 2
+
+    def test_immutable(self):
+        session = self.obj.load( 'test1' )
+        with self.assertRaises( dataclasses.FrozenInstanceError ):
+            session.notes = ()
+        with self.assertRaises( TypeError ):
+            session.book[ BookField.TOTAL_PAGES ] = 1
+        with self.assertRaises( TypeError ):
+            session.settings[ 'layout' ] = 'single'
+        with self.assertRaises( TypeError ):
+            session.bookmarks[0][ BookmarkField.PAGE ] = 1
+
+    def test_transaction_closed(self):
+        self.obj.load( 'test1' )
+        self.assertTrue( DbConn.db().transaction() )
+        DbConn.db().rollback()
+
+if __name__ == "__main__":
+    unittest.main()
@@ -239,6 +239,19 @@ class TestDbBookSettings(unittest.TestCase):
         row = self.obj.get_all(self.BOOK1)
         self.assertEqual(len(row), 0)
 
+    def test_upsert_many(self):
+        self.assertTrue( self.obj.upsert_many( self.BOOK2,
+            { 'key1': 'new1', 'key7': 'value7', 'key2': None } ) )
+        self.assertEqual( self.obj.get_value( self.BOOK2, 'key1' ), 'new1' )
+        self.assertEqual( self.obj.get_value( self.BOOK2, 'key7' ), 'value7' )
+        self.assertIsNone( self.obj.get_value( self.BOOK2, 'key2' ) )
+        self.assertFalse( self.obj.upsert_many( 'nobook', { 'key1': 'x' } ) )
+        # One bad row: nothing is saved or deleted
+        self.assertFalse( self.obj.upsert_many( self.BOOK2,
+            { 'key1': None, 'key8': 'value8', None: 'x' } ) )
+        self.assertEqual( self.obj.get_value( self.BOOK2, 'key1' ), 'new1' )
+        self.assertIsNone( self.obj.get_value( self.BOOK2, 'key8' ) )
+
     def test_delall_badcall(self):
         with self.assertRaises(ValueError):
             self.obj.delete_all_values( None)
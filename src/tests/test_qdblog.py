@@ -0,0 +1,113 @@
+"""
+Test frame: Database logging
+
+ This file is part of SheetMusic
+ Copyright: 2022,2023 by Chrles Gentry
+ You should have received a copy of the GNU General Public License
+ along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+#pylint: disable=C0115
+#pylint: disable=C0116
+
+import threading
+import time
+import unittest
+from unittest import mock
+
+from qdb.dbconn import DbConn
+from qdb.log import DbLog, LOG, Trace
+from qdb.setup import Setup
+from qdb.util import DbHelper
+
+class TestDbLog( unittest.TestCase):
+
+    def setUp(self):
+        DbConn.open_db( ':memory:' )
+        setup = Setup( ':memory:' )
+        setup.drop_tables()
+        setup.create_tables()
+        DbLog.flush()
+        self.logger = DbLog( 'TestDbLog', LOG.debug )
+
+    def tearDown(self):
+        DbLog.flush()
+
+    def rows(self)->int:
+        return DbHelper.count( 'Log' )
+
+    def test_disabled(self):
+        self.logger.setlevel( LOG.disabled )
+        with mock.patch.object( Trace, 'callstr' ) as callstr:
+            self.logger.debug( 'not logged', trace=True )
+            self.logger.critical( 'not logged' )
+            callstr.assert_not_called()
+        self.assertEqual( DbLog.pending(), 0 )
+
+    def test_level(self):
+        self.logger.setlevel( LOG.warning )
+        self.assertFalse( self.logger.is_enabled( LOG.info ) )
+        self.assertTrue( self.logger.is_enabled( LOG.warning ) )
+        self.logger.info( 'not logged' )
+        self.logger.warning( 'logged', trace=False )
+        self.assertEqual( DbLog.pending(), 1 )
+
+    def test_buffered(self):
+        self.logger.debug( 'one' )
+        self.logger.info( 'two' )
+        self.assertEqual( DbLog.pending(), 2 )
+        self.assertEqual( self.rows(), 0 )
+        DbLog.flush()
+        self.assertEqual( DbLog.pending(), 0 )
+        self.assertEqual( self.rows(), 2 )
+        self.assertEqual( DbHelper.fetchone(
+            "SELECT method FROM Log WHERE msg='one'" ), 'test_buffered' )
+
+    def test_worker_thread(self):
+        # No writer: a worker thread leaves the records for the GUI thread
+        def work():
+            self.logger.critical( 'from a worker', trace=False )
+            DbLog.flush()
+        worker = threading.Thread( target=work )
+        worker.start()
+        worker.join()
+        self.assertEqual( DbLog.pending(), 1 )
+        self.assertEqual( self.rows(), 0 )
+        DbLog.flush()
+        self.assertEqual( self.rows(), 1 )
+
+    def test_date_logged(self):
+        # The record keeps the time it was logged, not when it was written
+        logged = time.gmtime( time.time() - 3600 )
+        with mock.patch.object( time, 'gmtime', return_value=logged ):
+            self.logger.info( 'an hour ago' )
+        self.logger.info( 'now' )
+        DbLog.flush()
+        self.assertEqual( DbHelper.fetchone(
+            "SELECT date_added FROM Log WHERE msg='an hour ago'" ),
+            time.strftime( '%Y-%m-%d %H:%M:%S', logged ) )
+        self.assertEqual( DbHelper.fetchone(
+            'SELECT msg FROM Log ORDER BY date_added DESC LIMIT 1' ), 'now' )
+
+    def test_threshold(self):
+        for index in range( DbLog.BUFFER_SIZE ):
+            self.logger.debug( f'message {index}' )
+        self.assertEqual( DbLog.pending(), 0 )
+        self.assertEqual( self.rows(), DbLog.BUFFER_SIZE )
+
+    def test_critical(self):
+        self.logger.debug( 'before' )
+        self.logger.critical( 'now', trace=False )
+        self.assertEqual( DbLog.pending(), 0 )
+        self.assertEqual( self.rows(), 2 )
+
+    def test_trace(self):
+        calls = Trace.calls( depth=2, start=0 )
+        self.assertEqual( len( calls ), 2 )
+        self.assertIn( 'calls@', calls[0] )
+        self.assertIn( 'test_trace@', calls[1] )
+        self.assertEqual( Trace.calls( start=100000 ), [] )
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,153 @@
+"""
+Test frame: Log retention
+
+ This file is part of SheetMusic
+ Copyright: 2022,2023 by Chrles Gentry
+ You should have received a copy of the GNU General Public License
+ along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+#pylint: disable=C0115
+#pylint: disable=C0116
+
+import os
+import tempfile
+import unittest
+
+from PySide6.QtSql import QSqlDatabase, QSqlQuery
+
+from qdb.dbconn import DbConn
+from qdb.dbwriter import DbWriter
+from qdb.log import DbLog, LOG
+from qdb.logretention import LogRetention
+from qdb.setup import Setup
+from qdb.util import DbHelper
+
+class TestLogRetention( unittest.TestCase):
+    SQL_ADD = """INSERT INTO Log( level, class, method, msg, date_added )
+        VALUES( ?, 'Test', 'add', ?, datetime( 'now', ? ) )"""
+
+    def setUp(self):
+        DbConn.open_db( ':memory:' )
+        self.setup = Setup( ':memory:' )
+        self.setup.drop_tables()
+        self.setup.create_tables()
+        DbLog.flush()
+
+    def add(self, level:int, count:int, days_old:int=0):
+        rows = [ ( level, f'{days_old}-{index}', f'-{days_old} days' ) for index in range( count ) ]
+        self.assertTrue( DbHelper.execute_many( self.SQL_ADD, rows ) )
+
+    def rows(self, level:int)->int:
+        return DbHelper.fetchone( 'SELECT count(*) FROM Log WHERE level=?', level )
+
+    def test_old(self):
+        self.add( LOG.debug, 3, days_old=10 )
+        self.add( LOG.debug, 2 )
+        self.add( LOG.info, 3, days_old=10 )
+        retention = LogRetention( max_days={ LOG.debug: 7, LOG.info: 30 }, max_rows={} )
+        self.assertEqual( retention.step( DbConn.db() ), 3 )
+        self.assertEqual( self.rows( LOG.debug ), 2 )
+        self.assertEqual( self.rows( LOG.info ), 3 )
+
+    def test_max_rows(self):
+        self.add( LOG.info, 5, days_old=2 )
+        self.add( LOG.info, 3 )
+        retention = LogRetention( max_days={}, max_rows={ LOG.info: 3 } )
+        self.assertEqual( retention.step( DbConn.db() ), 5 )
+        # the newest are kept
+        self.assertEqual( DbHelper.fetchone(
+            "SELECT count(*) FROM Log WHERE msg LIKE '0-%'" ), 3 )
+
+    def test_batch(self):
+        self.add( LOG.debug, 25, days_old=10 )
+        retention = LogRetention( max_days={ LOG.debug: 1 }, max_rows={}, batch_rows=10 )
+        self.assertEqual( retention.step( DbConn.db() ), 10 )
+        self.assertEqual( retention.run().result(), 10 )
+        self.assertEqual( retention.next_interval(), LogRetention.BUSY_SECONDS )
+        self.assertEqual( retention.run().result(), 5 )
+        self.assertEqual( retention.next_interval(), LogRetention.INTERVAL_SECONDS )
+        self.assertEqual( self.rows( LOG.debug ), 0 )
+
+    def test_clear(self):
+        self.add( LOG.debug, 2 )
+        self.add( LOG.critical, 2 )
+        self.assertTrue( DbLog( 'Test' ).clear( LOG.info ).result() )
+        self.assertEqual( self.rows( LOG.debug ), 0 )
+        self.assertEqual( self.rows( LOG.critical ), 2 )
+
+    def test_new_database(self):
+        # Tables created in an empty database: incremental straight away
+        self.assertEqual( int( DbHelper.fetchone( 'PRAGMA auto_vacuum' ) ),
+            LogRetention.AUTO_VACUUM_INCREMENTAL )
+        self.assertFalse( self.setup.set_incremental_vacuum().result() )
+        # Nothing to give back in memory
+        self.assertEqual( LogRetention().vacuum( DbConn.db() ), 0 )
+
+class TestLogRetentionFile( unittest.TestCase):
+    SQL_ADD = "INSERT INTO Log( level, msg ) VALUES( ?, ? )"
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join( self.tmp.name, 'retention.sql' )
+        DbConn.destroy_connection()
+        DbConn.open_db( self.path )
+        self.setup = Setup( self.path )
+        self.setup.create_tables()
+
+    def tearDown(self):
+        DbWriter.shared().stop()
+        DbWriter._shared = None
+        del self.setup
+        DbConn.destroy_connection()
+        self.tmp.cleanup()
+        DbConn.open_db( ':memory:' )
+
+    def free_pages(self, rows:int=2000)->int:
+        """ Add then delete log records and return the free pages """
+        with DbHelper.transaction():
+            DbHelper.execute_many( self.SQL_ADD, [ ( LOG.debug, 'x'*500 ) ] * rows )
+        DbHelper.prep( 'DELETE FROM Log' ).exec()
+        return DbHelper.fetchone( LogRetention.SQL_FREE_PAGES )
+
+    def test_vacuum(self):
+        self.assertGreater( self.free_pages(), 10 )
+        self.assertEqual( LogRetention( vacuum_pages=10 ).vacuum( DbConn.db() ), 10 )
+        with DbHelper.transaction():
+            self.assertEqual( LogRetention().vacuum( DbConn.db() ), 0 )
+
+    def test_vacuum_unlocked(self):
+        # The vacuum leaves nothing running that holds the database
+        self.free_pages()
+        self.assertEqual( LogRetention( vacuum_pages=5 ).vacuum( DbConn.db() ), 5 )
+        other = QSqlDatabase.addDatabase( 'QSQLITE', 'retention_other' )
+        other.setDatabaseName( self.path )
+        self.assertTrue( other.open() )
+        query = QSqlQuery( other )
+        self.assertTrue( query.exec( 'BEGIN EXCLUSIVE' ), query.lastError().text() )
+        query.exec( 'ROLLBACK' )
+        query.finish()
+        del query
+        other.close()
+        del other
+        QSqlDatabase.removeDatabase( 'retention_other' )
+
+    def test_convert(self):
+        # An existing database that doesn't give space back
+        DbHelper.prep( 'PRAGMA auto_vacuum = NONE' ).exec()
+        DbHelper.prep( 'VACUUM' ).exec()
+        self.assertEqual( DbHelper.fetchone( 'PRAGMA auto_vacuum' ), 0 )
+        free = self.free_pages()
+        DbWriter.shared().start( self.path )
+        # Not worth a rebuild yet
+        self.assertFalse( self.setup.set_incremental_vacuum( free + 1 ).result( timeout=10 ) )
+        self.assertTrue( self.setup.set_incremental_vacuum( free ).result( timeout=10 ) )
+        # The pragma shows the mode read at the start of the last read
+        self.assertEqual( DbHelper.count( 'Log' ), 0 )
+        self.assertEqual( DbHelper.fetchone( 'PRAGMA auto_vacuum' ),
+            LogRetention.AUTO_VACUUM_INCREMENTAL )
+        self.assertEqual( LogRetention().vacuum( DbConn.db() ), 0 )
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+"""
+Test frame: DbPageGeometry
+
+ This file is part of SheetMusic
+ Copyright: 2022,2023 by Chrles Gentry
+ You should have received a copy of the GNU General Public License
+ along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+#disable no docstrings, too many public methods
+#pylint: disable=C0115
+#pylint: disable=C0116
+#pylint: disable=R0904
+
+import pickle
+import unittest
+import logging
+
+from PySide6.QtCore import QSize, QSizeF
+from PySide6.QtSql  import QSqlQuery
+from qdb.dbconn     import DbConn
+from qdb.dbpagegeometry import DbPageGeometry
+from qdb.setup      import Setup
+from qdb.fields.pagegeometry import PageGeometryField
+from util.pdfclass  import PdfDimensions
+
+
+class TestDbPageGeometry(unittest.TestCase):
+    """ TestDbPageGeometry"""
+
+    def setUp(self):
+        db = DbConn.open_db(':memory:')
+        self.setup = Setup(':memory:')
+        self.setup.drop_tables()
+        self.setup.create_tables()
+        query = QSqlQuery( db )
+        query.exec(
+            "INSERT INTO Book ( book,location,source) VALUES( 'test1','/loc','/src')" )
+        query.exec(
+            "INSERT INTO Book ( book,location,source) VALUES( 'test2','/loc','/src')" )
+
+        self.obj = DbPageGeometry()
+        self.obj.show_stack(False)
+        self.obj.logger.setlevel( logging.CRITICAL )
+        self.sizes = [ (612.0, 792.0), (792.0, 612.0), (595.0, 842.0) ]
+
+    def test_set_and_get(self):
+        self.assertTrue( self.obj.set_geometry( 'test1', self.sizes ) )
+        rows = self.obj.get_geometry( 'test1' )
+        self.assertEqual( len( rows ), 3 )
+        self.assertEqual( rows[0][ PageGeometryField.PAGE ], 1 )
+        self.assertEqual( rows[1][ PageGeometryField.WIDTH ], 792.0 )
+        self.assertEqual( rows[1][ PageGeometryField.ORIENTATION ],
+                          PageGeometryField.ORIENTATION_LANDSCAPE )
+        self.assertEqual( rows[2][ PageGeometryField.ORIENTATION ],
+                          PageGeometryField.ORIENTATION_PORTRAIT )
+        self.assertEqual( rows[2][ PageGeometryField.ROTATION ], 0 )
+        self.assertEqual( self.obj.get_sizes( 1 ), self.sizes )
+
+    def test_replace(self):
+        self.obj.set_geometry( 'test1', self.sizes )
+        self.obj.set_geometry( 'test1', self.sizes[0:1] )
+        self.assertEqual( self.obj.count( 'test1' ), 1 )
+
+    def test_books_are_separate(self):
+        self.obj.set_geometry( 'test1', self.sizes )
+        self.assertEqual( self.obj.count( 'test2' ), 0 )
+        self.assertEqual( self.obj.get_sizes( 'test2' ), [] )
+
+    def test_unreadable(self):
+        self.assertFalse( self.obj.is_unreadable( 'test1' ) )
+        self.assertTrue( self.obj.mark_unreadable( 'test1' ) )
+        self.assertTrue( self.obj.is_unreadable( 'test1' ) )
+        self.assertFalse( self.obj.is_unreadable( 'test2' ) )
+        self.assertEqual( self.obj.get_sizes( 'test1' ), [] )
+        self.assertEqual( self.obj.count( 'test1' ), 0 )
+        # sizes saved later replace the mark
+        self.obj.set_geometry( 'test1', self.sizes )
+        self.assertFalse( self.obj.is_unreadable( 'test1' ) )
+        self.assertEqual( self.obj.get_sizes( 'test1' ), self.sizes )
+
+    def test_delete_all(self):
+        self.obj.set_geometry( 'test1', self.sizes )
+        self.obj.set_geometry( 'test2', self.sizes )
+        self.assertTrue( self.obj.delete_all( 'test1' ) )
+        self.assertEqual( self.obj.count( 'test1' ), 0 )
+        self.assertEqual( self.obj.count( 'test2' ), 3 )
+
+    def test_unknown_book(self):
+        self.assertFalse( self.obj.set_geometry( 'nothere', self.sizes ) )
+        self.assertEqual( self.obj.get_geometry( 'nothere' ), [] )
+
+
+class TestPdfDimensionsPageSizes(unittest.TestCase):
+    """ PdfDimensions using stored page sizes """
+
+    def setUp(self):
+        self.dim = PdfDimensions()
+        self.dim.setPageSizes( [ (600.0, 800.0), (900.0, 500.0), (610.0, 790.0) ] )
+
+    def test_maximums(self):
+        self.assertTrue( self.dim.isSet )
+        self.assertTrue( self.dim.hasPageSizes )
+        self.assertEqual( self.dim.widthPortrait, 610.0 )
+        self.assertEqual( self.dim.heightPortrait, 800.0 )
+        self.assertEqual( self.dim.widthLandscape, 900.0 )
+
+    def test_equalise_page_uses_lookup(self):
+        # The document isn't used when the page size is known
+        self.assertEqual( self.dim.equalisePage( None, 1 ), QSize( 610, 800 ) )
+        self.assertEqual( self.dim.equalisePage( None, 2 ), QSize( 900, 500 ) )
+        self.assertEqual( self.dim.pageSize( 0 ), QSizeF( 600.0, 800.0 ) )
+        self.assertIsNone( self.dim.pageSize( 3 ) )
+
+    def test_page_sizes_not_pickled(self):
+        dim = pickle.loads( pickle.dumps( self.dim ) )
+        self.assertTrue( dim.isSet )
+        self.assertFalse( dim.hasPageSizes )
+        self.assertEqual( dim.widthLandscape, 900.0 )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,116 @@
+"""
+Test frame: Prepared statement cache
+
+ This file is part of SheetMusic
+ Copyright: 2022,2023 by Chrles Gentry
+ You should have received a copy of the GNU General Public License
+ along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+#pylint: disable=C0115
+#pylint: disable=C0116
+
+import sys
+import unittest
+
+from qdb.dbconn import DbConn
+from qdb.setup import Setup
+from qdb.statementcache import StatementCache
+from qdb.util import DbHelper
+
+class TestStatementCache( unittest.TestCase):
+    SQL_GET = 'SELECT value FROM System WHERE key=?'
+
+    def setUp(self):
+        DbConn.open_db( ':memory:' )
+        self.setup = Setup( ':memory:' )
+        self.setup.drop_tables()
+        self.setup.create_tables()
+        DbHelper.query( "INSERT INTO System( key, value ) VALUES( ?, ? )", [ 'k1', 'v1' ] ).exec()
+        DbHelper.query( "INSERT INTO System( key, value ) VALUES( ?, ? )", [ 'k2', 'v2' ] ).exec()
+        self.cache = DbHelper.statements()
+        self.cache.clear()
+
+    def test_reuse(self):
+        self.assertEqual( DbHelper.fetchone( self.SQL_GET, 'k1' ), 'v1' )
+        self.assertIn( self.SQL_GET, self.cache )
+        query = self.cache.take( self.SQL_GET )
+        self.cache.put( self.SQL_GET, query )
+        # The same statement is rebound, not prepared again
+        self.assertIs( DbHelper.prep( self.SQL_GET ), query )
+        DbHelper.finish( query )
+        self.assertEqual( DbHelper.fetchone( self.SQL_GET, 'k2' ), 'v2' )
+        self.assertEqual( len( self.cache ), 1 )
+
+    def test_nested(self):
+        outer = DbHelper.query( self.SQL_GET, 'k1' )
+        self.assertNotIn( self.SQL_GET, self.cache )
+        # In use: the same SQL gets its own statement
+        self.assertEqual( DbHelper.fetchone( self.SQL_GET, 'k2' ), 'v2' )
+        self.assertTrue( outer.exec() and outer.next() )
+        self.assertEqual( outer.value(0), 'v1' )
+        DbHelper.finish( outer )
+        self.assertEqual( len( self.cache ), 1 )
+
+    def test_rebind(self):
+        self.assertEqual( DbHelper.fetchone( self.SQL_GET, 'k1' ), 'v1' )
+        self.assertEqual( DbHelper.fetchone( self.SQL_GET, 'k2' ), 'v2' )
+        self.assertIsNone( DbHelper.fetchone( self.SQL_GET, 'k3' ) )
+
+    def test_stale_values(self):
+        # A value left from the last use is not used when nothing is bound
+        for value in ( None, '', 0, [] ):
+            self.assertEqual( DbHelper.fetchone( self.SQL_GET, 'k1' ), 'v1' )
+            self.assertIsNone( DbHelper.fetchone( self.SQL_GET, value ) )
+        sql = 'SELECT count(*) FROM System WHERE key IN ( ?, ? )'
+        self.assertEqual( DbHelper.fetchone( sql, [ 'k1', 'k2' ] ), 2 )
+        self.assertIsNone( DbHelper.fetchone( sql, [ 'k1' ] ) )
+
+    def test_unread_rows(self):
+        sql = 'SELECT key FROM System ORDER BY key'
+        self.assertEqual( DbHelper.fetchone( sql ), 'k1' )
+        # Rows were left: the statement isn't kept
+        self.assertNotIn( sql, self.cache )
+        self.assertEqual( len( DbHelper.fetchrows( sql, None, [ 'key' ] ) ), 2 )
+        self.assertIn( sql, self.cache )
+
+    def test_none_refcount(self):
+        # Reusing a statement mustn't change the reference count of None
+        sql = 'SELECT count(*) FROM System'
+        DbHelper.fetchone( sql )
+        before = sys.getrefcount( None )
+        for _ in range( 3000 ):
+            query = DbHelper.prep( sql )
+            self.assertTrue( query.exec() and query.next() )
+            DbHelper.finish( query, sql )
+        self.assertLess( abs( sys.getrefcount( None ) - before ), 10 )
+
+    def test_lru(self):
+        cache = StatementCache( max_size=2 )
+        for sql in ( 'SELECT 1', 'SELECT 2', 'SELECT 3' ):
+            cache.put( sql, DbHelper.prep( sql ) )
+        self.assertNotIn( 'SELECT 1', cache )
+        self.assertIsNotNone( cache.take( 'SELECT 2' ) )
+        self.assertIsNone( cache.take( 'SELECT 2' ) )
+        self.assertEqual( ( cache.hits, cache.misses ), ( 1, 1 ) )
+
+    def test_schema_change(self):
+        self.assertTrue( StatementCache.is_schema_change( 'drop table x' ) )
+        self.assertTrue( StatementCache.is_schema_change( ' VACUUM;' ) )
+        self.assertFalse( StatementCache.is_schema_change( 'SELECT 1' ) )
+        DbHelper.fetchone( self.SQL_GET, 'k1' )
+        DbHelper.prep( 'CREATE TABLE IF NOT EXISTS Extra ( id INTEGER )' ).exec()
+        self.assertEqual( len( self.cache ), 0 )
+        DbHelper.fetchone( self.SQL_GET, 'k1' )
+        self.setup.drop_tables()
+        self.assertEqual( len( self.cache ), 0 )
+
+    def test_close(self):
+        DbHelper.fetchone( self.SQL_GET, 'k1' )
+        DbConn.close_db()
+        self.assertEqual( len( self.cache ), 0 )
+        DbConn.open_db( ':memory:' )
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,75 @@
+"""
+Test frame: DbHelper transactions and batch execution
+
+ This file is part of SheetMusic
+ Copyright: 2022,2023 by Chrles Gentry
+ You should have received a copy of the GNU General Public License
+ along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+#pylint: disable=C0115
+#pylint: disable=C0116
+
+import unittest
+
+from qdb.dbconn import DbConn
+from qdb.setup import Setup
+from qdb.util import DbHelper
+
+class TestTransaction( unittest.TestCase):
+    SQL_ADD = 'INSERT INTO System( key, value ) VALUES( ?, ? )'
+    SQL_GET = 'SELECT value FROM System WHERE key=?'
+
+    def setUp(self):
+        DbConn.open_db( ':memory:' )
+        self.setup = Setup( ':memory:' )
+        self.setup.drop_tables()
+        self.setup.create_tables()
+
+    def value(self, key:str):
+        return DbHelper.fetchone( self.SQL_GET, key )
+
+    def test_commit(self):
+        with DbHelper.transaction():
+            self.assertTrue( DbHelper.in_transaction() )
+            self.assertTrue( DbHelper.execute_many( self.SQL_ADD, [ ('k1', 'v1'), ('k2', 'v2') ] ) )
+        self.assertFalse( DbHelper.in_transaction() )
+        self.assertEqual( self.value( 'k1' ), 'v1' )
+        self.assertEqual( self.value( 'k2' ), 'v2' )
+
+    def test_rollback(self):
+        with self.assertRaises( KeyError ):
+            with DbHelper.transaction():
+                DbHelper.execute_many( self.SQL_ADD, [ ('k1', 'v1') ] )
+                raise KeyError( 'k1' )
+        self.assertFalse( DbHelper.in_transaction() )
+        self.assertIsNone( self.value( 'k1' ) )
+
+    def test_nested(self):
+        with DbHelper.transaction():
+            DbHelper.execute_many( self.SQL_ADD, [ ('k1', 'v1') ] )
+            with self.assertRaises( KeyError ):
+                with DbHelper.transaction():
+                    DbHelper.execute_many( self.SQL_ADD, [ ('k2', 'v2') ] )
+                    raise KeyError( 'k2' )
+            with DbHelper.transaction():
+                DbHelper.execute_many( self.SQL_ADD, [ ('k3', 'v3') ] )
+        # only the inner block that failed is rolled back
+        self.assertEqual( self.value( 'k1' ), 'v1' )
+        self.assertIsNone( self.value( 'k2' ) )
+        self.assertEqual( self.value( 'k3' ), 'v3' )
+
+    def test_execute_many(self):
+        self.assertTrue( DbHelper.execute_many( self.SQL_ADD, [] ) )
+        self.assertTrue( DbHelper.execute_many( self.SQL_ADD, [ ['k1', None] ] ) )
+        self.assertEqual( DbHelper.fetchone(
+            'SELECT value IS NULL FROM System WHERE key=?', 'k1' ), 1 )
+        self.assertEqual( DbHelper.count( 'System' ), 1 )
+        with self.assertRaises( ValueError ):
+            DbHelper.execute_many( self.SQL_ADD, [ ('k2', 'v2'), ('k3',) ] )
+        # duplicate key: the batch fails
+        self.assertFalse( DbHelper.execute_many( self.SQL_ADD, [ ('k4', 'v4'), ('k4', 'v4') ] ) )
+
+if __name__ == "__main__":
+    unittest.main()
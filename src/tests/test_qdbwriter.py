@@ -0,0 +1,135 @@
+"""
+Test frame: Background database writer
+
+ This file is part of SheetMusic
+ Copyright: 2022,2023 by Chrles Gentry
+ You should have received a copy of the GNU General Public License
+ along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+#pylint: disable=C0115
+#pylint: disable=C0116
+
+import os
+import tempfile
+import threading
+import unittest
+
+from qdb.dbconn import DbConn
+from qdb.dbsystem import DbSystem
+from qdb.dbwriter import DbWriter
+from qdb.setup import Setup
+from qdb.util import DbHelper
+
+class TestDbWriter( unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join( self.tmp.name, 'writer.sql' )
+        DbConn.destroy_connection()
+        DbConn.open_db( self.path )
+        setup = Setup( self.path )
+        setup.drop_tables()
+        setup.create_tables()
+        self.system = DbSystem()
+        self.writer = DbWriter.shared()
+
+    def tearDown(self):
+        self.writer.stop()
+        DbWriter._shared = None
+        DbConn.destroy_connection()
+        self.tmp.cleanup()
+        DbConn.open_db( ':memory:' )
+
+    def test_not_started(self):
+        # Without the thread, writes are done straight away
+        future = self.system.queue_value( 'k1', 'v1' )
+        self.assertTrue( future.done() )
+        self.assertTrue( future.result() )
+        self.assertEqual( self.system.get_value( 'k1' ), 'v1' )
+        self.assertFalse( self.writer.start( ':memory:' ) )
+
+    def test_last_write_wins(self):
+        self.assertTrue( self.writer.start( self.path ) )
+        futures = [ self.system.queue_value( 'k1', f'v{i}' ) for i in range(5) ]
+        self.assertTrue( self.writer.flush( timeout=10 ) )
+        self.assertTrue( all( future.result( timeout=10 ) for future in futures ) )
+        self.assertEqual( self.system.get_value( 'k1' ), 'v4' )
+        self.assertEqual( self.writer.pending(), 0 )
+
+    def test_read_your_writes(self):
+        self.writer.start( self.path )
+        self.system.queue_value( 'k2', 'queued' )
+        # get_value waits for the queued write of the same key
+        self.assertEqual( self.system.get_value( 'k2' ), 'queued' )
+        self.system.queue_value( 'k2', None )
+        self.assertIsNone( self.system.get_value( 'k2' ) )
+
+    def test_transaction(self):
+        self.writer.start( self.path )
+        with DbHelper.transaction():
+            future = self.system.queue_value( 'k3', 'v3' )
+            self.assertTrue( future.done() )
+        self.assertEqual( self.system.get_value( 'k3' ), 'v3' )
+
+    def test_other_thread(self):
+        # Only the main thread writes on the main connection
+        errors = []
+        def work():
+            try:
+                self.system.queue_value( 'k4', 'v4' )
+            except RuntimeError as err:
+                errors.append( err )
+        worker = threading.Thread( target=work )
+        worker.start()
+        worker.join()
+        self.assertEqual( len( errors ), 1 )
+        # Running: queued, not written in the main thread's transaction
+        self.writer.start( self.path )
+        with self.assertRaises( ValueError ):
+            with DbHelper.transaction():
+                worker = threading.Thread( target=work )
+                worker.start()
+                worker.join()
+                raise ValueError( 'roll back' )
+        self.assertEqual( len( errors ), 1 )
+        self.assertEqual( self.system.get_value( 'k4' ), 'v4' )
+
+    def test_stop(self):
+        self.writer.start( self.path )
+        futures = [ self.system.queue_value( f'key{i}', str(i) ) for i in range(10) ]
+        self.writer.stop()
+        self.assertFalse( self.writer.is_running() )
+        self.assertTrue( all( future.done() and future.result() for future in futures ) )
+        self.assertEqual( self.system.get_value( 'key9' ), '9' )
+
+    def test_stop_timeout(self):
+        self.writer.start( self.path )
+        writing = threading.Event()
+        release = threading.Event()
+        def slow( db ):
+            del db
+            writing.set()
+            return release.wait( 10 )
+        slow_write = self.writer.submit_call( slow, transaction=False )
+        self.assertTrue( writing.wait( 10 ) )
+        queued = self.system.queue_value( 'k4', 'v4' )
+        # The thread is still writing: what is queued is left to it
+        self.assertFalse( self.writer.stop( timeout=0.1 ) )
+        self.assertTrue( self.writer.is_running() )
+        self.assertFalse( queued.done() )
+        release.set()
+        self.assertTrue( self.writer.stop() )
+        self.assertTrue( slow_write.result() )
+        self.assertTrue( queued.result() )
+        self.assertEqual( self.system.get_value( 'k4' ), 'v4' )
+
+    def test_error(self):
+        self.writer.start( self.path )
+        future = self.writer.submit( 'INSERT INTO NoTable( x ) VALUES( ? )', [1] )
+        with self.assertRaises( RuntimeError ):
+            future.result( timeout=10 )
+
+if __name__ == "__main__":
+    unittest.main()
@@ -77,7 +77,7 @@ class TestSetup(unittest.TestCase):
 
         self.assertTrue(self.query.exec(self.sql_get_tablenames))
         self.query.next()
-        self.assertEqual(8, self.query.value(0))
+        self.assertEqual(9, self.query.value(0))
         self.query.finish()
 
     def test_drop_tables(self):
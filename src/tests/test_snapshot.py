@@ -0,0 +1,77 @@
+"""
+Test frame: Resume snapshot
+
+ This file is part of SheetMusic
+ Copyright: 2022,2023 by Chrles Gentry
+ You should have received a copy of the GNU General Public License
+ along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+#ignore too many methods, missing doc strings
+#pylint: disable=C0115
+#pylint: disable=C0116
+#pylint: disable=R0904
+
+import os
+import tempfile
+import unittest
+
+from PySide6.QtCore import QSize
+from PySide6.QtGui import QColor, QImage
+
+from util.snapshot import ResumeSnapshot, SnapshotKey
+
+class TestResumeSnapshot( unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.filename = ResumeSnapshot.filename_for_directory( self.tmp.name )
+        self.key = SnapshotKey( 'Bach', '/music/bach', 12, QSize( 300, 200 ), 2.0 )
+        self.image = QImage( 600, 400, QImage.Format_RGB32 )
+        self.image.fill( QColor( 10, 20, 30 ) )
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_save_load(self):
+        self.assertTrue( ResumeSnapshot.save( self.filename, self.image, self.key, 'side_2' ) )
+        qimage, layout = ResumeSnapshot.load( self.filename, self.key )
+        self.assertIsNotNone( qimage )
+        self.assertEqual( layout, 'side_2' )
+        self.assertEqual( qimage.size(), QSize( 600, 400 ) )
+        self.assertEqual( qimage.devicePixelRatio(), 2.0 )
+        self.assertEqual( qimage.pixelColor( 599, 399 ), QColor( 10, 20, 30 ) )
+
+    def test_different_key(self):
+        self.assertTrue( ResumeSnapshot.save( self.filename, self.image, self.key ) )
+        for key in (
+                SnapshotKey( 'Bach', '/music/bach', 13, QSize( 300, 200 ), 2.0 ),
+                SnapshotKey( 'Bach', '/music/bach', 12, QSize( 301, 200 ), 2.0 ),
+                SnapshotKey( 'Bach', '/music/bach', 12, QSize( 300, 200 ), 1.0 ),
+                SnapshotKey( 'Bach', '/music/other', 12, QSize( 300, 200 ), 2.0 ),
+                SnapshotKey( 'Handel', '/music/bach', 12, QSize( 300, 200 ), 2.0 )):
+            self.assertEqual( ResumeSnapshot.load( self.filename, key ), (None, '') )
+
+    def test_missing_or_bad(self):
+        self.assertEqual( ResumeSnapshot.load( self.filename, self.key ), (None, '') )
+        with open( self.filename, 'wb' ) as snapshot:
+            snapshot.write( b'not a snapshot' * 10 )
+        self.assertEqual( ResumeSnapshot.load( self.filename, self.key ), (None, '') )
+
+    def test_truncated(self):
+        ResumeSnapshot.save( self.filename, self.image, self.key )
+        size = os.path.getsize( self.filename )
+        with open( self.filename, 'r+b' ) as snapshot:
+            snapshot.truncate( size - 100 )
+        self.assertEqual( ResumeSnapshot.load( self.filename, self.key ), (None, '') )
+
+    def test_remove(self):
+        self.assertFalse( ResumeSnapshot.save( self.filename, QImage(), self.key ) )
+        ResumeSnapshot.save( self.filename, self.image, self.key )
+        ResumeSnapshot.remove( self.filename )
+        self.assertFalse( os.path.exists( self.filename ) )
+        ResumeSnapshot.remove( self.filename )
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,90 @@
+"""
+Test frame: Page thumbnail index
+
+ This file is part of SheetMusic
+ Copyright: 2022,2023 by Chrles Gentry
+ You should have received a copy of the GNU General Public License
+ along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+#ignore too many methods, missing doc strings
+#pylint: disable=C0115
+#pylint: disable=C0116
+#pylint: disable=R0904
+
+import os
+import tempfile
+import unittest
+
+from PySide6.QtGui import QColor, QImage
+
+from util.thumbindex import ThumbnailIndex
+
+class TestThumbnailIndex( unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.filename = os.path.join( self.tmp.name, 'thumbnails', '1.sti')
+        self.index = ThumbnailIndex()
+
+    def tearDown(self):
+        self.index.close()
+        self.tmp.cleanup()
+
+    def page(self, width: int, height: int, grey: int) -> QImage:
+        qimage = QImage( width, height, QImage.Format_RGB32 )
+        qimage.fill( QColor( grey, grey, grey ) )
+        return qimage
+
+    def test_create_empty(self):
+        self.assertTrue( self.index.open( self.filename, 5, b'digest' ) )
+        self.assertTrue( self.index.is_open() )
+        self.assertEqual( self.index.missing(), [1, 2, 3, 4, 5] )
+        self.assertIsNone( self.index.image( 1 ) )
+        self.assertFalse( self.index.has( 0 ) )
+        self.assertFalse( self.index.has( 6 ) )
+
+    def test_put_any_order(self):
+        self.index.open( self.filename, 3, b'digest' )
+        self.assertTrue( self.index.put( 3, self.page( 1200, 1600, 50 ) ) )
+        self.assertTrue( self.index.put( 1, self.page( 60, 40, 200 ) ) )
+        self.assertFalse( self.index.put( 4, self.page( 10, 10, 0 ) ) )
+        self.assertEqual( self.index.missing(), [2] )
+        thumb = self.index.image( 3 )
+        self.assertEqual( thumb.format(), QImage.Format_Grayscale8 )
+        self.assertEqual( thumb.width(), ThumbnailIndex.THUMB_WIDTH )
+        self.assertEqual( thumb.height(), ThumbnailIndex.THUMB_HEIGHT )
+        self.assertEqual( thumb.pixelColor( 5, 5 ).red(), 50 )
+        thumb = self.index.image( 1 )
+        self.assertEqual( (thumb.width(), thumb.height()), (60, 40) )
+        self.assertEqual( thumb.pixelColor( 59, 39 ).red(), 200 )
+
+    def test_reopen(self):
+        self.index.open( self.filename, 2, b'digest' )
+        self.index.put( 2, self.page( 33, 20, 77 ) )
+        self.index.close()
+        self.assertTrue( self.index.open( self.filename, 2, b'digest' ) )
+        self.assertEqual( self.index.missing(), [1] )
+        self.assertEqual( self.index.image( 2 ).pixelColor( 32, 19 ).red(), 77 )
+
+    def test_changed_book(self):
+        self.index.open( self.filename, 2, b'digest' )
+        self.index.put( 1, self.page( 10, 10, 0 ) )
+        self.index.close()
+        self.assertTrue( self.index.open( self.filename, 2, b'changed' ) )
+        self.assertEqual( self.index.missing(), [1, 2] )
+        self.index.close()
+        self.assertTrue( self.index.open( self.filename, 3, b'changed' ) )
+        self.assertEqual( self.index.missing(), [1, 2, 3] )
+
+    def test_invalid_file(self):
+        os.makedirs( os.path.dirname( self.filename ) )
+        with open( self.filename, 'wb') as thumbs:
+            thumbs.write( b'not an index' )
+        self.assertTrue( self.index.open( self.filename, 1 ) )
+        self.assertEqual( self.index.missing(), [1] )
+
+
+if __name__ == "__main__":
+    unittest.main()
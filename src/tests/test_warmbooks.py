@@ -0,0 +1,89 @@
+"""
+Test frame: Recent books kept in memory
+
+ This file is part of SheetMusic
+ Copyright: 2022,2023 by Chrles Gentry
+ You should have received a copy of the GNU General Public License
+ along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+"""
+
+#ignore too many methods, missing doc strings
+#pylint: disable=C0115
+#pylint: disable=C0116
+#pylint: disable=R0904
+
+import unittest
+
+from util.pagecache import PageCache
+from util.warmbooks import WarmBooks
+
+class TestWarmBooks( unittest.TestCase):
+
+    def setUp(self):
+        # 'images' are just strings: the size is the length of the string
+        self.warm = WarmBooks( max_books=2, budget=100, sizeof=len )
+
+    def pages(self, book:int, *sizes )->dict:
+        return { PageCache.key( book, page, 800, 600, 1.0, True ): 'x'*size
+                 for page, size in enumerate( sizes, start=1 ) }
+
+    def test_keep_take(self):
+        self.assertTrue( self.warm.keep( 'bach', pages=self.pages( 1, 10, 20 ) ) )
+        self.assertIn( 'bach', self.warm )
+        self.assertEqual( self.warm.used, 30 )
+        book = self.warm.take( 'bach' )
+        self.assertEqual( book.name, 'bach' )
+        self.assertEqual( len( book.pages ), 2 )
+        self.assertNotIn( 'bach', self.warm )
+        self.assertEqual( self.warm.used, 0 )
+        self.assertIsNone( self.warm.take( 'bach' ) )
+
+    def test_max_books(self):
+        for name in ( 'bach', 'handel', 'mozart' ):
+            self.warm.keep( name, pages=self.pages( 1, 10 ) )
+        self.assertEqual( self.warm.names(), [ 'handel', 'mozart' ] )
+        self.assertEqual( self.warm.used, 20 )
+        self.warm.keep( 'handel' )
+        self.assertEqual( self.warm.names(), [ 'mozart', 'handel' ] )
+
+    def test_budget(self):
+        self.warm.keep( 'bach', pages=self.pages( 1, 60 ) )
+        self.warm.keep( 'handel', pages=self.pages( 2, 50 ) )
+        self.assertEqual( self.warm.names(), [ 'handel' ] )
+        # Pages that don't fit are dropped: the first (shown) pages are kept
+        self.warm.keep( 'mozart', pages=self.pages( 3, 40, 70, 30 ) )
+        book = self.warm.take( 'mozart' )
+        self.assertEqual( [ key[1] for key in book.pages ], [ 1, 3 ] )
+
+    def test_off(self):
+        warm = WarmBooks( max_books=0, budget=100, sizeof=len )
+        self.assertFalse( warm.keep( 'bach', pages=self.pages( 1, 10 ) ) )
+        self.assertEqual( len( warm ), 0 )
+
+    def test_restore(self):
+        cache = PageCache( budget=100, sizeof=len )
+        self.warm.keep( 'bach', pages=self.pages( 1, 10, 20 ) )
+        book = self.warm.take( 'bach' )
+        self.assertEqual( book.restore( cache ), 2 )
+        self.assertEqual( cache.used, 30 )
+        self.assertEqual( book.restore( cache ), 0 )
+        book.release()
+        self.assertEqual( book.pages, {} )
+
+    def test_pdf_not_loaded(self):
+        # A PDF that isn't open isn't loaded just to be kept
+        self.warm.keep( 'bach', pdf_path='/no/such/book.pdf' )
+        self.assertIsNone( self.warm.take( 'bach' ).pdf_path )
+
+    def test_clear(self):
+        self.warm.keep( 'bach', pages=self.pages( 1, 10 ) )
+        self.warm.keep( 'handel', pages=self.pages( 2, 10 ) )
+        self.warm.discard( 'bach' )
+        self.assertEqual( self.warm.names(), [ 'handel' ] )
+        self.warm.clear()
+        self.assertEqual( len( self.warm ), 0 )
+        self.assertEqual( self.warm.used, 0 )
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,72 @@
+"""
+User Interface : Book pages finder
+
+ Finds the page files of a book and the digest of its source (see
+ PageStore.source_digest) in a background thread. Both look at every
+ page file, so they are done once when a book is opened and the
+ result is used by the page store and the thumbnails.
+
+ This file is part of SheetMusic
+ Copyright: 2022,2023 by Chrles Gentry
+ You should have received a copy of the GNU General Public License
+ along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+ This file is part of Sheetmusic.
+
+"""
+
+import os
+
+from PySide6.QtCore import QObject, QRunnable, Signal
+
+from util.pagestore import PageStore
+
+
+class BookPagesSignals(QObject):
+    """ Signals used to return the pages found """
+    finished = Signal(int, object, object)   # book id, page sources, digest (or None)
+
+
+class BookPagesJob(QRunnable):
+    """ Find the source of each page and the digest of the book.
+        This runs in a worker thread so it is given everything it needs:
+        it mustn't use the book, which may be closed while we run.
+    """
+
+    def __init__(self, signals: BookPagesSignals,
+                 book_id: int,
+                 last_page: int,
+                 location: str,
+                 path_format: str | None = None):
+        """
+        Args:
+            signals (BookPagesSignals): where to send the result
+            book_id (int): Book being opened
+            last_page (int): Number of pages in the book
+            location (str): Book location (PDF file or page directory)
+            path_format (str | None, optional): Format for the path of a
+                page from its number. None for a PDF: every page is the file
+        """
+        super().__init__()
+        self.signals = signals
+        self.book_id = book_id
+        self.last_page = last_page
+        self.location = location
+        self.path_format = path_format
+        self.setAutoDelete(True)
+
+    def page_path(self, page: int) -> str | None:
+        """ Return the file for a page, or None if it doesn't exist """
+        path = self.location if self.path_format is None else self.path_format.format(page)
+        return path if path and os.path.isfile(path) else None
+
+    def sources(self) -> list:
+        """ Return the file for each page (None for any that are missing) """
+        if self.path_format is None:
+            return [self.page_path(1)] * self.last_page
+        return [self.page_path(page) for page in range(1, self.last_page + 1)]
+
+    def run(self):
+        self.signals.finished.emit(self.book_id,
+                                   self.sources(),
+                                   PageStore.source_digest(self.location))
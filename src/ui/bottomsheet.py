@@ -15,8 +15,10 @@ User Interface :  Bottom Sheet
 # even when the references are just fine. There are some sloppy fixes to
 # get around this. Sorry. I'll continue to try and change this.
 
+from typing import Callable
+
 from PySide6.QtCore import QSize
-from PySide6.QtGui import (Qt)
+from PySide6.QtGui import (QImage, Qt)
 from PySide6.QtWidgets import (
     QHBoxLayout, QSizePolicy, QWidget,
     QMainWindow, QVBoxLayout)
@@ -24,6 +26,11 @@ from qdb.keys import DbKeys
 from qdb.log import DbLog
 from ui.borderglow import BorderGlow
 from ui.interface.sheetmusicdisplay import ISheetMusicDisplayWidget
+from ui.prefetch import PagePrefetch
+from util.latency import LatencyRecorder
+from util.pagecache import PageCache
+from util.pageformat import PageFormat
+from util.pagestore import PageStore
 from util.pdfclass import PdfDimensions
 
 
@@ -44,6 +51,7 @@ class BottomSheet():
     LAYOUT_SETUP = '©up'
     LAYOUT_CREATE = 'layout'
     ALL_PAGES = 3
+    RENDER_PDF = False
 
     _layout = {
         DbKeys.VALUE_PAGES_SINGLE:  {
@@ -79,10 +87,18 @@ class BottomSheet():
         self._page_width = None
         self._page_height = None
         self._smart_turn = False
+        self._progressive = False
+        self._page_format = PageFormat.COLOUR
         self._pdfmode = False
         self.layout_pages_stacked = None
         self.layout_pages_side = None
+        self._page_source = None
+        self._last_page = 0
+        self._book_id = None
+        self.page_store = None
 
+        self.prefetch = PagePrefetch(self.RENDER_PDF)
+        self.page_cache = PageCache.shared()
         self.border_glow = BorderGlow()
         self._define_layout()
         self._set_size(main_window)
@@ -138,6 +154,8 @@ class BottomSheet():
         for page in self._page_refs:
             page.widget().setStyleSheet("background: black")
             page.widget().hide()
+        self.set_progressive(self._progressive)
+        self.set_page_format(self._page_format)
 
     def _create_sizepolicy(self, widget) -> QSizePolicy:
         """ Create the page size policy used for the display widget"""
@@ -179,9 +197,9 @@ class BottomSheet():
         self._page_height = int(
             self._window_height / self._get_layout_value(self.LAYOUT_HEIGHT))
         if self._page_width and self._page_height:
-            for index in range(self.number_pages()):
-                self._page_refs[index].resize(
-                    self._page_width, self._page_height)
+            # Size all of them: hidden pages can be rotated into view
+            for page in self._page_refs:
+                page.resize(self._page_width, self._page_height)
 
     def resize(self, size: QSize | None = None) -> None:
         """ This must be called everytime the window is resized and on startup
@@ -220,6 +238,8 @@ class BottomSheet():
     def clear(self):
         """ Clear all pages (displayed or not), but do not remove them from layout"""
         self.border_glow.stop()
+        self.prefetch.clear()
+        self.set_page_store(None)
         for page in self._page_refs:
             page.clear()
 
@@ -294,6 +314,28 @@ class BottomSheet():
         self._smart_turn = state
         return rtn
 
+    def set_progressive(self, state: bool) -> bool:
+        """ Set progressive display (quick scale first, smooth scale
+            in the background) and return the previous state """
+        rtn = self._progressive
+        self._progressive = state
+        for page in self._page_refs:
+            if hasattr(page.widget(), 'progressive'):
+                page.widget().progressive = state
+        return rtn
+
+    def set_page_format(self, page_format: str) -> str:
+        """ Set the format pages are held in (see PageFormat)
+            and return the previous format """
+        rtn = self._page_format
+        self._page_format = (page_format if page_format in PageFormat.MODES
+                             else PageFormat.COLOUR)
+        self.prefetch.set_page_format(self._page_format)
+        for page in self._page_refs:
+            if hasattr(page.widget(), 'page_format'):
+                page.widget().page_format = self._page_format
+        return rtn
+
     @property
     def usepdf(self) -> bool:
         """ return if we are setting PDF mode or not """
@@ -309,6 +351,40 @@ class BottomSheet():
     #         PAGE MOVEMENT METHODS
     #  -----------------------------------------------
 
+    def _rotate_forward(self) -> ISheetMusicDisplayWidget:
+        """ Move the first page widget to the last displayed position and
+            return it. Only the references move: no content is copied """
+        page = self._page_refs.pop(0)
+        self._page_refs.insert(max(self.number_pages(), 1)-1, page)
+        return page
+
+    def _rotate_backward(self) -> ISheetMusicDisplayWidget:
+        """ Move the last page widget (not shown or scrolled off) to the
+            front and return it. Only the references move """
+        page = self._page_refs.pop()
+        self._page_refs.insert(0, page)
+        return page
+
+    def _sync_layout(self) -> None:
+        """ Put the page widgets in the layout in the order of _page_refs.
+            Widgets beyond the number of pages shown are removed and hidden """
+        if self._current_layout is None:
+            return
+        numpages = self.number_pages()
+        for index, page in enumerate(self._page_refs):
+            widget = page.widget()
+            position = self._current_layout.indexOf(widget)
+            if index < numpages:
+                if position != index:
+                    if position >= 0:
+                        self._current_layout.removeWidget(widget)
+                    self._current_layout.insertWidget(index, widget)
+                widget.show()
+            else:
+                if position >= 0:
+                    self._current_layout.removeWidget(widget)
+                widget.hide()
+
     def _roll_forward(self, page_number: int) -> bool:
         """
             OK, so we have up to 'n' pages loaded but on 'p' pages are
@@ -319,45 +395,217 @@ class BottomSheet():
             * page isn't displayed
         """
         roll = False
-        while (page_number in self.page_numbers() and
-                not self.is_shown(page_number) and
-                self.number_pages() != self.ALL_PAGES
-               ):
+        for _ in range(self.ALL_PAGES):
+            if (page_number not in self.page_numbers() or
+                    self.is_shown(page_number) or
+                    self.number_pages() == self.ALL_PAGES):
+                break
             roll = True
-            self._page_refs[0].copy(self._page_refs[1])
-            self._page_refs[1].copy(self._page_refs[2])
-            self._page_refs[2].clear()
+            page = self._page_refs.pop(0)
+            page.clear()
+            self._page_refs.append(page)
+        if roll:
+            self._sync_layout()
         return roll
 
     def _roll_forward_zeros(self, endpage: int):
         if endpage != 0:
-            while self._page_refs[0].page_number() == 0:
-                self._page_refs[0].copy(self._page_refs[1])
-                self._page_refs[1].copy(self._page_refs[2])
-                self._page_refs[2].clear()
-
-    def _simple_next_page(self, content: object, page_number: int):
-        pageshown = self.number_pages()
-        if pageshown == 1:
-            self._page_refs[0].set_content_page(content, page_number)
-        elif pageshown == 2:
-            self._page_refs[0].copy(self._page_refs[1])
-            self._page_refs[1].set_content_page(content, page_number)
-        else:
-            self._page_refs[0].copy(self._page_refs[1])
-            self._page_refs[1].copy(self._page_refs[2])
-            self._page_refs[2].set_content_page(content, page_number)
-
-    def _simple_previous_page(self, content: object, page_number: int):
-        self._page_refs[2].copy(self._page_refs[1])
-        self._page_refs[1].copy(self._page_refs[0])
-        self._page_refs[0].set_content_page(content, page_number)
-
-    def _smart_page(self, plw: ISheetMusicDisplayWidget, content: object, page_number: int) -> None:
+            for _ in range(self.ALL_PAGES):
+                if self._page_refs[0].page_number() != 0:
+                    break
+                page = self._page_refs.pop(0)
+                page.clear()
+                self._page_refs.append(page)
+            self._sync_layout()
+
+    def _simple_next_page(self, content: object, page_number: int, source: QImage = None):
+        """ The first page scrolls off: reuse its widget for the new page """
+        page = self._rotate_forward()
+        page.set_content_page(content, page_number, source)
+        self._sync_layout()
+
+    def _simple_previous_page(self, content: object, page_number: int, source: QImage = None):
+        """ The last page scrolls off: reuse its widget for the new page """
+        page = self._rotate_backward()
+        page.set_content_page(content, page_number, source)
+        self._sync_layout()
+
+    def _smart_page(self, plw: ISheetMusicDisplayWidget, content: object, page_number: int,
+                    source: QImage = None) -> None:
         self.border_glow.stop()
-        plw.set_content_page(content, page_number)
+        plw.set_content_page(content, page_number, source)
         self.border_glow.start(plw.widget())
 
+    #  -----------------------------------------------
+    #         PAGE PREFETCH METHODS
+    #  -----------------------------------------------
+
+    def set_page_source(self,
+                        page_source: Callable[[int], str | None],
+                        last_page: int,
+                        book_id: int | None = None) -> None:
+        """ Set the routine used to find the content for a page number.
+
+            This is used by the prefetch (render-ahead) to load pages
+            before they are turned to and, with the book_id, for the
+            page cache. Pass None to turn off prefetch and caching.
+        """
+        self.prefetch.clear()
+        self._page_source = page_source
+        self._last_page = last_page
+        self._book_id = book_id
+
+    def set_page_store(self, page_store: PageStore | None) -> None:
+        """ Use a page store (pre-decoded pages) for the book or None to stop """
+        if self.page_store is not None and self.page_store is not page_store:
+            self.page_store.close()
+        self.page_store = page_store
+
+    def _store_has_page(self, page_number: int) -> bool:
+        return self.page_store is not None and self.page_store.has_page(page_number)
+
+    def prefetch_enabled(self) -> bool:
+        """ Prefetch is used when we know where pages come from and
+            we are displaying images (not the PDF viewer) """
+        return self._page_source is not None and not self.usepdf
+
+    def cache_enabled(self) -> bool:
+        """ Page images are cached when we know the book and display images """
+        return self._book_id is not None and not self.usepdf
+
+    def _page_key(self, page_number: int) -> tuple:
+        """ Key for a page at the current display size """
+        label = self._page_refs[0].widget()
+        size = label.size()
+        return PageCache.key(self._book_id,
+                             page_number,
+                             size.width(), size.height(),
+                             label.devicePixelRatioF(),
+                             self.keep_aspect_ratio)
+
+    def _cached_content(self, content: object, page_number: int) -> tuple[object, QImage | None]:
+        """ Return the decoded image for the page if we have one
+            (page cache, prefetch or page store) and the source it was scaled
+            from, if known, or the original content and None if not """
+        if not page_number or not (self.cache_enabled() or self.prefetch_enabled()):
+            return content, None
+        key = self._page_key(page_number)
+        source = None
+        qimage = self.page_cache.get(key) if self.cache_enabled() else None
+        if qimage is not None:
+            source = self.page_cache.source(key)
+        elif self.prefetch_enabled():
+            rendered = self.prefetch.take(key)
+            if rendered is not None:
+                qimage, source = rendered
+                if self.cache_enabled():
+                    self.page_cache.put(key, qimage, source)
+        if qimage is None and self._store_has_page(page_number):
+            qimage = self.page_store.image(page_number)
+        return (content, None) if qimage is None else (qimage, source)
+
+    def _cache_page(self, page: ISheetMusicDisplayWidget) -> None:
+        """ Save the image displayed by the page widget, and the source
+            the label keeps for it, in the page cache """
+        if self.cache_enabled() and page.page_number():
+            key = self._page_key(page.page_number())
+            if key not in self.page_cache:
+                self.page_cache.put(key, page.widget().image(), page.widget().resident())
+
+    def _cache_pages(self) -> None:
+        """ Save all the displayed pages in the page cache """
+        for page in self._page_refs[0:self.number_pages()]:
+            self._cache_page(page)
+
+    def cached_pages(self, ahead: int = 1) -> dict:
+        """ Return the page cache keys and images for the pages shown and
+            'ahead' pages after them (in the direction we were turning),
+            shown pages first. Pages that aren't in the cache are skipped """
+        pages = {}
+        if not self.cache_enabled() or self.number_pages() == 0:
+            return pages
+        shown = [page for page in self.page_numbers_displayed() if page]
+        if not shown:
+            return pages
+        if self._direction == self.FORWARD:
+            start = max(shown) + 1
+            ahead_pages = range(start, min(start + ahead, self._last_page + 1))
+        else:
+            start = min(shown) - 1
+            ahead_pages = range(start, max(start - ahead, 0), -1)
+        for page_number in shown + list(ahead_pages):
+            key = self._page_key(page_number)
+            qimage = self.page_cache.peek(key)
+            if qimage is not None:
+                pages[key] = qimage
+        return pages
+
+    def rescale_pages(self) -> bool:
+        """ Rescale the displayed pages from the images held in memory
+            (after a resize or aspect ratio change).
+            Return False if any page needs to be loaded again """
+        rtn = True
+        for page in self._page_refs[0:self.number_pages()]:
+            if page.page_number() and not page.rescale():
+                rtn = False
+        if rtn:
+            self._cache_pages()
+            self._prefetch_ahead()
+        return rtn
+
+    def _prefetch_ahead(self) -> None:
+        """ Queue up the next pages in the direction we are turning """
+        if not self.prefetch_enabled() or self.number_pages() == 0:
+            return
+        if self._direction == self.FORWARD:
+            start = self.get_highest_page_shown() + 1
+            pages = range(start, min(start + self.prefetch.depth, self._last_page + 1))
+        else:
+            start = self.get_lowest_page_shown() - 1
+            pages = range(start, max(start - self.prefetch.depth, 0), -1)
+        pages = list(pages)
+        self.prefetch.retain(pages)
+        for page in pages:
+            key = self._page_key(page)
+            if (self.cache_enabled() and key in self.page_cache) or \
+                    self.prefetch.is_requested(key):
+                continue
+            if self._store_has_page(page):
+                # Page store pages are already decoded: only scale them. They
+                # are copied out of the memory map as the store may be closed first
+                self.prefetch.request(key, self.page_store.image(page).copy())
+            else:
+                self.prefetch.request(key, self._page_source(page))
+
+    def _scrub_image(self, page_number: int,
+                     thumbnail: Callable[[int], QImage | None]) -> QImage | None:
+        """ Return the cheapest image we have for a page: one already
+            decoded, then the page store and last the thumbnail """
+        if self.cache_enabled():
+            qimage = self.page_cache.get(self._page_key(page_number))
+            if qimage is not None:
+                return qimage
+        if self._store_has_page(page_number):
+            return self.page_store.image(page_number)
+        return thumbnail(page_number)
+
+    def scrub_frame(self, page_numbers: list[int],
+                    thumbnail: Callable[[int], QImage | None]) -> bool:
+        """ Show a low resolution frame while the page slider is dragged.
+
+            Renders queued for pages we were showing are stale so they
+            are cancelled. The page widgets keep their page numbers: the
+            pages are loaded at full quality (load_pages) when the
+            slider is released.
+        """
+        if not self.prefetch_enabled():
+            return False
+        self.prefetch.cancel()
+        for page, page_number in zip(self._page_refs[0:self.number_pages()], page_numbers):
+            page.widget().set_preview(
+                self._scrub_image(page_number, thumbnail) if page_number else None)
+        return True
+
     def load_pages(self,
                    content_1: object, page_number1: int,
                    content_2: object, page_number2: int,
@@ -370,32 +618,45 @@ class BottomSheet():
             page_number1, page_number2, page_number3))
         # pylint: enable=C0209
         self._page_refs[0].dimensions = self.dimensions
-        self._page_refs[0].set_content_page(content_1, page_number1)
+        content_1, source_1 = self._cached_content(content_1, page_number1)
+        self._page_refs[0].set_content_page(content_1, page_number1, source_1)
         self._page_refs[1].dimensions = self.dimensions
-        self._page_refs[1].set_content_page(content_2, page_number2)
+        content_2, source_2 = self._cached_content(content_2, page_number2)
+        self._page_refs[1].set_content_page(content_2, page_number2, source_2)
         self._page_refs[2].dimensions = self.dimensions
-        self._page_refs[2].set_content_page(content_3, page_number3)
+        content_3, source_3 = self._cached_content(content_3, page_number3)
+        self._page_refs[2].set_content_page(content_3, page_number3, source_3)
         self._direction = self.FORWARD
         self._size_pages()
+        self._cache_pages()
+        self._prefetch_ahead()
 
+    @LatencyRecorder.timed('next_page')
     def next_page(self, content: object, page_number: int, end: bool = False):
         """ go to next page """
         if not end or not self.is_shown(page_number):
+            content, source = self._cached_content(content, page_number)
             if self._smart_turn and self.number_pages() > 1:
                 self._smart_page(self.first_page_widget(),
-                                 content, page_number)
+                                 content, page_number, source)
             else:
-                self._simple_next_page(content, page_number)
+                self._simple_next_page(content, page_number, source)
         self._direction = self.FORWARD
+        self._cache_pages()
+        self._prefetch_ahead()
 
+    @LatencyRecorder.timed('previous_page')
     def previous_page(self, content: object, page_number: int, end: bool = False):
         """ Go to previous page """
         if not end or not self.is_shown(page_number):
+            content, source = self._cached_content(content, page_number)
             if self._smart_turn and self.number_pages() > 1:
-                self._smart_page(self.last_page_widget(), content, page_number)
+                self._smart_page(self.last_page_widget(), content, page_number, source)
             else:
-                self._simple_previous_page(content, page_number)
+                self._simple_previous_page(content, page_number, source)
         self._direction = self.BACKWARD
+        self._cache_pages()
+        self._prefetch_ahead()
 
     # -----------------------------------------------
     #      PAGE NUMBER INFORMATION METHODS
@@ -97,8 +97,9 @@ class ISheetMusicDisplayWidget( metaclass=abc.ABCMeta):
         raise NotImplementedError
 
     @abc.abstractmethod
-    def set_content_page(self, content:object, page_number:int)->bool:
-        """ Set this page's content to 'content' """
+    def set_content_page(self, content:object, page_number:int, source:object=None)->bool:
+        """ Set this page's content to 'content'. 'source' is the image a
+            scaled page image was made from (used to rescale it) """
         raise NotImplementedError
 
     @abc.abstractmethod
@@ -11,19 +11,71 @@ User Interface : Label Widget
 """
 
 
+from PySide6.QtCore import QObject, QRunnable, QSize, QThreadPool, Signal
 from PySide6.QtGui import QImage, QPixmap, Qt
 from PySide6.QtWidgets import QApplication, QLabel, QSizePolicy
 
 from ui.mixin.pagedisplay import PageDisplayMixin
+from util.latency import LatencyRecorder
+from util.pagecache import PageCache
+from util.pageformat import PageFormat
+
+
+class ScaleSignals(QObject):
+    """ Return the smooth scaled image from the worker thread """
+    finished = Signal(int, QImage)
+
+
+class SmoothScale(QRunnable):
+    """ Smooth scale an image in a worker thread (progressive display) """
+
+    def __init__(self, signals: ScaleSignals, generation: int, qimage: QImage, size: QSize):
+        super().__init__()
+        self.signals = signals
+        self.generation = generation
+        self.qimage = qimage
+        self.size = size
+        self.setAutoDelete(True)
+
+    def run(self):
+        self.signals.finished.emit(
+            self.generation,
+            PageFormat.scaled_format(
+                self.qimage.scaled(self.size,
+                                   aspectMode=Qt.KeepAspectRatio,
+                                   mode=Qt.SmoothTransformation),
+                self.qimage))
 
 
 class LabelWidget(PageDisplayMixin, QLabel):
-    """ Label widget is used for page pixel map display """
+    """ Label widget is used for page pixel map display
+
+        When a page is loaded from a file (or rendered from a PDF) the
+        decoded source is kept ('resident') so a resize can rescale from
+        memory. Sources larger than RESIDENT_SCREENS x the screen are
+        kept as a smaller copy. Pages shown from an image that is already
+        scaled (prefetch, page cache, page store) keep the source passed
+        with it or, if there isn't one, the image itself. Resident images
+        count against the page cache budget; one that the cache refuses
+        (see PageCache.set_resident) isn't kept and the page is reloaded
+        after a resize.
+
+        Decoded pages are converted to greyscale or 1 bit when
+        'page_format' is set (see PageFormat).
+    """
+    RESIDENT_SCREENS = 2
 
     def __init__(self, name: str = None):
         PageDisplayMixin.__init__(self, name)
         QLabel.__init__(self)
         self._size_parms = None
+        self._image = None
+        self._resident = None
+        self._scale_generation = 0
+        self._scale_signals = ScaleSignals()
+        self._scale_signals.finished.connect(self._smooth_scale_finished)
+        self.progressive = False
+        self.page_format = PageFormat.COLOUR
         self._setup_widget(name)
 
     def _size_policy(self) -> QSizePolicy:
@@ -47,14 +99,69 @@ class LabelWidget(PageDisplayMixin, QLabel):
         if px is None or px is False or px.isNull() or not isinstance(px, QPixmap):
             return False
         self.setPixmap(px)
+        self._image = None
         return True
 
     def _set_from_file(self, file_name: str) -> bool:
         """ Load the image from a file and call pixmap display routine"""
         qimage = QImage()
         qimage.load(file_name)
+        return self.set_source_image(qimage)
+
+    @staticmethod
+    def resident_limit() -> QSize:
+        """ Largest source kept in memory (device pixels). Call from the GUI thread """
+        screen = QApplication.primaryScreen()
+        return screen.size() * screen.devicePixelRatio() * LabelWidget.RESIDENT_SCREENS
+
+    @staticmethod
+    def resident_copy(qimage: QImage, limit: QSize) -> QImage:
+        """ Return the source, or a mid-resolution copy that fits in 'limit' if
+            either side is larger. This doesn't use any widgets so it can be
+            called from a worker thread """
+        if qimage.width() > limit.width() or qimage.height() > limit.height():
+            return PageFormat.scaled_format(
+                qimage.scaled(limit,
+                              aspectMode=Qt.KeepAspectRatio,
+                              mode=Qt.SmoothTransformation),
+                qimage)
+        return qimage
+
+    def _set_resident(self, qimage: QImage | None) -> None:
+        """ Keep the source image (or a mid-resolution copy) in memory """
+        if qimage is not None and not qimage.isNull():
+            qimage = LabelWidget.resident_copy(qimage, self.resident_limit())
+        else:
+            qimage = None
+        if not PageCache.shared().set_resident(id(self), qimage):
+            qimage = None
+        self._resident = qimage
+
+    def resident(self) -> QImage | None:
+        """ Return the image kept for rescaling (None if there isn't one) """
+        return self._resident
+
+    def set_source_image(self, qimage: QImage) -> bool:
+        """ Display a decoded (unscaled) page and keep it for rescaling """
+        self._scale_generation += 1
+        qimage = PageFormat.convert(qimage, self.page_format)
+        self._set_resident(qimage)
+        if self._resident is not None:
+            return self._set_from_image(self._resident)
+        if qimage is None or qimage.isNull():
+            self.clear()
+            self._image = None
+            return False
         return self._set_from_image(qimage)
 
+    def rescale(self) -> bool:
+        """ Rescale from the resident image after a resize or aspect change.
+            Return False if there isn't one (the page must be reloaded) """
+        if self._resident is None:
+            return False
+        self._scale_generation += 1
+        return self._set_from_image(self._resident)
+
     def _set_from_image(self, qimage: QImage) -> bool:
         """ Set the label to the pixmap passed
 
@@ -65,27 +172,89 @@ class LabelWidget(PageDisplayMixin, QLabel):
         if qimage is None or qimage is False or qimage.isNull() or not isinstance(qimage, QImage):
             return False
         self.resize()
-        qimage.setDevicePixelRatio(self._ratio)
+        source = qimage
         size = self.size() * (self._ratio)
+        smooth_pending = False
         if self.keep_aspect_ratio:
-            qimage = qimage.scaled(size,
-                                   aspectMode=Qt.KeepAspectRatio,
-                                   mode=Qt.SmoothTransformation)
-        else:
+            # Prefetched images are already scaled: don't scale them again
+            if qimage.size() != qimage.size().scaled(size, Qt.KeepAspectRatio):
+                if self.progressive:
+                    smooth_pending = self._start_smooth_scale(qimage, size)
+                qimage = qimage.scaled(size,
+                                       aspectMode=Qt.KeepAspectRatio,
+                                       mode=(Qt.FastTransformation if smooth_pending
+                                             else Qt.SmoothTransformation))
+        elif qimage.size() != size:
             qimage = qimage.scaled(size)
-        self._set_from_pixmap(QPixmap.fromImage(qimage))
+        qimage = PageFormat.scaled_format(qimage, source)
+        self._set_from_pixmap(self._display_pixmap(qimage))
+        # Don't hand out the quick image: wait for the smooth one
+        self._image = None if smooth_pending else qimage
+        return True
+
+    def _display_pixmap(self, qimage: QImage) -> QPixmap:
+        """ Convert for display at the screen's pixel ratio. The ratio is set
+            on the pixmap: setting it on an image that shares its data (the
+            resident or a cached page) would copy the whole image """
+        px = QPixmap.fromImage(qimage)
+        px.setDevicePixelRatio(self._ratio)
+        return px
+
+    def _start_smooth_scale(self, qimage: QImage, size: QSize) -> bool:
+        """ Progressive display: run the smooth scale in a worker.
+            The result replaces the quick (fast) scaled image when ready """
+        QThreadPool.globalInstance().start(
+            SmoothScale(self._scale_signals, self._scale_generation, qimage, size))
         return True
 
-    def set_content(self, newimage: str | QImage | QPixmap) -> bool:
-        """ Set the label to either a pixmap or the contents of a file"""
+    def _smooth_scale_finished(self, generation: int, qimage: QImage) -> None:
+        """ Swap in the smooth scaled image if we are still showing that page """
+        if generation == self._scale_generation and not qimage.isNull():
+            self.setPixmap(self._display_pixmap(qimage))
+            self._image = qimage
+
+    def set_preview(self, qimage: QImage | None) -> bool:
+        """ Show a quick, low resolution, frame (used while the page slider
+            is dragged). Nothing is kept: the page is loaded properly after """
+        self._scale_generation += 1
+        self._set_resident(None)
+        self._image = None
+        self.clear()
+        if qimage is None or qimage.isNull():
+            return False
+        self.resize()
+        qimage = qimage.scaled(self.size() * self._ratio,
+                               aspectMode=(Qt.KeepAspectRatio if self.keep_aspect_ratio
+                                           else Qt.IgnoreAspectRatio),
+                               mode=Qt.FastTransformation)
+        self.setPixmap(self._display_pixmap(qimage))
+        return True
+
+    def image(self) -> QImage | None:
+        """ Return the scaled image being displayed (None if not from an image) """
+        return self._image
+
+    @LatencyRecorder.timed('set_content')
+    def set_content(self, newimage: str | QImage | QPixmap, source: QImage | None = None) -> bool:
+        """ Set the label to either a pixmap or the contents of a file.
+            An image that is already scaled can be passed with the 'source'
+            it was scaled from, used to rescale it after a resize """
+        self._scale_generation += 1
+        if isinstance(newimage, str):
+            return self._set_from_file(newimage)
         if isinstance(newimage, QImage):
+            self._set_resident(newimage if source is None or source.isNull() else source)
             return self._set_from_image(newimage)
+        self._set_resident(None)
         if isinstance(newimage, QPixmap):
             return self._set_from_pixmap(newimage)
-        if isinstance(newimage, str):
-            return self._set_from_file(newimage)
         return False
 
+    def paintEvent(self, event) -> None:
+        """ Paint the page and end any page turn timing """
+        super().paintEvent(event)
+        LatencyRecorder.shared().painted()
+
     def resize(self, *args) -> None:
         if len(args) == 0:
             if self._size_parms is None:
@@ -102,3 +271,6 @@ class LabelWidget(PageDisplayMixin, QLabel):
     def close(self):
         """ Closing a label will just clear the contents """
         self.clear()
+        self._image = None
+        self._set_resident(None)
+        self._scale_generation += 1
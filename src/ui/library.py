@@ -23,6 +23,7 @@ from PySide6.QtCore import QSize
 
 from qdb.fields.book import BookField
 from qdb.dbbook import  DbBook
+from qdb.util import DbHelper
 from qdil.preferences import DilPreferences
 from util.library import Library
 from ui.util import center_on_screen
@@ -114,26 +115,28 @@ class UiLibraryConsolidate( UiOutputMixin):
         dbbook = DbBook()
 
         sys.addaudithook( self.track_copy )
-        for book in not_in_lib:
-            book_name = book[ BookField.BOOK ]
-            self.status.append( f"""\nBOOK: {book_name}""" )
-
-            lib_book = dbbook.getbook( book_name)
-            if lib_book is None:
-                #msg = f"""\n\tBook not found in library. Skipping.\n"""
-                continue
-
-            loc = book[BookField.LOCATION]
-            loc_target_dir = os.path.basename( os.path.basename( loc ))
-            sheetmusic = os.path.join( self.sheetmusic_dir , loc_target_dir )
-
-            shutil.copytree( loc ,  sheetmusic  )
-            if os.path.isdir( sheetmusic ):
-                dbbook.update( book=book_name , location=sheetmusic )
-                self.status.append("""\tLibrary updated.""")
-            else:
-                self.status.append(
-                    """\tERROR: Directory doesn't exist. Copy failed. Not updating library.""" )
+        # Location updates are committed together once all the copies are done
+        with DbHelper.transaction():
+            for book in not_in_lib:
+                book_name = book[ BookField.BOOK ]
+                self.status.append( f"""\nBOOK: {book_name}""" )
+
+                lib_book = dbbook.getbook( book_name)
+                if lib_book is None:
+                    #msg = f"""\n\tBook not found in library. Skipping.\n"""
+                    continue
+
+                loc = book[BookField.LOCATION]
+                loc_target_dir = os.path.basename( os.path.basename( loc ))
+                sheetmusic = os.path.join( self.sheetmusic_dir , loc_target_dir )
+
+                shutil.copytree( loc ,  sheetmusic  )
+                if os.path.isdir( sheetmusic ):
+                    dbbook.update( book=book_name , location=sheetmusic )
+                    self.status.append("""\tLibrary updated.""")
+                else:
+                    self.status.append(
+                        """\tERROR: Directory doesn't exist. Copy failed. Not updating library.""" )
         self.btns.setEnabled( True )
         return self.dlg.exec()
 
@@ -19,8 +19,9 @@ from PySide6.QtWidgets import (
     QSlider, QMainWindow, QStackedWidget)
 
 from qdb.keys import DbKeys
-from ui.pdfwidget import PdfWidget
+from ui.bottomsheet import BottomSheet
 from ui.pxwidget import PxWidget
+from ui.thumbnails import UiSliderPreview
 
 class UiMain():
     """ Create and iniitalse all of the window elements """
@@ -70,6 +71,7 @@ class UiMain():
         self.action_goto_page = None
         self.action_help = None
         self.action_help_about = None
+        self.action_help_performance = None
         self.action_last_page = None
         self.action_one_page = None
         self.action_refresh = None
@@ -115,6 +117,7 @@ class UiMain():
         self.set_reimport_pdf = None
         self.set_show_bookmarks = None
         self.slider_page_position = None
+        self.slider_preview = None
         self.stacks = None
         self.statusbar = None
 
@@ -302,6 +305,8 @@ class UiMain():
 
         # HELP action_s
         self.action_help = action("Help")
+        self.action_help_performance = action(
+            "HelpPerformance",    title='Performance...')
 
         # NOTE: Following tend to be 'special' as they an float to other places
         self.action_edit_preferences = action('Preferences')
@@ -458,49 +463,48 @@ class UiMain():
     def _add_help_actions(self) -> None:
         self.menu_help.addAction(self.action_help_about)
         self.menu_help.addAction(self.action_help)
+        self.menu_help.addAction(self.action_help_performance)
 
     def _add_page_widgets(self):
-        """ Add all of the pager widgets here. Call 'show_pager(name) to pick"""
+        """ Add the (empty) pager stack. Pagers are created the first
+            time 'show_pager(name)' picks them, as most sessions only
+            ever use one of them """
         self._stacks_widget = {}
 
         self.stacks = QStackedWidget( self.main_window )
         self.stacks.setObjectName( 'pagerStacks')
         self.stacks.setAutoFillBackground(True)
 
-        # pagerWidget is the intface from program to display
-        # display_widget is the widget that holds all the pages.
+        self.main_window.setCentralWidget(self.stacks)
+        self.show_pager( DbKeys.VALUE_PNG )
 
-        # PNG Pager
-        pager_class = PxWidget( self.main_window )
-        display_widget = pager_class.get_pager_widget()
-        self._stacks_widget[ DbKeys.VALUE_PNG] = {
-            UiMain.STACK_PAGER_CLASS: pager_class,
-            UiMain.STACK_DISPLAY_WIDGET : display_widget
-        }
-        self.stacks.addWidget( display_widget  )
+    @staticmethod
+    def _stack_name(name: str, pdfmode: bool = True) -> str:
+        """ Return the stack name used for a pager type """
+        return f"{name}" if name != DbKeys.VALUE_PDF else f"{DbKeys.VALUE_PDF}_{str(pdfmode)}"
 
-        # PDF pager - Image
-        pager_class = PdfWidget( self.main_window )
-        pager_class.usepdf = False
-        display_widget = pager_class.get_pager_widget()
-        self._stacks_widget[ f"{DbKeys.VALUE_PDF}_{'False'}"] = {
-            UiMain.STACK_PAGER_CLASS: pager_class,
-            UiMain.STACK_DISPLAY_WIDGET : display_widget
-        }
-        self.stacks.addWidget( display_widget  )
+    def _create_pager(self, name: str, pdfmode: bool = True) -> bool:
+        """ Create a pager and add it to the stack. Return False if 'name' is unknown
 
-        # PDF pager - PDF
-        pager_class = PdfWidget( self.main_window )
-        pager_class.usepdf = True
+            pagerWidget is the intface from program to display
+            display_widget is the widget that holds all the pages.
+            The PDF pager (and QtPdfWidgets) is only imported when a PDF is shown
+        """
+        if name == DbKeys.VALUE_PNG:
+            pager_class = PxWidget( self.main_window )
+        elif name == DbKeys.VALUE_PDF:
+            from ui.pdfwidget import PdfWidget  # pylint: disable=import-outside-toplevel
+            pager_class = PdfWidget( self.main_window )
+            pager_class.usepdf = pdfmode
+        else:
+            return False
         display_widget = pager_class.get_pager_widget()
-        self._stacks_widget[ f"{DbKeys.VALUE_PDF}_{'True'}"] = {
+        self._stacks_widget[ self._stack_name(name, pdfmode) ] = {
             UiMain.STACK_PAGER_CLASS: pager_class,
             UiMain.STACK_DISPLAY_WIDGET : display_widget
         }
         self.stacks.addWidget( display_widget  )
-
-        self.main_window.setCentralWidget(self.stacks)
-        self.show_pager( DbKeys.VALUE_PNG )
+        return True
 
     def _add_status_bar(self, main_window):
         self.statusbar = QStatusBar(main_window)
@@ -529,6 +533,7 @@ class UiMain():
         self.slider_page_position.setMinimum(1)
         self.slider_page_position.setOrientation(Qt.Horizontal)
         self.slider_page_position.setTracking(True)
+        self.slider_preview = UiSliderPreview(main_window)
 
         self.label_page_absolute = QLabel()
         self.label_page_absolute.setObjectName('pageAbsolute')
@@ -662,7 +667,9 @@ class UiMain():
 
     def show_pager( self , name:str , pdfmode:bool=True)->object:
         """ Select which pager in the stack we are using """
-        name = f"{name}" if name != DbKeys.VALUE_PDF else f"{DbKeys.VALUE_PDF}_{str(pdfmode)}"
+        name_pager, name = name, self._stack_name(name, pdfmode)
+        if name not in self._stacks_widget :
+            self._create_pager(name_pager, pdfmode)
         if name in self._stacks_widget :
             self._current_stack = name
             self.pager = self._stacks_widget[ name ][ UiMain.STACK_PAGER_CLASS]
@@ -671,7 +678,7 @@ class UiMain():
             self._stacks_widget[ name ][ UiMain.STACK_DISPLAY_WIDGET ].show()
         return self.pager
 
-    def page_widget(self)->PdfWidget|PxWidget:
+    def page_widget(self)->BottomSheet:
         """ Return the pager widget """
         return self.pager
 
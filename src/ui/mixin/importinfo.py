@@ -26,6 +26,7 @@ except ImportError:
 from qdb.fields.book import BookField
 from qdb.fields.bookproperty import BookPropertyField
 from qdb.fields.booksetting import BookSettingField
+from qdb.fields.pagegeometry import PageGeometryField
 from qdb.dbbook import DbBook
 from qdb.keys import DbKeys
 from ui.selectitems import SelectItems
@@ -139,15 +140,20 @@ class MixinPDFInfo:
         self.pdf_document.load(pdf_document)
 
     def _calculate_pdf_largest_size(self):
-        """ Figure out what is the largest page in pdf """
+        """ Figure out what is the largest page in pdf.
+            The size of each page is kept in self.page_sizes
+        """
         _width = 0
         _height = 0
 
+        self.page_sizes = []
         for page in range(self.pdf_document.pageCount()):
             pdf_point_size = self.pdf_document.pagePointSize(page)
             if pdf_point_size is not None:
                 _width = max(pdf_point_size.width(), _width)
                 _height = max(pdf_point_size.height(), _height)
+                self.page_sizes.append(
+                    (pdf_point_size.width(), pdf_point_size.height()))
         return _width, _height
 
     def get_info_from_pdf(self, sourcefile: str = None) -> dict:
@@ -183,6 +189,8 @@ class MixinPDFInfo:
                 pathlib.Path(sourcefile).stem).strip()
         pdf_info[BookSettingField.KEY_MAX_W], pdf_info[BookSettingField.KEY_MAX_H] = \
             self._calculate_pdf_largest_size()
+        if len(self.page_sizes) == self.pdf_document.pageCount():
+            pdf_info[PageGeometryField.KEY_PAGES] = self.page_sizes
 
         self.pdf_document.close()
         self.pdf_document = None
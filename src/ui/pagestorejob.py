@@ -0,0 +1,157 @@
+"""
+User Interface : Page store builder
+
+ Builds the page store (see util.pagestore) for a book in a
+ background thread. Pages are loaded (PNG) or rendered (PDF),
+ scaled to the display height and converted to greyscale.
+
+ This file is part of SheetMusic
+ Copyright: 2022,2023 by Chrles Gentry
+ You should have received a copy of the GNU General Public License
+ along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+ This file is part of Sheetmusic.
+
+"""
+
+import threading
+from contextlib import nullcontext
+
+from PySide6.QtCore import QObject, QRunnable, QSize, QThread, QThreadPool, Signal
+from PySide6.QtGui import QImage, Qt
+try:
+    from util.pdfregistry import PdfDocumentRegistry
+    PAGESTORE_HAS_QPDF_DOCUMENT = True
+except ImportError:
+    PAGESTORE_HAS_QPDF_DOCUMENT = False
+
+from qdb.log import DbLog
+from util.pageformat import PageFormat
+from util.pagestore import PageStore, PageStoreWriter
+
+
+class PageStoreSignals(QObject):
+    """ Signals used to report on the build """
+    progress = Signal(int, int)        # book id, pages done
+    finished = Signal(int, str, bool)  # book id, filename, success
+
+
+class PageStoreJob(QRunnable):
+    """ Build a page store for one book. This runs in a worker thread
+        so it must not touch any widgets.
+    """
+
+    def __init__(self, signals: PageStoreSignals,
+                 book_id: int,
+                 filename: str,
+                 sources: list,
+                 height: int,
+                 render_pdf: bool = False,
+                 image_format: QImage.Format = PageStore.FORMAT_GREY,
+                 digest: bytes | None = None):
+        super().__init__()
+        self.signals = signals
+        self.book_id = book_id
+        self.filename = filename
+        # The file for each page (see BookPagesJob): the book may be closed while we run
+        self.sources = sources
+        self.last_page = len(sources)
+        self.height = height
+        self.render_pdf = render_pdf
+        self.image_format = image_format
+        self.digest = digest
+        self.cancelled = threading.Event()
+        self.setAutoDelete(True)
+
+    def _document(self):
+        """ Borrow the PDF document for the whole build (None if not a PDF) """
+        if not self.render_pdf or not PAGESTORE_HAS_QPDF_DOCUMENT:
+            return nullcontext()
+        path = next((source for source in self.sources if source is not None), None)
+        return nullcontext() if path is None else PdfDocumentRegistry.worker_document(path)
+
+    def _page_image(self, page: int, document=None) -> QImage:
+        """ Load or render one page at the store height """
+        source = self.sources[page-1]
+        if source is None:
+            return QImage()
+        if self.render_pdf:
+            if document is None:
+                return QImage()
+            size = document.pagePointSize(page-1).toSize().scaled(
+                QSize(self.height * 4, self.height), Qt.KeepAspectRatio)
+            return document.render(page-1, size)
+        qimage = QImage(source)
+        if qimage.isNull() or qimage.height() <= self.height:
+            return qimage
+        return qimage.scaledToHeight(self.height, Qt.SmoothTransformation)
+
+    def _store_image(self, qimage: QImage) -> QImage:
+        """ Pages that can't be held in the store format (colour pages,
+            or grey pages in a 1 bit store) are left out. The pager
+            loads them from the book instead """
+        mode = PageFormat.MONO if self.image_format == PageStore.FORMAT_MONO else PageFormat.GREY
+        if qimage.isNull() or PageFormat.source_format(qimage, mode) != self.image_format:
+            return QImage()
+        return qimage
+
+    def run(self):
+        QThread.currentThread().setPriority(QThread.LowPriority)
+        try:
+            writer = PageStoreWriter(self.filename, self.last_page,
+                                     self.image_format, self.digest)
+        except OSError:
+            self.signals.finished.emit(self.book_id, self.filename, False)
+            return
+        with self._document() as document:
+            for page in range(1, self.last_page + 1):
+                if self.cancelled.is_set():
+                    writer.cancel()
+                    self.signals.finished.emit(self.book_id, self.filename, False)
+                    return
+                writer.add(self._store_image(self._page_image(page, document)))
+                self.signals.progress.emit(self.book_id, page)
+        self.signals.finished.emit(self.book_id, self.filename, writer.finish())
+
+
+class PageStoreBuilder(QObject):
+    """ Runs one page store build at a time, at low priority """
+
+    def __init__(self):
+        super().__init__()
+        self.signals = PageStoreSignals()
+        # (book id, cancel event) of the running build. The pool owns the job
+        self._building = None
+        self._pool = QThreadPool()
+        self._pool.setMaxThreadCount(1)
+        self.signals.finished.connect(self._finished)
+        self.logger = DbLog('PageStoreBuilder')
+
+    def _finished(self, book_id: int, filename: str, success: bool) -> None:
+        if self._building is not None and self._building[0] == book_id:
+            self._building = None
+        self.logger.info(f'Page store for book {book_id} {filename}: {success}')
+
+    def is_building(self, book_id: int | None = None) -> bool:
+        """ Return True if a build (for the book, if passed) is running """
+        return self._building is not None and \
+            (book_id is None or self._building[0] == book_id)
+
+    def build(self, job: PageStoreJob) -> bool:
+        """ Start a build unless one is running for the same book """
+        if self.is_building(job.book_id):
+            return False
+        self.cancel()
+        self._building = (job.book_id, job.cancelled)
+        self._pool.start(job)
+        return True
+
+    def cancel(self) -> None:
+        """ Stop the current build """
+        if self._building is not None:
+            self._building[1].set()
+            self._building = None
+
+    def wait(self, msecs: int = -1) -> bool:
+        """ Wait for the build to finish (used when shutting down) """
+        return self._pool.waitForDone(msecs)
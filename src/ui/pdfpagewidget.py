@@ -10,7 +10,10 @@ User Interface : PDF Dsiplay widgets
 
 """
 
+import os
+
 from PySide6.QtCore import QPoint,  QSize, Signal
+from PySide6.QtGui import QImage
 from PySide6.QtPdf import QPdfDocument
 from PySide6.QtPdfWidgets import QPdfView
 from PySide6.QtWidgets import QApplication
@@ -19,6 +22,9 @@ from qdb.log import DbLog
 from ui.mixin.pagedisplay import PageDisplayMixin
 from ui.interface.sheetmusicdisplay import ISheetMusicDisplayWidget
 from ui.label import LabelWidget
+from util.diskcache import PageDiskCache
+from util.latency import LatencyRecorder
+from util.pdfregistry import PdfDocumentRegistry
 
 
 class PdfView(PageDisplayMixin,QPdfView):
@@ -34,6 +40,11 @@ class PdfView(PageDisplayMixin,QPdfView):
         self.setAutoFillBackground(True)
         self.setStyleSheet('background-color: black')
 
+    def paintEvent(self, event) -> None:
+        """ Paint the page and end any page turn timing """
+        super().paintEvent(event)
+        LatencyRecorder.shared().painted()
+
     def navigate(self, page_number: int):
         """ Navigate to a specific page """
         if self.document() is not None:
@@ -52,17 +63,23 @@ class PdfLabel(LabelWidget):
     def __init__(self, name: str):
         super().__init__(name)
         self.pdf_document = None
+        self.source_path = None
         self.ratio = QApplication.primaryScreen().devicePixelRatio()
 
 
     def set_doc(self, *args):
         """ Set the current pdf document """
-        if len( args) < 1 or args[0] is not QPdfDocument:
+        if len( args) < 1 or not isinstance( args[0], QPdfDocument ):
             raise ValueError( 'Invalid argument for set_doc')
-        if args[0] != self.pdf_document:
+        if args[0] is not self.pdf_document:
             self.pdf_document = args[0]
             self.documentChanged.emit(args[0])
 
+    def setDocument(self, document: QPdfDocument):
+        """ Same call as QPdfView so either can be used by PdfPageWidget """
+        self.set_doc( document )
+
+    @LatencyRecorder.timed('navigate')
     def navigate(self, page_number: int)->bool:
         """ Navigate to a PDF page"""
         if self.pdf_document is not None:
@@ -73,12 +90,26 @@ class PdfLabel(LabelWidget):
             render_size = self.dimensions.equalisePage(
                                 self.pdf_document, page_number ) * ( self.ratio )
             self.set_pagenum( page_number )
-            img = self.pdf_document.render(page_number-1, render_size)
-            return self.set_content( img )
+            return self.set_source_image( self._render( page_number, render_size ) )
         return False
 
+    def _render(self, page_number: int, render_size: QSize) -> QImage:
+        """ Render a page, using the disk cache when we have one """
+        cache = PageDiskCache.shared()
+        if cache is not None and self.source_path:
+            img = cache.get_image( self.source_path, page_number, render_size )
+            if img is not None:
+                return img
+        img = self.pdf_document.render(page_number-1, render_size)
+        if cache is not None and self.source_path:
+            cache.put_image( self.source_path, page_number, render_size, img )
+        return img
+
     def close(self):
-        self.clear()
+        """ Clear the page and release the document and resident image """
+        super().close()
+        self.pdf_document = None
+        self.source_path = None
 
 
 class PdfPageWidget(PageDisplayMixin, ISheetMusicDisplayWidget):
@@ -99,7 +130,8 @@ class PdfPageWidget(PageDisplayMixin, ISheetMusicDisplayWidget):
         self._name = name
         self._use_pdf_viewer = usepdf
         self.logger = DbLog('PdfPageWidget')
-        self._current_pdf = QPdfDocument()
+        self._current_pdf = None
+        self._current_path = None
         self._create_viewer()
         self.clear()
 
@@ -147,12 +179,24 @@ class PdfPageWidget(PageDisplayMixin, ISheetMusicDisplayWidget):
         return self.widget().show()
 
     def clear(self) -> None:
-        """ Clear the widget and current PDF document """
+        """ Clear the widget and release the current PDF document """
         self.set_clear(True)
         if self._widget is not None:
             self._widget.close()
-        if self._current_pdf is not None:
-            self._current_pdf.close()
+        self._release_document()
+
+    def _is_current_path(self, path: str) -> bool:
+        """ Return True if we already hold the document for this file """
+        return self._current_path is not None and \
+            os.path.normpath(path) == os.path.normpath(self._current_path)
+
+    def _release_document(self) -> None:
+        """ Give up our reference to the shared document.
+            The last widget using it will close it. """
+        if self._current_path is not None:
+            PdfDocumentRegistry.release(self._current_path)
+        self._current_path = None
+        self._current_pdf = None
 
     def resize(self, wide: int | QSize, height: int = 0) -> None:
         """ Issue a resize either with a QSize or dimentsions"""
@@ -161,8 +205,17 @@ class PdfPageWidget(PageDisplayMixin, ISheetMusicDisplayWidget):
         else:
             if height > 0:
                 self.widget().resize(wide, height)
+        if self.rescale():
+            return True
         return self.widget().navigate( self.page_number() )
 
+    def rescale(self) -> bool:
+        """ Rescale the page from the rendered image held by the label.
+            The PDF viewer scales itself. """
+        if isinstance(self.widget(), PdfLabel):
+            return self.widget().rescale()
+        return True
+
     # -----------------------------------------------
     #      CONTENT METHODS
     #  -----------------------------------------------
@@ -217,35 +270,59 @@ class PdfPageWidget(PageDisplayMixin, ISheetMusicDisplayWidget):
 
         if isinstance(content, str):
             self.logger.debug(f'pdf is file {content}')
-            self._current_pdf = QPdfDocument()
-            err = self._current_pdf.load(content)
-
-            if err is not None and err != QPdfDocument.Error.None_:
-                msg = PdfPageWidget.pdf_error[
-                    err] if err in PdfPageWidget.pdf_error else '(Unknown)'
-                self.logger.error(
-                    f'Err loading document: {err}:{msg}')
-                return self.set_clear(False)
-        else:
+            if not self._is_current_path(content):
+                document, err = PdfDocumentRegistry.acquire(content)
+                if err is not None and err != QPdfDocument.Error.None_:
+                    msg = PdfPageWidget.pdf_error[
+                        err] if err in PdfPageWidget.pdf_error else '(Unknown)'
+                    self.logger.error(
+                        f'Err loading document: {err}:{msg}')
+                    return self.set_clear(False)
+                self._release_document()
+                self._current_pdf = document
+                self._current_path = content
+        elif content is not self._current_pdf:
             self.logger.debug(
                 f'pdf doc title is {content.metaData(QPdfDocument.MetaDataField.Title)}')
+            path = PdfDocumentRegistry.share(content)
+            self._release_document()
             self._current_pdf = content
+            self._current_path = path
 
         self.widget().dimensions = self.dimensions
+        if isinstance(self.widget(), PdfLabel):
+            self.widget().source_path = self._current_path
         self.widget().setDocument(self._current_pdf )
         return self.set_clear(True)
 
     def set_content_page(self,
-                         content: QPdfDocument | str,
-                         page_number: int = 1) -> bool:
+                         content: QPdfDocument | QImage | str,
+                         page_number: int = 1,
+                         source: QImage | None = None) -> bool:
         """ Pass in the PDF Document and page number to go to
             This is a convience function. You can also call 'setContent' then 'set_pagenum'
 
-            This loads the document and relies on the signal to set the page
+            This loads the document and relies on the signal to set the page.
+            If an image is passed, it is a page that has already been rendered
+            (prefetched) and will be displayed without rendering the PDF.
+            'source' is the image it was scaled from, if there is one.
         """
+        if isinstance(content, QImage):
+            return self._set_rendered_page(content, page_number, source)
         self.set_content(content)
         return self.widget().navigate( page_number )
 
+    def _set_rendered_page(self, qimage: QImage, page_number: int,
+                           source: QImage | None = None) -> bool:
+        """ Display a page image that has been rendered from the current document """
+        if not isinstance(self.widget(), PdfLabel):
+            return False
+        if self.widget().set_content(qimage, source):
+            self.widget().set_pagenum(page_number)
+            self.set_clear(False)
+            return True
+        return False
+
     def _pdfview_page(self, page: int) -> bool:
         return self.widget().navigate(page)
 
@@ -273,9 +350,22 @@ class PdfPageWidget(PageDisplayMixin, ISheetMusicDisplayWidget):
     def page_number(self)->int:
         return self.widget().page_number()
 
+    def image(self) -> QImage | None:
+        """ Return the rendered page image (None if using the PDF viewer) """
+        if isinstance(self.widget(), PdfLabel):
+            return self.widget().image()
+        return None
+
     def copy(self, source_object )->bool:
-        """ Copy moves the page number from one PDF view to this one """
+        """ Copy moves the page number from one PDF view to this one.
+            The document is shared and, if the source has a rendered
+            image, it is reused rather than rendering the page again """
+        page = source_object.page_number()
         if source_object.iscontent():
-            page = source_object.page_number()
-            self.set_content_page(source_object.content(), page )
+            self.set_content(source_object.content())
+        image = source_object.image()
+        resident = source_object.widget().resident() if image is not None else None
+        if image is None or not self._set_rendered_page(image, page, resident):
+            if source_object.iscontent():
+                self.set_content_page(source_object.content(), page )
         return not self.is_clear()
@@ -27,6 +27,7 @@ class PdfWidget( BottomSheet):
         It handles all the construction, layout, and page flipping
         functions.
     """
+    RENDER_PDF = True
 
     def __init__(self, main_window: QMainWindow):
         super().__init__( main_window , 'PdfWidget')
@@ -0,0 +1,90 @@
+"""
+User Interface : Performance
+
+ Show the page turn timings (see util.latency) and save them as CSV.
+
+ This file is part of SheetMusic
+ Copyright: 2022,2023 by Chrles Gentry
+ You should have received a copy of the GNU General Public License
+ along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+ This file is part of Sheetmusic.
+
+"""
+
+import os
+
+from PySide6.QtWidgets import (QDialog, QDialogButtonBox, QFileDialog, QHeaderView,
+                               QLabel, QMessageBox, QPushButton, QTableWidget,
+                               QTableWidgetItem, QVBoxLayout)
+
+from util.latency import LatencyRecorder
+
+
+class UiPerformance(QDialog):
+    """ Table of page turn timings (milliseconds) by span, book type and layout """
+    HEADERS = ['Span', 'Book type', 'Layout', 'Count',
+               'Mean', 'p50', 'p95', 'p99', 'Min', 'Max']
+
+    def __init__(self, recorder: LatencyRecorder | None = None):
+        super().__init__()
+        self.recorder = LatencyRecorder.shared() if recorder is None else recorder
+        self.setWindowTitle('Performance')
+        layout = QVBoxLayout()
+        layout.addWidget(QLabel(
+            "Page turn times in milliseconds. 'turn' is from the key press "
+            "until the page is shown."))
+        layout.addWidget(self.table())
+        layout.addWidget(self.buttonbox())
+        self.setLayout(layout)
+        self.resize(800, 400)
+        self.fill()
+
+    def table(self) -> QTableWidget:
+        """ Create the (read only) table of timings """
+        self.timings = QTableWidget(0, len(self.HEADERS))
+        self.timings.setHorizontalHeaderLabels(self.HEADERS)
+        self.timings.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.timings.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        return self.timings
+
+    def buttonbox(self) -> QDialogButtonBox:
+        """ Create a box and add all the buttons """
+        self.buttons = QDialogButtonBox()
+        self.btn_export = QPushButton('Export CSV...')
+        self.btn_reset = QPushButton('Reset')
+        self.buttons.addButton(self.btn_export, QDialogButtonBox.ActionRole)
+        self.buttons.addButton(self.btn_reset, QDialogButtonBox.ResetRole)
+        self.buttons.addButton(QDialogButtonBox.Close)
+        self.btn_export.clicked.connect(self.export)
+        self.btn_reset.clicked.connect(self.reset)
+        self.buttons.rejected.connect(self.reject)
+        return self.buttons
+
+    def fill(self) -> None:
+        """ Fill the table from the recorder """
+        rows = self.recorder.rows()
+        self.timings.setRowCount(len(rows))
+        for row, values in enumerate(rows):
+            for column, value in enumerate(values):
+                self.timings.setItem(row, column, QTableWidgetItem(str(value)))
+        self.btn_export.setEnabled(len(rows) > 0)
+
+    def reset(self) -> None:
+        """ Clear all the timings """
+        self.recorder.reset()
+        self.fill()
+
+    def export(self) -> None:
+        """ Ask for a file name and save the timings as CSV """
+        filename, _ = QFileDialog.getSaveFileName(
+            self, 'Export timings',
+            os.path.join(os.path.expanduser('~'), 'sheetmusic-timings.csv'),
+            'CSV files (*.csv)')
+        if not filename:
+            return
+        try:
+            self.recorder.write_csv(filename)
+        except OSError as err:
+            QMessageBox.critical(self, 'Export timings',
+                                 f'Could not save {filename}:\n{err}')
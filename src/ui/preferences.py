@@ -231,6 +231,11 @@ class UiPreferences(QDialog):
         self.gcmb_page_forward = None
         self.gcmb_previous_bookmark = None
         self.gcmb_recent_files = None
+        self.gcmb_page_cache = None
+        self.gcmb_page_disk_cache = None
+        self.gcmb_pdf_render_processes = None
+        self.gcmb_warm_books = None
+        self.gcmb_page_format = None
         self.cmb_res = None
         self.cmb_type = None
         self.gcmb_first_page_shown = None
@@ -358,6 +363,10 @@ class UiPreferences(QDialog):
                   "",
                   "Editor",
                   "Log Level",
+                  "Page cache (MB)",
+                  "Rendered PDF page cache (MB)",
+                  "PDF render processes",
+                  "Recent books kept open",
                   None]
         self.widget_file = QWidget()
         self.layout_file = QGridLayout()
@@ -373,7 +382,11 @@ class UiPreferences(QDialog):
                   "Page layout",
                   "Page controls",
                   None,
-                  None]
+                  None,
+                  None,
+                  None,
+                  None,
+                  "Page colours"]
         self.widget_book = QWidget()
         self.layout_book = QGridLayout()
         self._label_grid(self.layout_book, labels)
@@ -541,6 +554,66 @@ class UiPreferences(QDialog):
         self.change_list.add( UiTrackEntry(  self.gcmb_logging  ) )
         return row+1
 
+    def _format_page_cache(self, layout: QGridLayout, row: int) -> int:
+        """ How much memory to use for holding decoded pages """
+        values = [str(x) for x in DbKeys.VALUE_PAGE_CACHE_SIZES]
+        current = self.dilpref.get_value(
+            DbKeys.SETTING_PAGE_CACHE_SIZE, str(DbKeys.VALUE_PAGE_CACHE_SIZE))
+        self.gcmb_page_cache = UiGenericCombo(
+                isEditable=False,
+                fill=values,
+                current_value=current,
+                name=DbKeys.SETTING_PAGE_CACHE_SIZE
+            )
+        layout.addWidget(self.gcmb_page_cache, row, 1)
+        self.change_list.add( UiTrackEntry(  self.gcmb_page_cache  ) )
+        return row+1
+
+    def _format_page_disk_cache(self, layout: QGridLayout, row: int) -> int:
+        """ How much disk to use for holding rendered PDF pages (0 is off) """
+        values = [str(x) for x in DbKeys.VALUE_PAGE_DISK_CACHE_SIZES]
+        current = self.dilpref.get_value(
+            DbKeys.SETTING_PAGE_DISK_CACHE_SIZE, str(DbKeys.VALUE_PAGE_DISK_CACHE_SIZE))
+        self.gcmb_page_disk_cache = UiGenericCombo(
+                isEditable=False,
+                fill=values,
+                current_value=current,
+                name=DbKeys.SETTING_PAGE_DISK_CACHE_SIZE
+            )
+        layout.addWidget(self.gcmb_page_disk_cache, row, 1)
+        self.change_list.add( UiTrackEntry(  self.gcmb_page_disk_cache  ) )
+        return row+1
+
+    def _format_pdf_render_processes(self, layout: QGridLayout, row: int) -> int:
+        """ How many processes render PDF pages ahead (0 renders in the program) """
+        values = [str(x) for x in DbKeys.VALUE_PDF_RENDER_PROCESSES_LIST]
+        current = self.dilpref.get_value(
+            DbKeys.SETTING_PDF_RENDER_PROCESSES, str(DbKeys.VALUE_PDF_RENDER_PROCESSES))
+        self.gcmb_pdf_render_processes = UiGenericCombo(
+                isEditable=False,
+                fill=values,
+                current_value=current,
+                name=DbKeys.SETTING_PDF_RENDER_PROCESSES
+            )
+        layout.addWidget(self.gcmb_pdf_render_processes, row, 1)
+        self.change_list.add( UiTrackEntry(  self.gcmb_pdf_render_processes  ) )
+        return row+1
+
+    def _format_warm_books(self, layout: QGridLayout, row: int) -> int:
+        """ How many recently closed books are kept in memory (0 is off) """
+        values = [str(x) for x in DbKeys.VALUE_WARM_BOOKS_LIST]
+        current = self.dilpref.get_value(
+            DbKeys.SETTING_WARM_BOOKS, str(DbKeys.VALUE_WARM_BOOKS))
+        self.gcmb_warm_books = UiGenericCombo(
+                isEditable=False,
+                fill=values,
+                current_value=current,
+                name=DbKeys.SETTING_WARM_BOOKS
+            )
+        layout.addWidget(self.gcmb_warm_books, row, 1)
+        self.change_list.add( UiTrackEntry(  self.gcmb_warm_books  ) )
+        return row+1
+
     def _format_use_pdf(self, layout: QGridLayout, row: int) -> int:
         use_pdf = decode(
             code=DbKeys.ENCODE_BOOL,
@@ -686,6 +759,50 @@ class UiPreferences(QDialog):
         layout.addWidget(checkbox.widget, row, 1)
         return row+1
 
+    def _format_progressive_display(self, layout: QGridLayout, row: int) -> int:
+        checkbox = PreferenceCheckbox(
+            objname=DbKeys.SETTING_PROGRESSIVE_DISPLAY,
+            label="Show pages quickly, then sharpen them",
+            default=DbKeys.VALUE_PROGRESSIVE_DISPLAY)
+        checkbox.callback(self.change_list.addtrack )
+
+        layout.addWidget(checkbox.widget, row, 1)
+        return row+1
+
+    def _format_page_store(self, layout: QGridLayout, row: int) -> int:
+        checkbox = PreferenceCheckbox(
+            objname=DbKeys.SETTING_PAGE_STORE,
+            label="Build a page store for faster page turns",
+            default=DbKeys.VALUE_PAGE_STORE)
+        checkbox.callback(self.change_list.addtrack )
+
+        layout.addWidget(checkbox.widget, row, 1)
+        return row+1
+
+    def _format_slider_scrub(self, layout: QGridLayout, row: int) -> int:
+        checkbox = PreferenceCheckbox(
+            objname=DbKeys.SETTING_SLIDER_SCRUB,
+            label="Show pages while dragging the page slider",
+            default=DbKeys.VALUE_SLIDER_SCRUB)
+        checkbox.callback(self.change_list.addtrack )
+
+        layout.addWidget(checkbox.widget, row, 1)
+        return row+1
+
+    def _format_page_format(self, layout: QGridLayout, row: int) -> int:
+        """ Hold pages in colour, greyscale or black and white """
+        current = self.dilpref.get_value(
+            DbKeys.SETTING_PAGE_FORMAT, DbKeys.VALUE_PAGE_FORMAT)
+        self.gcmb_page_format = UiGenericCombo(
+                isEditable=False,
+                fill=DbKeys.VALUE_PAGE_FORMATS,
+                current_value=current,
+                name=DbKeys.SETTING_PAGE_FORMAT
+            )
+        layout.addWidget(self.gcmb_page_format, row, 1)
+        self.change_list.add( UiTrackEntry(  self.gcmb_page_format  ) )
+        return row+1
+
     def _format_layout(self, layout: QGridLayout, row: int) -> int:
         page_layout = self.dilpref.get_value(DbKeys.SETTING_PAGE_LAYOUT)
         self.layoutpg.setbutton( page_layout )
@@ -730,6 +847,10 @@ class UiPreferences(QDialog):
         row = self._format_show_filepath(self.layout_file, row)
         row = self._format_editor(self.layout_file, row)
         row = self._format_log_level(self.layout_file, row)
+        row = self._format_page_cache(self.layout_file, row)
+        row = self._format_page_disk_cache(self.layout_file, row)
+        row = self._format_pdf_render_processes(self.layout_file, row)
+        row = self._format_warm_books(self.layout_file, row)
         #
         row = self._format_filetype(self.layout_book, 0)
         row = self._format_save_config(self.layout_book, row)
@@ -738,6 +859,10 @@ class UiPreferences(QDialog):
         row = self._format_reopen_lastbook(self.layout_book, row)
         row = self._format_aspect_ratio(self.layout_book, row)
         row = self._format_smart_pages(self.layout_book, row)
+        row = self._format_progressive_display(self.layout_book, row)
+        row = self._format_page_store(self.layout_book, row)
+        row = self._format_slider_scrub(self.layout_book, row)
+        row = self._format_page_format(self.layout_book, row)
         row = self._format_use_pdf(self.layout_book, row)
         #
         row = self.format_script(self.layout_shellscript, 0)
@@ -0,0 +1,223 @@
+"""
+User Interface : Page prefetch (render-ahead)
+
+ Pages are decoded and scaled in a background thread pool before
+ they are needed. When a page is turned, the pager asks for the
+ finished image and only has to swap the pixmap in the label.
+ The source (or a mid-resolution copy) is returned with it so the
+ label can rescale the page after a resize without reading it again.
+
+ This file is part of SheetMusic
+ Copyright: 2022,2023 by Chrles Gentry
+ You should have received a copy of the GNU General Public License
+ along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+ This file is part of Sheetmusic.
+
+"""
+
+from PySide6.QtCore import QObject, QRunnable, QSize, QThreadPool, Signal
+from PySide6.QtGui import QImage, Qt
+try:
+    from util.pdfregistry import PdfDocumentRegistry
+    PREFETCH_HAS_QPDF_DOCUMENT = True
+except ImportError:
+    PREFETCH_HAS_QPDF_DOCUMENT = False
+
+from qdb.log import DbLog
+from ui.label import LabelWidget
+from util.diskcache import PageDiskCache
+from util.pageformat import PageFormat
+from util.pdfprocess import PdfRenderProcess
+
+
+class PrefetchSignals(QObject):
+    """ Signals used to return images from the worker threads """
+    finished = Signal(object, object, QImage, QImage)
+
+
+class PageRender(QRunnable):
+    """ Decode (PNG) or render (PDF) one page and scale it to the
+        final display size. This runs in a QThreadPool thread so it
+        must not touch any widgets.
+
+        The source may also be a page that is already decoded (from the
+        page store): it is only scaled. The source is returned too, no
+        larger than 'resident_size' (see LabelWidget.resident_copy). PDF
+        pages are rendered at the display size so the rendered page is
+        the source.
+    """
+
+    def __init__(self, signals: PrefetchSignals, generation: int, key: tuple,
+                 source: str | QImage, render_pdf: bool = False,
+                 page_format: str = PageFormat.COLOUR,
+                 resident_size: QSize | None = None):
+        super().__init__()
+        self.signals = signals
+        self.generation = generation
+        self.key = key
+        self.source = source
+        self.render_pdf = render_pdf
+        self.page_format = page_format
+        self.resident_size = resident_size
+        self.setAutoDelete(True)
+
+    @staticmethod
+    def scale_image(qimage: QImage, size: QSize, keep_aspect: bool) -> QImage:
+        """ Scale an image to the size (in device pixels) of the label """
+        if qimage.isNull():
+            return qimage
+        if keep_aspect:
+            return qimage.scaled(size,
+                                 aspectMode=Qt.KeepAspectRatio,
+                                 mode=Qt.SmoothTransformation)
+        return qimage.scaled(size)
+
+    def _render_pdf(self, page: int, size: QSize, keep_aspect: bool) -> QImage:
+        """ Render a PDF page directly at the final size """
+        if not PREFETCH_HAS_QPDF_DOCUMENT:
+            return QImage()
+        with PdfDocumentRegistry.worker_document(self.source) as document:
+            if document is None:
+                return QImage()
+            render_size = size
+            if keep_aspect:
+                render_size = document.pagePointSize(page-1).toSize().scaled(
+                    size, Qt.KeepAspectRatio)
+            cache = PageDiskCache.shared()
+            if cache is not None:
+                qimage = cache.get_image(self.source, page, render_size)
+                if qimage is not None:
+                    return qimage
+            processes = PdfRenderProcess.shared()
+            if processes is not None:
+                qimage = processes.render(self.source, page, render_size)
+            else:
+                qimage = document.render(page-1, render_size)
+        if cache is not None:
+            cache.put_image(self.source, page, render_size, qimage)
+        return qimage
+
+    def run(self):
+        _, page, width, height, ratio, keep_aspect = self.key
+        size = QSize(width, height) * ratio
+        if self.render_pdf and not isinstance(self.source, QImage):
+            qimage = PageFormat.display(self._render_pdf(page, size, keep_aspect),
+                                        self.page_format)
+            resident = None
+        else:
+            decoded = QImage(self.source)
+            qimage = PageFormat.display(self.scale_image(decoded, size, keep_aspect),
+                                        self.page_format)
+            if self.resident_size is not None and not decoded.isNull():
+                decoded = LabelWidget.resident_copy(decoded, self.resident_size)
+            resident = PageFormat.convert(decoded, self.page_format)
+        if not qimage.isNull():
+            qimage.setDevicePixelRatio(ratio)
+            # A PDF page is rendered at the display size: it is its own source.
+            # (Set after the ratio: changing a shared image copies it)
+            self.signals.finished.emit(self.generation, self.key, qimage,
+                                       qimage if resident is None else resident)
+
+
+class PagePrefetch(QObject):
+    """ Render-ahead engine for a pager (BottomSheet)
+
+        Pages are requested with the size they will be shown at. Results
+        are held until the page is displayed (take) or the book is closed.
+        Only a few pages are held: the ones just ahead of the reader.
+        Each is held with its source (see PageRender).
+        Keys are the same as the page cache keys (see PageCache.key)
+    """
+    DEFAULT_DEPTH = 3
+    # Greyscale pages are a quarter of the size so more can be held
+    GREY_DEPTH = 6
+    MAX_THREADS = 2
+
+    def __init__(self, render_pdf: bool = False, depth: int = DEFAULT_DEPTH):
+        super().__init__()
+        self.render_pdf = render_pdf
+        self.depth = depth
+        self.page_format = PageFormat.COLOUR
+        self._generation = 0
+        self._pending = set()
+        self._ready = {}
+        self._signals = PrefetchSignals()
+        self._signals.finished.connect(self._finished)
+        self._pool = QThreadPool()
+        self._pool.setMaxThreadCount(self.MAX_THREADS)
+        self.logger = DbLog('PagePrefetch')
+
+    def _finished(self, generation: int, key: tuple, qimage: QImage, source: QImage) -> None:
+        """ Called in the GUI thread when a worker has an image ready.
+            Results from before a cancel or clear are dropped: the key may
+            have been requested again since and that render is still pending """
+        if generation == self._generation:
+            self._pending.discard(key)
+            self._ready[key] = (qimage, source)
+
+    def set_page_format(self, page_format: str) -> None:
+        """ Set the page format (see PageFormat) and the depth to match """
+        if page_format != self.page_format:
+            self.clear()
+        self.page_format = page_format
+        self.depth = (self.DEFAULT_DEPTH if page_format == PageFormat.COLOUR
+                      else self.GREY_DEPTH)
+
+    def is_ready(self, key: tuple) -> bool:
+        """ Return True if the page has been rendered """
+        return key in self._ready
+
+    def _set_threads(self) -> None:
+        """ PDF render processes can work on several pages at once:
+            use a thread for each one to wait for the result """
+        threads = self.MAX_THREADS
+        processes = PdfRenderProcess.shared() if self.render_pdf else None
+        if processes is not None:
+            threads = max(threads, processes.processes)
+        if self._pool.maxThreadCount() != threads:
+            self._pool.setMaxThreadCount(threads)
+
+    def is_requested(self, key: tuple) -> bool:
+        """ Return True if the page is rendered or being rendered """
+        return key in self._ready or key in self._pending
+
+    def request(self, key: tuple, source: str | QImage) -> bool:
+        """ Queue a page for rendering if it isn't ready or in progress.
+            The source is a file, or a decoded image that is only scaled """
+        if source is None or self.is_requested(key):
+            return False
+        self._pending.add(key)
+        self._set_threads()
+        self._pool.start(PageRender(
+            self._signals, self._generation, key, source, self.render_pdf,
+            self.page_format, LabelWidget.resident_limit()))
+        return True
+
+    def take(self, key: tuple) -> tuple[QImage, QImage] | None:
+        """ Return the prefetched image and its source for the key
+            (or None) and release them """
+        return self._ready.pop(key, None)
+
+    def retain(self, pages: list[int]) -> None:
+        """ Drop any rendered images that are not for the pages listed """
+        for key in [key for key in self._ready if key[1] not in pages]:
+            del self._ready[key]
+
+    def cancel(self) -> None:
+        """ Stop renders that haven't started and ignore any still running.
+            Pages already rendered are kept """
+        self._generation += 1
+        self._pool.clear()
+        self._pending.clear()
+
+    def clear(self) -> None:
+        """ Drop all rendered pages. Any results still running are ignored """
+        self._generation += 1
+        self._pool.clear()
+        self._pending.clear()
+        self._ready.clear()
+
+    def wait(self, msecs: int = -1) -> bool:
+        """ Wait for all the workers to finish (used when shutting down) """
+        return self._pool.waitForDone(msecs)
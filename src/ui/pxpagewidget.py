@@ -67,26 +67,28 @@ class PxPageWidget( PageDisplayMixin , ISheetMusicDisplayWidget):
     def show(self)->None:
         return self.widget().show()
 
-    def set_content( self, content: str|QImage|QPixmap )->bool:
+    def set_content( self, content: str|QImage|QPixmap, source: QImage|None=None )->bool:
         """Set the label to either a pixmap or the contents of a file
 
         Args:
             content (str | QImage | QPixmap): Image
+            source (QImage, optional): Image 'content' was scaled from. Defaults to None.
 
         Returns:
             bool: True if display widget set
         """
-        rtn = self.widget().set_content( content )
+        rtn = self.widget().set_content( content, source )
         self.set_clear( not rtn )
         return rtn
 
-    def set_content_page(self, content: str|QImage|QPixmap, page_number: int) -> bool:
+    def set_content_page(self, content: str|QImage|QPixmap, page_number: int,
+                         source: QImage|None=None) -> bool:
         """
         Set the image for the label from a filename or a pixal map
 
         The file must exist or the load will fail. Check before calling
         """
-        rtn = self.set_content( content)
+        rtn = self.set_content( content, source )
         if rtn:
             self.set_pagenum(page_number)
         else:
@@ -94,6 +96,15 @@ class PxPageWidget( PageDisplayMixin , ISheetMusicDisplayWidget):
         self.widget().resize()
         return rtn
 
+    def rescale(self)->bool:
+        """ Rescale the page from the label's resident image.
+            False if the page has to be loaded again """
+        return self.widget().rescale()
+
+    def image(self)->QImage|None:
+        """ Return the scaled image shown by the label """
+        return self.widget().image()
+
     def content(self)->QPixmap:
         """ Return the widget's pixel map"""
         return self.widget().pixmap()
@@ -0,0 +1,227 @@
+"""
+User Interface : Page thumbnails and slider preview
+
+ Thumbnails are made when they are first asked for, by a small pool
+ of worker threads, and saved in the book's thumbnail index (see
+ util.thumbindex). While the page slider is dragged a small window
+ above the slider shows the thumbnail of the page it points to.
+
+ This file is part of SheetMusic
+ Copyright: 2022,2023 by Chrles Gentry
+ You should have received a copy of the GNU General Public License
+ along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+ This file is part of Sheetmusic.
+
+"""
+
+from typing import Callable
+
+from PySide6.QtCore import QObject, QPoint, QRunnable, QSize, QThread, QThreadPool, Signal
+from PySide6.QtGui import QImage, QImageReader, QPixmap, Qt
+from PySide6.QtWidgets import QLabel, QSlider, QStyle, QStyleOptionSlider
+try:
+    from util.pdfregistry import PdfDocumentRegistry
+    THUMBNAIL_HAS_QPDF_DOCUMENT = True
+except ImportError:
+    THUMBNAIL_HAS_QPDF_DOCUMENT = False
+
+from util.thumbindex import ThumbnailIndex
+
+
+class ThumbnailSignals(QObject):
+    """ Signals used to report a thumbnail is ready """
+    ready = Signal(int, int)     # generation, page
+    dropped = Signal(int, int)   # generation, page (request was stale)
+
+
+class ThumbnailJob(QRunnable):
+    """ Make the thumbnail for one page. This runs in a worker thread
+        so it must not touch any widgets.
+    """
+
+    def __init__(self, signals: ThumbnailSignals,
+                 generation: int,
+                 index: ThumbnailIndex,
+                 page: int,
+                 source: str | None,
+                 render_pdf: bool = False,
+                 is_stale: Callable[[int], bool] | None = None):
+        super().__init__()
+        self.signals = signals
+        self.generation = generation
+        self.index = index
+        self.page = page
+        self.source = source
+        self.render_pdf = render_pdf
+        self.is_stale = is_stale
+        self.setAutoDelete(True)
+
+    def _page_image(self) -> QImage:
+        """ Load or render the page at (about) the thumbnail size """
+        size = QSize(self.index.width, self.index.height)
+        if self.source is None:
+            return QImage()
+        if self.render_pdf:
+            if not THUMBNAIL_HAS_QPDF_DOCUMENT:
+                return QImage()
+            with PdfDocumentRegistry.worker_document(self.source) as document:
+                if document is None:
+                    return QImage()
+                return document.render(
+                    self.page-1,
+                    document.pagePointSize(self.page-1).toSize().scaled(size, Qt.KeepAspectRatio))
+        reader = QImageReader(self.source)
+        if reader.size().isValid():
+            reader.setScaledSize(reader.size().scaled(size, Qt.KeepAspectRatio))
+        return reader.read()
+
+    def run(self):
+        QThread.currentThread().setPriority(QThread.LowPriority)
+        if self.index.has(self.page):
+            return
+        if self.is_stale is not None and self.is_stale(self.page):
+            self.signals.dropped.emit(self.generation, self.page)
+            return
+        if self.index.put(self.page, self._page_image()):
+            self.signals.ready.emit(self.generation, self.page)
+
+
+class ThumbnailMaker(QObject):
+    """ Hold the thumbnail index for the open book and make
+        thumbnails as they are needed """
+    THREADS = 2
+    # Pages asked for by the preview are made before pages
+    # that are filled in the background
+    PRIORITY_REQUEST = 10
+    PRIORITY_FILL = 0
+
+    def __init__(self):
+        super().__init__()
+        self.signals = ThumbnailSignals()
+        self.index = ThumbnailIndex()
+        # Incremented for each book so old jobs are ignored
+        self._generation = 0
+        self._sources = []
+        self._render_pdf = False
+        self._queued = set()
+        self._filling = False
+        # Last page asked for. Requests for other pages are stale
+        self._latest = 0
+        self._pool = QThreadPool()
+        self._pool.setMaxThreadCount(self.THREADS)
+        self.signals.ready.connect(self._ready)
+        self.signals.dropped.connect(self._dropped)
+
+    def open_book(self, filename: str, sources: list,
+                  render_pdf: bool = False,
+                  digest: bytes | None = None) -> bool:
+        """ Open (or create) the thumbnail index for a book. Nothing is made yet.
+            'sources' is the file for each page (see BookPagesJob) """
+        self.close()
+        self._sources = list(sources)
+        self._render_pdf = render_pdf
+        return self.index.open(filename, len(self._sources), digest)
+
+    def close(self) -> None:
+        """ Stop making thumbnails and close the index """
+        self._generation += 1
+        self._pool.clear()
+        self._pool.waitForDone()
+        self._queued.clear()
+        self._filling = False
+        self._latest = 0
+        self._sources = []
+        self.index.close()
+
+    def _ready(self, generation: int, page: int) -> None:
+        if generation == self._generation:
+            self._queued.discard(page)
+
+    def _dropped(self, generation: int, page: int) -> None:
+        """ A stale request was skipped. If we are filling the
+            whole book it still has to be made """
+        if generation == self._generation:
+            self._queued.discard(page)
+            if self._filling:
+                self._queue(page, self.PRIORITY_FILL)
+
+    def _is_stale(self, page: int) -> bool:
+        """ Called by worker threads: the preview has moved on from the page """
+        return page != self._latest
+
+    def _queue(self, page: int, priority: int) -> None:
+        if page in self._queued or self.index.has(page) or not 0 < page <= len(self._sources):
+            return
+        self._queued.add(page)
+        self._pool.start(ThumbnailJob(self.signals, self._generation, self.index,
+                                      page, self._sources[page-1], self._render_pdf,
+                                      (self._is_stale if priority == self.PRIORITY_REQUEST
+                                       else None)),
+                         priority)
+
+    def thumbnail(self, page: int) -> QImage | None:
+        """ Return the thumbnail for a page. If it isn't made yet it is
+            queued and the ready signal is sent when it is done """
+        if not self.index.is_open():
+            return None
+        self._latest = page
+        qimage = self.index.image(page)
+        if qimage is None:
+            self._queue(page, self.PRIORITY_REQUEST)
+        return qimage
+
+    def fill(self, around: int = 1) -> None:
+        """ Queue every missing page, nearest to 'around' first """
+        if self._filling or not self.index.is_open():
+            return
+        self._filling = True
+        for page in sorted(self.index.missing(), key=lambda page: abs(page - around)):
+            self._queue(page, self.PRIORITY_FILL)
+
+    def generation(self) -> int:
+        """ Return the current book generation (used by ready signals) """
+        return self._generation
+
+
+class UiSliderPreview(QLabel):
+    """ Small window that shows a page thumbnail above a slider """
+    MARGIN = 6
+
+    def __init__(self, parent=None):
+        super().__init__(parent, Qt.ToolTip | Qt.FramelessWindowHint)
+        self.setAlignment(Qt.AlignCenter)
+        self.setStyleSheet('background: white; color: black; border: 1px solid gray')
+        self.page = 0
+        self.text = ''
+
+    def show_page(self, slider: QSlider, page: int, text: str, qimage: QImage | None) -> None:
+        """ Show the thumbnail (or just the text if there isn't one yet)
+            above the slider handle """
+        self.page = page
+        self.text = text
+        if qimage is None or qimage.isNull():
+            self.setPixmap(QPixmap())
+            self.setText(text)
+        else:
+            self.setPixmap(QPixmap.fromImage(qimage))
+        self.setToolTip(text)
+        self.adjustSize()
+        self.move(self._position(slider))
+        if not self.isVisible():
+            self.show()
+
+    def update_page(self, slider: QSlider, page: int, qimage: QImage | None) -> None:
+        """ A thumbnail has been made: show it if it is the page shown """
+        if self.isVisible() and page == self.page:
+            self.show_page(slider, page, self.text, qimage)
+
+    def _position(self, slider: QSlider) -> QPoint:
+        """ Return the global position so we are centered over the handle """
+        option = QStyleOptionSlider()
+        slider.initStyleOption(option)
+        handle = slider.style().subControlRect(
+            QStyle.CC_Slider, option, QStyle.SC_SliderHandle, slider)
+        point = slider.mapToGlobal(QPoint(handle.center().x(), 0))
+        return QPoint(point.x() - self.width() // 2,
+                      point.y() - self.height() - self.MARGIN)
@@ -0,0 +1,262 @@
+"""
+Utility: Rendered page disk cache
+
+ Pages rendered from PDF documents are saved in the library directory
+ so they don't have to be rendered again the next time the book is
+ opened. Entries are keyed by the source file (path, modified time and
+ size), the page and the render size. If the PDF changes, the key
+ changes and the old entries are eventually removed by eviction.
+
+ Each entry is one file:
+    header (see HEADER) + key digest + zlib compressed image data
+
+ This file is part of SheetMusic
+ Copyright: 2022,2023 by Chrles Gentry
+ You should have received a copy of the GNU General Public License
+ along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+ This file is part of Sheetmusic.
+
+"""
+
+import hashlib
+import os
+import struct
+import threading
+import zlib
+
+from PySide6.QtCore import QSize
+from PySide6.QtGui import QImage
+
+
+class PageDiskCache():
+    """ Size limited directory of rendered pages
+
+        This is safe to use from worker threads.
+    """
+    MAGIC = b'SMPC'
+    VERSION = 1
+    # magic, version, image format, width, height, bytes per line, data length, crc32
+    HEADER = struct.Struct('<4sHHIIIII')
+    DIGEST_SIZE = 20
+    EXTENSION = '.pgc'
+    COMPRESS_LEVEL = 1
+    MEGABYTE = 1024 * 1024
+    DEFAULT_SIZE_MB = 512
+    # When over the limit, remove entries until we are at this fraction
+    EVICT_TO = 0.9
+
+    _shared = None
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_SIZE_MB * MEGABYTE):
+        self.directory = directory
+        self.max_bytes = max(0, int(max_bytes))
+        self._lock = threading.Lock()
+        self._used = None
+
+    @staticmethod
+    def shared() -> 'PageDiskCache|None':
+        """ Return the cache used by the program (None if not set up) """
+        return PageDiskCache._shared
+
+    @staticmethod
+    def setup(directory: str | None, max_mb: int) -> 'PageDiskCache|None':
+        """ Create (or turn off, if max_mb is zero) the shared cache """
+        if directory is None or max_mb <= 0:
+            PageDiskCache._shared = None
+        elif PageDiskCache._shared is None or PageDiskCache._shared.directory != directory:
+            PageDiskCache._shared = PageDiskCache(directory, max_mb * PageDiskCache.MEGABYTE)
+        else:
+            PageDiskCache._shared.set_max_bytes(max_mb * PageDiskCache.MEGABYTE)
+        return PageDiskCache._shared
+
+    # -----------------------------------------------
+    #        KEY METHODS
+    # -----------------------------------------------
+
+    @staticmethod
+    def key(source: str, page: int, width: int, height: int) -> bytes | None:
+        """Create the key (digest) for a page of a source file.
+
+        The file's modified time and size are part of the key so
+        a changed file will never match older entries.
+
+        Returns:
+            bytes | None: Key or None if the source can't be found
+        """
+        try:
+            stat = os.stat(source)
+        except OSError:
+            return None
+        text = f'{os.path.abspath(source)}|{stat.st_mtime_ns}|{stat.st_size}|' \
+            f'{page}|{width}x{height}'
+        return hashlib.sha1(text.encode('utf-8')).digest()
+
+    def _filename(self, key: bytes) -> str:
+        name = key.hex()
+        return os.path.join(self.directory, name[0:2], name + self.EXTENSION)
+
+    # -----------------------------------------------
+    #        READ / WRITE
+    # -----------------------------------------------
+
+    def read(self, key: bytes) -> tuple[int, int, int, int, bytes] | None:
+        """Read an entry and validate it
+
+        Returns:
+            tuple | None: (image format, width, height, bytes per line, data)
+                or None if there isn't a valid entry
+        """
+        if key is None:
+            return None
+        filename = self._filename(key)
+        try:
+            with open(filename, 'rb') as entry:
+                header = entry.read(self.HEADER.size)
+                digest = entry.read(self.DIGEST_SIZE)
+                payload = entry.read()
+        except OSError:
+            return None
+        try:
+            magic, version, fmt, width, height, bpl, length, crc = \
+                self.HEADER.unpack(header)
+        except struct.error:
+            magic = None
+        if magic != self.MAGIC or version != self.VERSION or digest != key or \
+                length != len(payload) or crc != zlib.crc32(payload):
+            self._remove(filename)
+            return None
+        try:
+            data = zlib.decompress(payload)
+        except zlib.error:
+            self._remove(filename)
+            return None
+        if len(data) != bpl * height:
+            self._remove(filename)
+            return None
+        self._touch(filename)
+        return fmt, width, height, bpl, data
+
+    def write(self, key: bytes, fmt: int, width: int, height: int,
+              bytes_per_line: int, data: bytes) -> bool:
+        """ Save an entry and evict older entries if over the size limit """
+        if key is None or self.max_bytes == 0:
+            return False
+        payload = zlib.compress(bytes(data), self.COMPRESS_LEVEL)
+        header = self.HEADER.pack(self.MAGIC, self.VERSION, int(fmt), width, height,
+                                  bytes_per_line, len(payload), zlib.crc32(payload))
+        filename = self._filename(key)
+        temp_name = f'{filename}.{threading.get_ident()}.tmp'
+        try:
+            os.makedirs(os.path.dirname(filename), exist_ok=True)
+            old_size = self._size(filename)
+            with open(temp_name, 'wb') as entry:
+                entry.write(header)
+                entry.write(key)
+                entry.write(payload)
+            os.replace(temp_name, filename)
+        except OSError:
+            self._remove(temp_name)
+            return False
+        with self._lock:
+            if self._used is not None:
+                self._used += len(header) + len(key) + len(payload) - old_size
+        self.evict()
+        return True
+
+    def get_image(self, source: str, page: int, size: QSize) -> QImage | None:
+        """ Return the cached rendering of a page (or None) """
+        entry = self.read(self.key(source, page, size.width(), size.height()))
+        if entry is None:
+            return None
+        fmt, width, height, bpl, data = entry
+        # The QImage doesn't own 'data' so return a copy that does
+        return QImage(data, width, height, bpl, QImage.Format(fmt)).copy()
+
+    def put_image(self, source: str, page: int, size: QSize, qimage: QImage) -> bool:
+        """ Save the rendering of a page """
+        if qimage is None or qimage.isNull():
+            return False
+        return self.write(self.key(source, page, size.width(), size.height()),
+                          qimage.format().value,
+                          qimage.width(), qimage.height(),
+                          qimage.bytesPerLine(),
+                          qimage.constBits().tobytes())
+
+    # -----------------------------------------------
+    #        SIZE MANAGEMENT
+    # -----------------------------------------------
+
+    def set_max_bytes(self, max_bytes: int) -> None:
+        """ Change the size limit and evict if needed """
+        self.max_bytes = max(0, int(max_bytes))
+        self.evict()
+
+    def _entries(self) -> list[tuple[float, int, str]]:
+        """ Return (last used, size, filename) for all entries """
+        entries = []
+        for root, _, files in os.walk(self.directory):
+            for name in files:
+                if name.endswith(self.EXTENSION):
+                    filename = os.path.join(root, name)
+                    try:
+                        stat = os.stat(filename)
+                    except OSError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, filename))
+        return entries
+
+    def used(self) -> int:
+        """ Return how many bytes are used by the cache """
+        with self._lock:
+            if self._used is None:
+                self._used = sum(entry[1] for entry in self._entries())
+            return self._used
+
+    def evict(self) -> int:
+        """ Remove the least recently used entries until we are under
+            the limit. Return the number of entries removed. """
+        if self.used() <= self.max_bytes:
+            return 0
+        removed = 0
+        with self._lock:
+            target = int(self.max_bytes * self.EVICT_TO)
+            entries = sorted(self._entries())
+            self._used = sum(entry[1] for entry in entries)
+            for _, size, filename in entries:
+                if self._used <= target:
+                    break
+                if self._remove(filename):
+                    self._used -= size
+                    removed += 1
+        return removed
+
+    def clear(self) -> None:
+        """ Remove all entries """
+        with self._lock:
+            for _, _, filename in self._entries():
+                self._remove(filename)
+            self._used = 0
+
+    @staticmethod
+    def _size(filename: str) -> int:
+        try:
+            return os.path.getsize(filename)
+        except OSError:
+            return 0
+
+    @staticmethod
+    def _touch(filename: str) -> None:
+        """ Mark as recently used (modified time is used for eviction) """
+        try:
+            os.utime(filename)
+        except OSError:
+            pass
+
+    @staticmethod
+    def _remove(filename: str) -> bool:
+        try:
+            os.remove(filename)
+            return True
+        except OSError:
+            return False
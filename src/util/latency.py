@@ -0,0 +1,198 @@
+"""
+Utility: Page turn latency
+
+ Times how long page turns take. Each timing ('span') is added to a
+ histogram for the span name, the book type (pdf, png) and the page
+ layout, so the 50th, 95th and 99th percentiles can be shown in the
+ Help -> Performance dialog or saved as CSV.
+
+ Histograms use buckets that grow by BUCKET_GROWTH, so the memory
+ used is fixed no matter how many turns are timed, and percentiles
+ are within a few percent.
+
+ The 'turn' span runs from the key (or pedal) event until the next
+ page is painted.
+
+ This file is part of SheetMusic
+ Copyright: 2022,2023 by Chrles Gentry
+ You should have received a copy of the GNU General Public License
+ along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+ This file is part of Sheetmusic.
+
+"""
+
+import csv
+import functools
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+
+class LatencyHistogram():
+    """ Fixed size histogram of times, in milliseconds """
+    # Times below this all go in the first bucket
+    LOWEST_MS = 0.01
+    BUCKET_GROWTH = 1.05
+    BUCKETS = 400   # LOWEST_MS * 1.05^400 is about 50 minutes
+
+    def __init__(self):
+        self.counts = [0] * self.BUCKETS
+        self.count = 0
+        self.total = 0.0
+        self.minimum = None
+        self.maximum = None
+
+    @staticmethod
+    def bucket(msecs: float) -> int:
+        """ Return the bucket index for a time """
+        if msecs <= LatencyHistogram.LOWEST_MS:
+            return 0
+        index = int(math.log(msecs / LatencyHistogram.LOWEST_MS,
+                             LatencyHistogram.BUCKET_GROWTH)) + 1
+        return min(index, LatencyHistogram.BUCKETS - 1)
+
+    @staticmethod
+    def bucket_value(index: int) -> float:
+        """ Return the upper limit (ms) of a bucket """
+        return LatencyHistogram.LOWEST_MS * LatencyHistogram.BUCKET_GROWTH ** index
+
+    def add(self, msecs: float) -> None:
+        """ Add one time to the histogram """
+        self.counts[self.bucket(msecs)] += 1
+        self.count += 1
+        self.total += msecs
+        self.minimum = msecs if self.minimum is None else min(self.minimum, msecs)
+        self.maximum = msecs if self.maximum is None else max(self.maximum, msecs)
+
+    def mean(self) -> float:
+        """ Return the average time """
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, percent: float) -> float:
+        """ Return the time (ms) that 'percent' of the times are below """
+        if self.count == 0:
+            return 0.0
+        wanted = max(1, math.ceil(self.count * percent / 100))
+        seen = 0
+        for index, count in enumerate(self.counts):
+            seen += count
+            if seen >= wanted:
+                if index == self.BUCKETS - 1:
+                    return self.maximum
+                return min(self.bucket_value(index), self.maximum)
+        return self.maximum
+
+
+class LatencyRecorder():
+    """ Histograms of span times, by span, book type and layout.
+
+        This is safe to use from worker threads.
+    """
+    TURN = 'turn'
+    # A turn that hasn't been painted by now never will be (nothing changed)
+    TURN_TIMEOUT = 5.0
+    PERCENTILES = (50, 95, 99)
+    CSV_HEADER = ['span', 'book_type', 'layout', 'count',
+                  'mean_ms', 'p50_ms', 'p95_ms', 'p99_ms', 'min_ms', 'max_ms']
+
+    _shared = None
+
+    def __init__(self):
+        self.enabled = True
+        self.book_type = ''
+        self.layout = ''
+        self._histograms = {}
+        self._turn_start = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def shared() -> 'LatencyRecorder':
+        """ Return the recorder used by the program """
+        if LatencyRecorder._shared is None:
+            LatencyRecorder._shared = LatencyRecorder()
+        return LatencyRecorder._shared
+
+    @staticmethod
+    def timed(name: str):
+        """ Decorator: record the time a function (or method) takes """
+        def decorator(func):
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return func(*args, **kwargs)
+                finally:
+                    LatencyRecorder.shared().add(name, start)
+            return wrapper
+        return decorator
+
+    def set_context(self, book_type: str, layout: str) -> None:
+        """ Set the book type and layout that following spans are for """
+        self.book_type = book_type or ''
+        self.layout = layout or ''
+
+    @contextmanager
+    def span(self, name: str):
+        """ Record the time the 'with' block takes """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, start)
+
+    def add(self, name: str, start: float, end: float | None = None) -> None:
+        """ Add a span that started at 'start' (time.perf_counter) """
+        if not self.enabled:
+            return
+        msecs = ((time.perf_counter() if end is None else end) - start) * 1000
+        key = (name, self.book_type, self.layout)
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = LatencyHistogram()
+            histogram.add(msecs)
+
+    def start_turn(self) -> None:
+        """ A page turn was asked for. The span ends when a page is painted """
+        now = time.perf_counter()
+        if self._turn_start is None or now - self._turn_start > self.TURN_TIMEOUT:
+            self._turn_start = now
+
+    def painted(self) -> None:
+        """ A page was painted: end the page turn span if there is one """
+        if self._turn_start is not None:
+            start, self._turn_start = self._turn_start, None
+            self.add(self.TURN, start)
+
+    def cancel_turn(self) -> None:
+        """ The page turn didn't change anything (e.g. at the last page) """
+        self._turn_start = None
+
+    def reset(self) -> None:
+        """ Remove all the timings """
+        with self._lock:
+            self._histograms = {}
+        self._turn_start = None
+
+    def rows(self) -> list[list]:
+        """ Return a row for each histogram, in CSV_HEADER order, times in ms """
+        with self._lock:
+            items = sorted(self._histograms.items())
+        rows = []
+        for (name, book_type, layout), histogram in items:
+            rows.append([name, book_type, layout, histogram.count,
+                         round(histogram.mean(), 3)] +
+                        [round(histogram.percentile(p), 3) for p in self.PERCENTILES] +
+                        [round(histogram.minimum, 3), round(histogram.maximum, 3)])
+        return rows
+
+    def write_csv(self, filename: str) -> int:
+        """ Save the summary as CSV. Return the number of rows written """
+        rows = self.rows()
+        with open(filename, 'w', newline='', encoding='utf-8') as csvfile:
+            writer = csv.writer(csvfile)
+            writer.writerow(self.CSV_HEADER)
+            writer.writerows(rows)
+        return len(rows)
@@ -0,0 +1,221 @@
+"""
+Utility: Decoded page cache
+
+ Holds page images that have been decoded and scaled for display,
+ and the source each was scaled from if there is one (used to rescale
+ the page after a resize). The cache has a byte budget and drops the least recently used
+ pages when it goes over the budget. One cache is shared by all
+ of the pagers (PNG and PDF).
+
+ The source images kept by the page widgets ('resident') count against
+ the same budget. An image is counted once however many pages and
+ widgets hold it: QImage copies share their data.
+
+ This file is part of SheetMusic
+ Copyright: 2022,2023 by Chrles Gentry
+ You should have received a copy of the GNU General Public License
+ along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+ This file is part of Sheetmusic.
+
+"""
+
+from collections import OrderedDict
+from typing import Callable
+
+
+class PageCache():
+    """ LRU cache of page images with a memory (byte) budget
+
+        Keys are tuples of: (book id, page, width, height, pixel ratio, aspect).
+        Use PageCache.key to create them.
+    """
+    MEGABYTE = 1024 * 1024
+    DEFAULT_BUDGET_MB = 256
+    # Most of the budget that resident images may take (the rest is for pages)
+    RESIDENT_SHARE = 0.5
+
+    _shared = None
+
+    def __init__(self,
+                 budget: int = DEFAULT_BUDGET_MB * MEGABYTE,
+                 sizeof: Callable[[object], int] = None):
+        self._entries = OrderedDict()
+        self._budget = max(0, int(budget))
+        self._used = 0
+        self._images = {}
+        self._resident = {}
+        self._sizeof = sizeof if sizeof is not None else PageCache._image_size
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def shared() -> 'PageCache':
+        """ Return the cache shared by all pagers """
+        if PageCache._shared is None:
+            PageCache._shared = PageCache()
+        return PageCache._shared
+
+    @staticmethod
+    def _image_size(image) -> int:
+        """ Default sizing: QImage/QPixmap bytes (or zero if unknown) """
+        if hasattr(image, 'sizeInBytes'):
+            return int(image.sizeInBytes())
+        return 0
+
+    @staticmethod
+    def _image_id(image) -> int:
+        """ Identify the image data: QImage copies share the same cacheKey """
+        if hasattr(image, 'cacheKey'):
+            return image.cacheKey()
+        return id(image)
+
+    @staticmethod
+    def key(book_id: int, page: int, width: int, height: int,
+            ratio: float, keep_aspect: bool) -> tuple:
+        """ Create the key used to lookup a page in the cache """
+        return (book_id, page, width, height, float(ratio), bool(keep_aspect))
+
+    # -----------------------------------------------
+    #        BUDGET METHODS
+    # -----------------------------------------------
+
+    @property
+    def budget(self) -> int:
+        """ Maximum number of bytes held in the cache """
+        return self._budget
+
+    def set_budget(self, budget: int) -> None:
+        """ Set the maximum number of bytes and trim to fit """
+        self._budget = max(0, int(budget))
+        self._trim()
+
+    def set_budget_mb(self, budget_mb: int) -> None:
+        """ Set the maximum size in megabytes """
+        self.set_budget(int(budget_mb) * PageCache.MEGABYTE)
+
+    @property
+    def used(self) -> int:
+        """ Number of bytes currently held (cached pages and resident images) """
+        return self._used
+
+    @property
+    def resident(self) -> int:
+        """ Number of bytes held by page widgets (source images) """
+        sizes = {ident: self._images[ident][0] for _, ident in self._resident.values()}
+        return sum(sizes.values())
+
+    def set_resident(self, owner: int, image) -> bool:
+        """ Record the source image a page widget keeps in memory (None
+            to release it). These are not cached here but count
+            against the budget, so fewer cached pages are kept.
+
+            Returns False, and the image isn't recorded, if it would take
+            the resident images over RESIDENT_SHARE of the budget. The
+            widget shouldn't keep it.
+        """
+        held = self._resident.pop(owner, None)
+        if held is not None:
+            self._release(held[1])
+        accepted = True
+        if image is not None:
+            ident = PageCache._image_id(image)
+            resident = self.resident
+            if all(ident != other for _, other in self._resident.values()):
+                resident += self._sizeof(image)
+            accepted = resident <= self._budget * PageCache.RESIDENT_SHARE
+            if accepted:
+                self._resident[owner] = (image, self._hold(image))
+        self._trim()
+        return accepted
+
+    def _hold(self, image) -> int:
+        """ Count one more holder of the image and return its id """
+        ident = PageCache._image_id(image)
+        held = self._images.get(ident)
+        if held is None:
+            held = self._images[ident] = [self._sizeof(image), 0]
+            self._used += held[0]
+        held[1] += 1
+        return ident
+
+    def _release(self, ident: int) -> None:
+        """ Count one less holder of an image, and its bytes if it was the last """
+        held = self._images[ident]
+        held[1] -= 1
+        if held[1] == 0:
+            del self._images[ident]
+            self._used -= held[0]
+
+    def _trim(self) -> None:
+        """ Drop least recently used entries until we are under budget """
+        while self._used > self._budget and self._entries:
+            _, (_, _, idents) = self._entries.popitem(last=False)
+            for ident in idents:
+                self._release(ident)
+
+    # -----------------------------------------------
+    #        ACCESS METHODS
+    # -----------------------------------------------
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: tuple) -> bool:
+        return key in self._entries
+
+    def get(self, key: tuple):
+        """ Return the image for the key and mark it as recently used """
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return entry[0]
+
+    def peek(self, key: tuple):
+        """ Return the image for the key without marking it as used """
+        entry = self._entries.get(key)
+        return None if entry is None else entry[0]
+
+    def source(self, key: tuple):
+        """ Return the source held with the image for the key (or None) """
+        entry = self._entries.get(key)
+        return None if entry is None else entry[1]
+
+    def put(self, key: tuple, image, source=None) -> bool:
+        """ Add (or replace) an image, and the source it was scaled from.
+            The source counts against the budget (once, if it is also
+            held by a page widget). Entries larger than the whole budget
+            are not held.
+        """
+        if image is None:
+            return False
+        self.discard(key)
+        size = self._sizeof(image)
+        if source is not None and PageCache._image_id(source) != PageCache._image_id(image):
+            size += self._sizeof(source)
+        if size > self._budget:
+            return False
+        idents = (self._hold(image),) if source is None else (self._hold(image), self._hold(source))
+        self._entries[key] = (image, source, idents)
+        self._trim()
+        return key in self._entries
+
+    def discard(self, key: tuple) -> None:
+        """ Remove one entry if it is in the cache """
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            for ident in entry[2]:
+                self._release(ident)
+
+    def discard_book(self, book_id: int) -> None:
+        """ Remove all pages for a book (e.g. the book was refreshed) """
+        for key in [key for key in self._entries if key[0] == book_id]:
+            self.discard(key)
+
+    def clear(self) -> None:
+        """ Remove everything from the cache (resident images stay counted) """
+        for key in list(self._entries):
+            self.discard(key)
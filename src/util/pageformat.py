@@ -0,0 +1,118 @@
+"""
+Utility: Page image format
+
+ Sheet music is nearly always black on white. Pages can be held as
+ 8 bit greyscale (a quarter of the memory of 32 bit colour) or as
+ 1 bit black and white (1/32 of the memory). A page is checked first
+ so colour pages, and greyscale pages that are not black and white,
+ are kept in a format that shows them properly.
+
+ This file is part of SheetMusic
+ Copyright: 2022,2023 by Chrles Gentry
+ You should have received a copy of the GNU General Public License
+ along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+ This file is part of Sheetmusic.
+
+"""
+
+from PySide6.QtGui import QImage, Qt
+
+
+class PageFormat():
+    """ Convert page images to the display format chosen by the user """
+    COLOUR = 'colour'   # No conversion
+    GREY = 'grey'       # Greyscale (unless the page is in colour)
+    MONO = 'mono'       # 1 bit (unless the page is in colour or has grey shading)
+    MODES = [COLOUR, GREY, MONO]
+
+    # Pages are checked using a small sample of the image
+    SAMPLE_SIZE = 64
+    # Largest difference between red, green and blue that is still grey
+    GREY_TOLERANCE = 24
+    # Grey levels that count as 'black' or 'white' for a mono page
+    MONO_BLACK = 64
+    MONO_WHITE = 192
+    # Fraction of the page that must be black or white for a mono page
+    MONO_FRACTION = 0.97
+
+    GREY_FORMATS = (QImage.Format_Grayscale8, QImage.Format_Grayscale16,
+                    QImage.Format_Mono, QImage.Format_MonoLSB)
+
+    @staticmethod
+    def _sample(qimage: QImage, fmt: QImage.Format) -> bytes:
+        """ Return the pixels of a small copy of the image.
+            Fast scaling picks pixels so no new colours are made """
+        small = qimage.scaled(PageFormat.SAMPLE_SIZE, PageFormat.SAMPLE_SIZE,
+                              Qt.IgnoreAspectRatio, Qt.FastTransformation)
+        small = small.convertToFormat(fmt)
+        width = small.width() * (4 if fmt == QImage.Format_RGB32 else 1)
+        bpl = small.bytesPerLine()
+        data = small.constBits().tobytes()
+        return b''.join(data[row * bpl: row * bpl + width] for row in range(small.height()))
+
+    @staticmethod
+    def is_grey(qimage: QImage) -> bool:
+        """ Return True if the page has no colour """
+        if qimage.format() in PageFormat.GREY_FORMATS:
+            return True
+        data = PageFormat._sample(qimage, QImage.Format_RGB32)
+        for i in range(0, len(data), 4):
+            blue, green, red = data[i], data[i+1], data[i+2]
+            if max(red, green, blue) - min(red, green, blue) > PageFormat.GREY_TOLERANCE:
+                return False
+        return True
+
+    @staticmethod
+    def is_mono(qimage: QImage) -> bool:
+        """ Return True if the page is (nearly) all black and white """
+        if qimage.format() in (QImage.Format_Mono, QImage.Format_MonoLSB):
+            return True
+        data = PageFormat._sample(qimage, QImage.Format_Grayscale8)
+        if not data:
+            return False
+        extremes = sum(1 for grey in data
+                       if grey <= PageFormat.MONO_BLACK or grey >= PageFormat.MONO_WHITE)
+        return extremes >= len(data) * PageFormat.MONO_FRACTION
+
+    @staticmethod
+    def source_format(qimage: QImage, mode: str) -> QImage.Format | None:
+        """ Return the format a decoded page should be held in,
+            or None if it should not be converted """
+        if qimage is None or qimage.isNull() or mode not in (PageFormat.GREY, PageFormat.MONO):
+            return None
+        if not PageFormat.is_grey(qimage):
+            return None
+        if mode == PageFormat.MONO and PageFormat.is_mono(qimage):
+            return QImage.Format_Mono
+        return QImage.Format_Grayscale8
+
+    @staticmethod
+    def convert(qimage: QImage, mode: str) -> QImage:
+        """ Convert a decoded (unscaled) page for the mode """
+        fmt = PageFormat.source_format(qimage, mode)
+        if fmt is None or qimage.format() == fmt:
+            return qimage
+        if fmt == QImage.Format_Mono:
+            return qimage.convertToFormat(fmt, Qt.ThresholdDither)
+        return qimage.convertToFormat(fmt)
+
+    @staticmethod
+    def display(qimage: QImage, mode: str) -> QImage:
+        """ Convert a page already scaled to the display size. These are
+            held in greyscale in both GREY and MONO modes """
+        if mode == PageFormat.COLOUR:
+            return qimage
+        return PageFormat.convert(qimage, PageFormat.GREY)
+
+    @staticmethod
+    def scaled_format(qimage: QImage, source: QImage) -> QImage:
+        """ Keep a scaled page in the smallest format for its source.
+
+            Scaling a 1 bit page gives a colour image: it is kept in
+            greyscale as thin lines would be lost if it went back to 1 bit.
+        """
+        if source.format() in PageFormat.GREY_FORMATS and \
+                qimage.format() != QImage.Format_Grayscale8:
+            return qimage.convertToFormat(QImage.Format_Grayscale8)
+        return qimage
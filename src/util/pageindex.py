@@ -0,0 +1,146 @@
+"""
+Utility: Page indexes for the open book
+
+ The status bar and bookmark menu are updated on every page turn.
+ These indexes hold the bookmarks and the pages with notes for the
+ open book in memory so a page turn doesn't need the database. They are
+ loaded when the book is opened and changed whenever a bookmark or
+ note is added or deleted.
+
+ BookmarkIndex keeps bookmarks in page order; lookups use bisect.
+ NotePages is a bitmap with one bit for each page (page 0 is the
+ note for the whole book).
+
+ This file is part of SheetMusic
+ Copyright: 2022,2023 by Chrles Gentry
+ You should have received a copy of the GNU General Public License
+ along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+ This file is part of Sheetmusic.
+
+"""
+
+from bisect import bisect_right
+from typing import Iterable, Mapping
+
+from qdb.fields.bookmark import BookmarkField
+
+
+class BookmarkIndex():
+    """ Bookmarks for one book, in page order """
+
+    def __init__(self, bookmarks: Iterable[Mapping] = ()):
+        self._pages = []
+        self._bookmarks = []
+        self.load(bookmarks)
+
+    def load(self, bookmarks: Iterable[Mapping]) -> None:
+        """ Replace the index with 'bookmarks' (any order) """
+        marks = sorted((dict(bookmark) for bookmark in bookmarks
+                        if bookmark and bookmark.get(BookmarkField.PAGE) is not None),
+                       key=lambda bookmark: bookmark[BookmarkField.PAGE])
+        self._bookmarks = marks
+        self._pages = [bookmark[BookmarkField.PAGE] for bookmark in marks]
+
+    def clear(self) -> None:
+        """ Remove all the bookmarks """
+        self._pages = []
+        self._bookmarks = []
+
+    def __len__(self) -> int:
+        return len(self._pages)
+
+    def _bookmark(self, index: int) -> dict | None:
+        if 0 <= index < len(self._bookmarks):
+            return dict(self._bookmarks[index])
+        return None
+
+    def _index_for_page(self, page: int) -> int:
+        """ Index of the bookmark 'page' is in (-1 if it is before the first) """
+        return bisect_right(self._pages, page) - 1
+
+    def all(self) -> list[dict]:
+        """ Return all the bookmarks in page order """
+        return [dict(bookmark) for bookmark in self._bookmarks]
+
+    def first(self) -> dict | None:
+        """ Return the bookmark with the lowest page """
+        return self._bookmark(0)
+
+    def last(self) -> dict | None:
+        """ Return the bookmark with the highest page """
+        return self._bookmark(len(self._bookmarks) - 1)
+
+    def for_page(self, page: int | None) -> dict | None:
+        """ Return the bookmark 'page' is in (the last one on or before it) """
+        if page is None:
+            return None
+        return self._bookmark(self._index_for_page(page))
+
+    def next(self, page: int | None) -> dict | None:
+        """ Return the first bookmark after 'page' """
+        if page is None:
+            return None
+        return self._bookmark(bisect_right(self._pages, page))
+
+    def previous(self, page: int | None) -> dict | None:
+        """ Return the bookmark before the one 'page' is in """
+        if page is None:
+            return None
+        index = self._index_for_page(page)
+        return self._bookmark(index - 1) if index > 0 else None
+
+    def is_first(self, bookmark: Mapping) -> bool:
+        """ True if there is no bookmark before this one """
+        return self.previous(bookmark[BookmarkField.PAGE]) is None
+
+    def is_last(self, bookmark: Mapping) -> bool:
+        """ True if there is no bookmark after this one """
+        return self.next(bookmark[BookmarkField.PAGE]) is None
+
+
+class NotePages():
+    """ Bitmap of the pages that have notes. Page 0 is the book note """
+
+    def __init__(self, pages: Iterable[int] = ()):
+        self._bits = bytearray()
+        self._count = 0
+        self.load(pages)
+
+    def load(self, pages: Iterable[int]) -> None:
+        """ Replace the bitmap with 'pages' """
+        self.clear()
+        for page in pages:
+            self.set(page)
+
+    def set(self, page: int, has_note: bool = True) -> None:
+        """ Mark (or unmark) a page as having a note """
+        if page is None or page < 0:
+            return
+        byte, bit = divmod(page, 8)
+        if byte >= len(self._bits):
+            if not has_note:
+                return
+            self._bits.extend(bytes(byte - len(self._bits) + 1))
+        mask = 1 << bit
+        if has_note and not self._bits[byte] & mask:
+            self._bits[byte] |= mask
+            self._count += 1
+        elif not has_note and self._bits[byte] & mask:
+            self._bits[byte] &= ~mask
+            self._count -= 1
+
+    def clear(self) -> None:
+        """ Remove all the pages """
+        self._bits = bytearray()
+        self._count = 0
+
+    def has(self, page: int) -> bool:
+        """ True if the page has a note """
+        if page is None or page < 0:
+            return False
+        byte, bit = divmod(page, 8)
+        return byte < len(self._bits) and bool(self._bits[byte] & (1 << bit))
+
+    def __len__(self) -> int:
+        return self._count
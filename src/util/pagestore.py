@@ -0,0 +1,250 @@
+"""
+Utility: Raw page store
+
+ A page store is one file that holds every page of a book already
+ decoded, scaled and converted to greyscale (or 1 bit). The file is
+ memory mapped and each page is wrapped as a QImage without copying,
+ so turning a page doesn't need a PNG decode or PDF render.
+
+ File layout:
+    HEADER
+    INDEX (one entry per page, page 1 first)
+    page data (each page starts on an ALIGN byte boundary)
+
+ An index entry with an offset of zero means the page isn't stored.
+ The header holds a digest of the source (see source_digest) so a
+ store for a book that has changed will not be used.
+
+ This file is part of SheetMusic
+ Copyright: 2022,2023 by Chrles Gentry
+ You should have received a copy of the GNU General Public License
+ along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+ This file is part of Sheetmusic.
+
+"""
+
+import hashlib
+import mmap
+import os
+import struct
+
+from PySide6.QtGui import QImage, Qt
+
+
+class PageStore():
+    """ Read only, memory mapped, page store for one book """
+    MAGIC = b'SMPS'
+    VERSION = 1
+    # magic, version, image format, page count, source digest
+    HEADER = struct.Struct('<4sHHI20s')
+    # offset, width, height, bytes per line
+    INDEX = struct.Struct('<QIII')
+    ALIGN = 16
+    EXTENSION = '.sps'
+
+    FORMAT_GREY = QImage.Format_Grayscale8
+    FORMAT_MONO = QImage.Format_Mono
+    FORMATS = (FORMAT_GREY, FORMAT_MONO)
+
+    def __init__(self):
+        self.filename = None
+        self.image_format = None
+        self._file = None
+        self._map = None
+        self._index = []
+
+    @staticmethod
+    def filename_for_book(directory: str, book_id: int) -> str:
+        """ Return the name of the page store file for a book """
+        return os.path.join(directory, f'{book_id}{PageStore.EXTENSION}')
+
+    @staticmethod
+    def source_digest(source: str) -> bytes | None:
+        """Return a digest of the source (a PDF or a directory of pages)
+
+        The names, sizes and modified times of the files are used, so
+        if any page is changed the digest will change.
+
+        Returns:
+            bytes | None: Digest or None if the source can't be found
+        """
+        if source is None:
+            return None
+        sha = hashlib.sha1(os.path.abspath(source).encode('utf-8'))
+        try:
+            if os.path.isdir(source):
+                for entry in sorted(os.scandir(source), key=lambda entry: entry.name):
+                    if entry.is_file() and not entry.name.endswith(PageStore.EXTENSION):
+                        stat = entry.stat()
+                        sha.update(f'|{entry.name}|{stat.st_mtime_ns}|{stat.st_size}'.encode(
+                            'utf-8'))
+            else:
+                stat = os.stat(source)
+                sha.update(f'|{stat.st_mtime_ns}|{stat.st_size}'.encode('utf-8'))
+        except OSError:
+            return None
+        return sha.digest()
+
+    # -----------------------------------------------
+    #        OPEN / CLOSE
+    # -----------------------------------------------
+
+    def open(self, filename: str, digest: bytes | None = None) -> bool:
+        """Open and validate a page store
+
+        Args:
+            filename (str): Page store file
+            digest (bytes | None, optional): If passed, it must match
+                the digest saved when the store was created.
+
+        Returns:
+            bool: True if the store can be used
+        """
+        self.close()
+        try:
+            self._file = open(filename, 'rb')
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            self.close()
+            return False
+        if not self._read_index(digest):
+            self.close()
+            return False
+        self.filename = filename
+        return True
+
+    def _read_index(self, digest: bytes | None) -> bool:
+        """ Read the header and index and check they are valid """
+        size = len(self._map)
+        if size < self.HEADER.size:
+            return False
+        magic, version, fmt, count, source = self.HEADER.unpack_from(self._map, 0)
+        if magic != self.MAGIC or version != self.VERSION or \
+                fmt not in [f.value for f in self.FORMATS]:
+            return False
+        if digest is not None and digest != source:
+            return False
+        if self.HEADER.size + count * self.INDEX.size > size:
+            return False
+        self.image_format = QImage.Format(fmt)
+        self._index = []
+        for page in range(count):
+            entry = self.INDEX.unpack_from(
+                self._map, self.HEADER.size + page * self.INDEX.size)
+            offset, _, height, bpl = entry
+            if offset + height * bpl > size:
+                return False
+            self._index.append(entry)
+        return True
+
+    def close(self) -> None:
+        """ Close the store. Images already handed out keep the map
+            alive until they are deleted """
+        if self._map is not None:
+            try:
+                self._map.close()
+            except BufferError:
+                pass
+        if self._file is not None:
+            self._file.close()
+        self._map = None
+        self._file = None
+        self._index = []
+        self.filename = None
+        self.image_format = None
+
+    # -----------------------------------------------
+    #        ACCESS
+    # -----------------------------------------------
+
+    def is_open(self) -> bool:
+        """ Return True if a store is open """
+        return self._map is not None
+
+    def page_count(self) -> int:
+        """ Return the number of pages in the index """
+        return len(self._index)
+
+    def has_page(self, page: int) -> bool:
+        """ Return True if the page (1 to n) is in the store """
+        return 0 < page <= len(self._index) and self._index[page-1][0] > 0
+
+    def image(self, page: int) -> QImage | None:
+        """ Return the page (1 to n) as a QImage that points into the
+            memory map (no copy is made) or None if it isn't stored """
+        if not self.has_page(page):
+            return None
+        offset, width, height, bpl = self._index[page-1]
+        data = memoryview(self._map)[offset:offset + height * bpl]
+        return QImage(data, width, height, bpl, self.image_format)
+
+
+class PageStoreWriter():
+    """ Create a page store. Pages are added in order (page 1 first).
+        The file is written to a temporary name and only replaces
+        the store when finish is called.
+    """
+
+    def __init__(self, filename: str, count: int,
+                 image_format: QImage.Format = PageStore.FORMAT_GREY,
+                 digest: bytes | None = None):
+        if image_format not in PageStore.FORMATS:
+            raise ValueError(f'Invalid page store format: {image_format}')
+        self.filename = filename
+        self.count = count
+        self.image_format = image_format
+        self.digest = (digest or b'').ljust(20, b'\0')[0:20]
+        self._temp_name = f'{filename}.tmp'
+        self._index = [(0, 0, 0, 0)] * count
+        self._page = 0
+        os.makedirs(os.path.dirname(filename) or '.', exist_ok=True)
+        self._file = open(self._temp_name, 'wb')
+        self._file.write(b'\0' * (PageStore.HEADER.size + count * PageStore.INDEX.size))
+
+    def _align(self) -> int:
+        """ Pad the file so the next page starts on an ALIGN boundary """
+        offset = self._file.tell()
+        padding = -offset % PageStore.ALIGN
+        if padding:
+            self._file.write(b'\0' * padding)
+        return offset + padding
+
+    def add(self, qimage: QImage | None) -> bool:
+        """ Add the next page. A null image leaves the page empty """
+        if self._page >= self.count:
+            raise IndexError('Too many pages for page store')
+        page = self._page
+        self._page += 1
+        if qimage is None or qimage.isNull():
+            return False
+        if qimage.format() != self.image_format:
+            qimage = qimage.convertToFormat(self.image_format, Qt.ThresholdDither)
+        offset = self._align()
+        self._file.write(qimage.constBits().tobytes())
+        self._index[page] = (offset, qimage.width(), qimage.height(), qimage.bytesPerLine())
+        return True
+
+    def finish(self) -> bool:
+        """ Write the index and replace any existing store """
+        try:
+            self._file.seek(0)
+            self._file.write(PageStore.HEADER.pack(
+                PageStore.MAGIC, PageStore.VERSION,
+                self.image_format.value, self.count, self.digest))
+            for entry in self._index:
+                self._file.write(PageStore.INDEX.pack(*entry))
+            self._file.close()
+            os.replace(self._temp_name, self.filename)
+        except OSError:
+            self.cancel()
+            return False
+        return True
+
+    def cancel(self) -> None:
+        """ Stop writing and remove the temporary file """
+        self._file.close()
+        try:
+            os.remove(self._temp_name)
+        except OSError:
+            pass
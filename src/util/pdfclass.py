@@ -21,7 +21,7 @@
 
 from PySide6.QtCore import QSizeF, QSize
 from PySide6.QtPdf import QPdfDocument
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 
 @dataclass
@@ -32,21 +32,60 @@ class PdfDimensions:
     heightPortrait: float = 0.0
     heightLandscape: float = 0.0
     _dimensionsSet : bool = False
+    # Size of each page (index 0 is page 1). Not saved with the settings
+    _pageSizes : list = field(default=None, repr=False, compare=False)
 
+    def __getstate__(self):
+        """ Page sizes are kept in the PageGeometry table, not pickled """
+        state = self.__dict__.copy()
+        state.pop('_pageSizes', None)
+        return state
 
-    def isPortrait(self, dimensions: QSizeF) -> bool:
-        """ Return True if width < height (portrait) """
-        return dimensions.width() < dimensions.height()
+    @staticmethod
+    def documentSizes( document: QPdfDocument ) -> list:
+        """ Return (width, height) for every page in the document """
+        sizes = []
+        for page in range( document.pageCount() ):
+            size = document.pagePointSize(page)
+            sizes.append( (size.width(), size.height()) )
+        return sizes
 
-    def checkSizeDocument( self, document: QPdfDocument ):
-        """ Scan the entire document and find maximum sizes """
+    def setPageSizes( self, sizes: list ):
+        """ Set the size of every page, (width, height) or QSizeF,
+            and find the maximum sizes from them """
         self.widthLandscape = 0.0
         self.widthPortrait = 0.0
         self.heightLandscape = 0.0
         self.heightPortrait = 0.0
         self.isSet = False
-        for page in range( document.pageCount() ):
-            self.checkSizePage( document , page )
+        self._pageSizes = [ size if isinstance( size, QSizeF ) else QSizeF( *size )
+                                for size in sizes ]
+        for size in self._pageSizes:
+            self.checkSize( size )
+
+    @property
+    def hasPageSizes(self) -> bool:
+        """ Do we know the size of each page? """
+        return bool( self._pageSizes )
+
+    @property
+    def pageSizes(self) -> list:
+        """ Return (width, height) for each page """
+        return [ (size.width(), size.height()) for size in (self._pageSizes or []) ]
+
+    def pageSize(self, page: int) -> QSizeF | None:
+        """ Return the size for a page (0 is the first page) or None if unknown """
+        if self._pageSizes and 0 <= page < len( self._pageSizes ):
+            return self._pageSizes[page]
+        return None
+
+    def isPortrait(self, dimensions: QSizeF) -> bool:
+        """ Return True if width < height (portrait) """
+        return dimensions.width() < dimensions.height()
+
+    def checkSizeDocument( self, document: QPdfDocument ):
+        """ Scan the entire document and find maximum sizes """
+        self.setPageSizes( self.documentSizes( document ) )
 
     @property
     def isSet(self)->bool:
@@ -80,7 +119,10 @@ class PdfDimensions:
         """
         if not self.isSet :
             self.checkSizeDocument( document )
-        return self.equalise( document.pagePointSize(page-offset) )
+        size = self.pageSize( page-offset )
+        if size is None:
+            size = document.pagePointSize(page-offset)
+        return self.equalise( size )
 
     def equalise(self, dimensions: QSizeF) -> QSize:
         """ Return a size that matches the maximum value for the document """
@@ -12,6 +12,7 @@
 import pathlib
 from PySide6.QtPdf import QPdfDocument
 from qdb.fields.booksetting import BookSettingField
+from qdb.fields.pagegeometry import PageGeometryField
 from qdb.dbbook import BookField
 from util.pdfclass import PdfDimensions
 
@@ -44,8 +45,7 @@ class PdfInfo:
             self.pdfclass = PdfDimensions()
 
     def _calculate_pdf_largest_size(self):
-        for page in range(self.pdf_document.pageCount()):
-            self.pdfclass.checkSize( self.pdf_document.pagePointSize(page) )
+        self.pdfclass.checkSizeDocument( self.pdf_document )
 
     def get_info_from_pdf(self, sourcefile:str)->dict:
         """Get information from the sourcefile name passed
@@ -74,4 +74,5 @@ class PdfInfo:
 
         self._calculate_pdf_largest_size( )
         pdf_info[ BookSettingField.KEY_DIMENSIONS ] = self.pdfclass
+        pdf_info[ PageGeometryField.KEY_PAGES ] = self.pdfclass.pageSizes
         return pdf_info
@@ -0,0 +1,236 @@
+"""
+Utility: PDF render processes
+
+ PDF pages can be rendered in worker processes so rendering doesn't
+ compete with the user interface for the interpreter lock. Each worker
+ holds its own QPdfDocument and takes (page, size) requests from a
+ queue. The page is written into a shared memory buffer that belongs
+ to the request; the main process only copies it into a QImage.
+
+ render() blocks until the page is ready, so it is called from the
+ prefetch worker threads and never from the GUI thread.
+
+ This file is part of SheetMusic
+ Copyright: 2022,2023 by Chrles Gentry
+ You should have received a copy of the GNU General Public License
+ along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+ This file is part of Sheetmusic.
+
+"""
+
+import itertools
+import multiprocessing
+import queue
+import threading
+from concurrent.futures import Future, TimeoutError as FutureTimeout
+from multiprocessing import shared_memory
+
+from PySide6.QtCore import QSize
+from PySide6.QtGui import QImage
+
+
+def _render_worker(requests, results) -> None:
+    """ Worker process: render pages until a None request is received.
+
+        Requests are (id, path, page, width, height, buffer name)
+        Results are (id, success, width, height, bytes per line)
+    """
+    # pylint: disable=import-outside-toplevel
+    from PySide6.QtPdf import QPdfDocument
+    document = QPdfDocument()
+    current = None
+    while True:
+        request = requests.get()
+        if request is None:
+            break
+        request_id, path, page, width, height, name = request
+        try:
+            if path != current:
+                document.close()
+                current = None
+                if document.load(path) != QPdfDocument.Error.None_:
+                    raise OSError(f'Could not load {path}')
+                current = path
+            qimage = document.render(page-1, QSize(width, height))
+            if qimage.isNull():
+                raise ValueError(f'Could not render page {page}')
+            qimage = qimage.convertToFormat(PdfRenderProcess.IMAGE_FORMAT)
+            data = qimage.constBits().tobytes()
+            buffer = shared_memory.SharedMemory(name=name)
+            try:
+                buffer.buf[0:len(data)] = data
+            finally:
+                buffer.close()
+            results.put((request_id, True, qimage.width(), qimage.height(),
+                         qimage.bytesPerLine()))
+        except (OSError, ValueError):
+            results.put((request_id, False, 0, 0, 0))
+    document.close()
+
+
+class PdfRenderProcess():
+    """ Pool of PDF render processes. This is safe to use from worker threads """
+    IMAGE_FORMAT = QImage.Format_ARGB32_Premultiplied
+    BYTES_PER_PIXEL = 4
+    MAX_PROCESSES = 8
+    # Seconds to wait for one page before giving up
+    TIMEOUT = 30
+
+    _shared = None
+
+    def __init__(self, processes: int):
+        self.processes = max(1, min(int(processes), self.MAX_PROCESSES))
+        self._context = multiprocessing.get_context('spawn')
+        self._requests = None
+        self._results = None
+        self._workers = []
+        self._dispatcher = None
+        self._waiting = {}
+        self._buffers = []
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def shared() -> 'PdfRenderProcess|None':
+        """ Return the render processes used by the program (None if not set up) """
+        return PdfRenderProcess._shared
+
+    @staticmethod
+    def setup(processes: int) -> 'PdfRenderProcess|None':
+        """ Create (or stop, if processes is zero) the shared render processes """
+        current = PdfRenderProcess._shared
+        if current is not None and (processes <= 0 or current.processes != processes):
+            current.close()
+            PdfRenderProcess._shared = None
+        if processes > 0 and PdfRenderProcess._shared is None:
+            PdfRenderProcess._shared = PdfRenderProcess(processes)
+        return PdfRenderProcess._shared
+
+    # -----------------------------------------------
+    #        START / STOP
+    # -----------------------------------------------
+
+    def is_running(self) -> bool:
+        """ Return True if the worker processes have been started """
+        return bool(self._workers)
+
+    def start(self) -> None:
+        """ Start the worker processes (done by the first render) """
+        with self._lock:
+            if self._workers:
+                return
+            self._requests = self._context.Queue()
+            self._results = self._context.Queue()
+            for _ in range(self.processes):
+                worker = self._context.Process(
+                    target=_render_worker, args=(self._requests, self._results), daemon=True)
+                worker.start()
+                self._workers.append(worker)
+            self._dispatcher = threading.Thread(
+                target=self._dispatch, name='PdfRenderResults', daemon=True)
+            self._dispatcher.start()
+
+    def _dispatch(self) -> None:
+        """ Hand results from the workers to the threads waiting for them """
+        while True:
+            result = self._results.get()
+            if result is None:
+                break
+            with self._lock:
+                future = self._waiting.pop(result[0], None)
+            if future is not None:
+                future.set_result(result)
+
+    def close(self) -> None:
+        """ Stop the workers. Any renders waiting return a null image """
+        with self._lock:
+            workers, self._workers = self._workers, []
+            waiting, self._waiting = self._waiting, {}
+        if not workers:
+            return
+        for _ in workers:
+            self._requests.put(None)
+        for worker in workers:
+            worker.join(5)
+            if worker.is_alive():
+                worker.terminate()
+        self._results.put(None)
+        self._dispatcher.join()
+        for future in waiting.values():
+            future.set_result((0, False, 0, 0, 0))
+        with self._lock:
+            for buffer in self._buffers:
+                self._release(buffer)
+            self._buffers = []
+
+    # -----------------------------------------------
+    #        SHARED BUFFERS
+    # -----------------------------------------------
+
+    def _buffer(self, size: int) -> shared_memory.SharedMemory:
+        """ Take a free buffer that is large enough, or create one """
+        with self._lock:
+            for index, buffer in enumerate(self._buffers):
+                if buffer.size >= size:
+                    return self._buffers.pop(index)
+        return shared_memory.SharedMemory(create=True, size=size)
+
+    def _return_buffer(self, buffer: shared_memory.SharedMemory) -> None:
+        """ Keep a few buffers (one per worker, plus one) for reuse """
+        with self._lock:
+            if self._workers and len(self._buffers) <= self.processes:
+                self._buffers.append(buffer)
+                return
+        self._release(buffer)
+
+    @staticmethod
+    def _release(buffer: shared_memory.SharedMemory) -> None:
+        buffer.close()
+        try:
+            buffer.unlink()
+        except FileNotFoundError:
+            pass
+
+    # -----------------------------------------------
+    #        RENDER
+    # -----------------------------------------------
+
+    def render(self, path: str, page: int, size: QSize) -> QImage:
+        """Render a page (1 to n) of a PDF in a worker process
+
+        Args:
+            path (str): Full path of the PDF
+            page (int): Page number, starting at 1
+            size (QSize): Size (in device pixels) to render
+
+        Returns:
+            QImage: Rendered page or a null image on error
+        """
+        if size.isEmpty():
+            return QImage()
+        self.start()
+        buffer = self._buffer(size.width() * size.height() * self.BYTES_PER_PIXEL)
+        future = Future()
+        with self._lock:
+            request_id = next(self._ids)
+            self._waiting[request_id] = future
+            running = bool(self._workers)
+        if not running:
+            self._return_buffer(buffer)
+            return QImage()
+        self._requests.put((request_id, path, page, size.width(), size.height(), buffer.name))
+        try:
+            _, success, width, height, bpl = future.result(self.TIMEOUT)
+        except FutureTimeout:
+            with self._lock:
+                self._waiting.pop(request_id, None)
+            # The worker may still write to it so it isn't reused
+            self._release(buffer)
+            return QImage()
+        qimage = QImage()
+        if success:
+            qimage = QImage(buffer.buf[0:height * bpl], width, height, bpl,
+                            self.IMAGE_FORMAT).copy()
+        self._return_buffer(buffer)
+        return qimage
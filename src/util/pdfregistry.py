@@ -0,0 +1,144 @@
+"""
+Utility: Shared PDF documents
+
+ A PDF is parsed once per book and the QPdfDocument is shared by all of
+ the page widgets. Each user 'acquires' the document and 'releases' it
+ when done. The document is closed when the last user releases it.
+
+ Worker threads (prefetch, thumbnails, page store) borrow their own
+ documents with 'worker_document'. These are kept for the next job
+ while the book is open and closed when it is released.
+
+ This file is part of SheetMusic
+ Copyright: 2022,2023 by Chrles Gentry
+ You should have received a copy of the GNU General Public License
+ along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+ This file is part of Sheetmusic.
+
+"""
+
+import os
+import threading
+from contextlib import contextmanager
+
+from PySide6.QtPdf import QPdfDocument
+
+
+class PdfDocumentRegistry():
+    """ Reference counted QPdfDocuments, keyed by the (normalised) file path.
+
+        These should only be used in the GUI thread. Worker threads should
+        use 'worker_document' to borrow a document of their own.
+    """
+    _documents = {}
+    # Worker documents not in use, and how many times each book was closed
+    _lock = threading.Lock()
+    _idle = {}
+    _closed = {}
+
+    @staticmethod
+    def _key(path: str) -> str:
+        return os.path.normpath(path)
+
+    @staticmethod
+    def acquire(path: str) -> tuple[QPdfDocument | None, QPdfDocument.Error]:
+        """Get the shared document for a path, loading it if needed
+
+        Args:
+            path (str): Full path to the PDF file
+
+        Returns:
+            tuple[QPdfDocument | None, QPdfDocument.Error]:
+                Document (None on error) and the load status
+        """
+        key = PdfDocumentRegistry._key(path)
+        entry = PdfDocumentRegistry._documents.get(key)
+        if entry is None:
+            document = QPdfDocument()
+            err = document.load(path)
+            if err != QPdfDocument.Error.None_:
+                document.close()
+                return None, err
+            entry = [document, 0]
+            PdfDocumentRegistry._documents[key] = entry
+        entry[1] += 1
+        return entry[0], QPdfDocument.Error.None_
+
+    @staticmethod
+    def share(document: QPdfDocument) -> str | None:
+        """ Add a reference to a document already in the registry.
+            Return the path (to be used for release) or None if not found """
+        for key, entry in PdfDocumentRegistry._documents.items():
+            if entry[0] is document:
+                entry[1] += 1
+                return key
+        return None
+
+    @staticmethod
+    def release(path: str) -> bool:
+        """ Drop one reference and close the document on the last one.
+            Return True if the document was closed """
+        key = PdfDocumentRegistry._key(path)
+        entry = PdfDocumentRegistry._documents.get(key)
+        if entry is None:
+            return False
+        entry[1] -= 1
+        if entry[1] > 0:
+            return False
+        del PdfDocumentRegistry._documents[key]
+        entry[0].close()
+        with PdfDocumentRegistry._lock:
+            PdfDocumentRegistry._closed[key] = PdfDocumentRegistry._closed.get(key, 0) + 1
+            idle = PdfDocumentRegistry._idle.pop(key, [])
+        for document in idle:
+            document.close()
+        return True
+
+    @staticmethod
+    def references(path: str) -> int:
+        """ Return how many users have the document """
+        entry = PdfDocumentRegistry._documents.get(PdfDocumentRegistry._key(path))
+        return 0 if entry is None else entry[1]
+
+    @staticmethod
+    def idle_documents(path: str) -> int:
+        """ Return how many worker documents are kept for the path """
+        with PdfDocumentRegistry._lock:
+            return len(PdfDocumentRegistry._idle.get(PdfDocumentRegistry._key(path), []))
+
+    @staticmethod
+    @contextmanager
+    def worker_document(path: str):
+        """ Lend a document to a worker thread for a 'with' block:
+
+                with PdfDocumentRegistry.worker_document(path) as document:
+                    if document is not None:
+                        image = document.render(page, size)
+
+            The document isn't used by any other thread during the block.
+            It is kept for the next worker if the book is open (acquired)
+            and closed otherwise, or if the book was closed meanwhile.
+            Yields None if the PDF can't be loaded.
+        """
+        key = PdfDocumentRegistry._key(path)
+        with PdfDocumentRegistry._lock:
+            idle = PdfDocumentRegistry._idle.get(key)
+            document = idle.pop() if idle else None
+            closed = PdfDocumentRegistry._closed.get(key, 0)
+        if document is None:
+            document = QPdfDocument()
+            if document.load(path) != QPdfDocument.Error.None_:
+                document.close()
+                document = None
+        try:
+            yield document
+        finally:
+            if document is not None:
+                with PdfDocumentRegistry._lock:
+                    keep = (key in PdfDocumentRegistry._documents and
+                            closed == PdfDocumentRegistry._closed.get(key, 0))
+                    if keep:
+                        PdfDocumentRegistry._idle.setdefault(key, []).append(document)
+                if not keep:
+                    document.close()
@@ -0,0 +1,156 @@
+"""
+Utility: Resume snapshot
+
+ When the program closes, the pages on the screen are saved as one
+ image together with the book, the page and the size of the page area.
+ On the next start the image is shown as soon as the window appears,
+ while the book itself is opened behind it.
+
+ The image is kept unencoded so it can be read and shown in a few
+ milliseconds.
+
+ File layout:
+    HEADER
+    BOOK NAME (utf-8)
+    LOCATION (utf-8)
+    LAYOUT (utf-8)
+    IMAGE (height x bytes per line)
+
+ This file is part of SheetMusic
+ Copyright: 2022,2023 by Chrles Gentry
+ You should have received a copy of the GNU General Public License
+ along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+ This file is part of Sheetmusic.
+
+"""
+
+import os
+import struct
+from dataclasses import dataclass
+
+from PySide6.QtCore import QSize
+from PySide6.QtGui import QImage
+
+
+@dataclass
+class SnapshotKey():
+    """ What a snapshot was taken of. It is only shown if this matches """
+    book: str
+    location: str
+    page: int
+    size: QSize
+    ratio: float
+
+    def matches(self, other: 'SnapshotKey') -> bool:
+        """ Return True if the snapshot is for the same book, page and page area """
+        return (self.book == other.book and
+                self.location == other.location and
+                self.page == other.page and
+                self.size == other.size and
+                abs(self.ratio - other.ratio) < 0.01)
+
+
+class ResumeSnapshot():
+    """ Save and load the snapshot of the last pages shown """
+    MAGIC = b'SMRS'
+    VERSION = 1
+    # magic, version, (unused), page, page area width, height, device pixel ratio (x100),
+    # image width, height, bytes per line, image format,
+    # length of book name, location, layout
+    HEADER = struct.Struct('<4sHHIIIIIIIIHHH')
+    IMAGE_FORMAT = QImage.Format_RGB32
+    FILENAME = 'resume.sms'
+
+    @staticmethod
+    def filename_for_directory(directory: str) -> str:
+        """ Return the name of the snapshot in the library directory """
+        return os.path.join(directory, ResumeSnapshot.FILENAME)
+
+    @staticmethod
+    def save(filename: str, qimage: QImage, key: SnapshotKey, layout: str = '') -> bool:
+        """Save the image of the pages shown. The file is replaced in one step
+
+        Args:
+            filename (str): Snapshot file
+            qimage (QImage): Image of the page area (at device pixels)
+            key (SnapshotKey): Book, page and page area size
+            layout (str, optional): Page layout shown
+
+        Returns:
+            bool: True if it was saved
+        """
+        if qimage is None or qimage.isNull():
+            return False
+        qimage = qimage.convertToFormat(ResumeSnapshot.IMAGE_FORMAT)
+        names = [text.encode('utf-8') for text in (key.book, key.location, layout or '')]
+        header = ResumeSnapshot.HEADER.pack(
+            ResumeSnapshot.MAGIC, ResumeSnapshot.VERSION, 0,
+            key.page, key.size.width(), key.size.height(), round(key.ratio * 100),
+            qimage.width(), qimage.height(), qimage.bytesPerLine(),
+            int(ResumeSnapshot.IMAGE_FORMAT.value),
+            *[len(name) for name in names])
+        temp_name = filename + '.tmp'
+        try:
+            os.makedirs(os.path.dirname(filename) or '.', exist_ok=True)
+            with open(temp_name, 'wb') as snapshot:
+                snapshot.write(header)
+                for name in names:
+                    snapshot.write(name)
+                snapshot.write(qimage.constBits().tobytes()[0:qimage.sizeInBytes()])
+            os.replace(temp_name, filename)
+        except OSError:
+            ResumeSnapshot.remove(temp_name)
+            return False
+        return True
+
+    @staticmethod
+    def load(filename: str, key: SnapshotKey) -> tuple[QImage | None, str]:
+        """Load the snapshot if it was taken of 'key'
+
+        Args:
+            filename (str): Snapshot file
+            key (SnapshotKey): Book, page and page area size expected
+
+        Returns:
+            tuple[QImage | None, str]: Image (None if there isn't a matching one)
+                and the layout it shows
+        """
+        try:
+            with open(filename, 'rb') as snapshot:
+                data = snapshot.read()
+        except OSError:
+            return None, ''
+        if len(data) < ResumeSnapshot.HEADER.size:
+            return None, ''
+        (magic, version, _, page, width, height, ratio, image_width, image_height,
+         bpl, image_format, *lengths) = ResumeSnapshot.HEADER.unpack_from(data)
+        if magic != ResumeSnapshot.MAGIC or version != ResumeSnapshot.VERSION:
+            return None, ''
+        offset = ResumeSnapshot.HEADER.size
+        names = []
+        try:
+            for length in lengths:
+                names.append(data[offset:offset + length].decode('utf-8'))
+                offset += length
+        except UnicodeDecodeError:
+            return None, ''
+        saved = SnapshotKey(names[0], names[1], page, QSize(width, height), ratio / 100)
+        if not saved.matches(key) or image_format != int(ResumeSnapshot.IMAGE_FORMAT.value):
+            return None, ''
+        pixels = data[offset:]
+        if image_width <= 0 or image_height <= 0 or len(pixels) < image_height * bpl \
+                or bpl < image_width * 4:
+            return None, ''
+        qimage = QImage(pixels, image_width, image_height, bpl,
+                        ResumeSnapshot.IMAGE_FORMAT).copy()
+        qimage.setDevicePixelRatio(ratio / 100)
+        return qimage, names[2]
+
+    @staticmethod
+    def remove(filename: str) -> None:
+        """ Remove the snapshot (e.g. no book is open) """
+        try:
+            os.remove(filename)
+        except OSError:
+            pass
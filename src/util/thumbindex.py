@@ -0,0 +1,191 @@
+"""
+Utility: Page thumbnail index
+
+ Holds a small greyscale thumbnail of every page of a book in one
+ packed file. Every page has a cell of the same size so thumbnails
+ can be added in any order (by several worker threads) as they are
+ made.
+
+ File layout:
+    HEADER
+    INDEX (one entry per page: width, height. Zero if not made yet)
+    CELLS (one per page, each THUMB_HEIGHT x bytes per line)
+
+ The header holds a digest of the source (see PageStore.source_digest)
+ so an index for a book that has changed is started again.
+
+ This file is part of SheetMusic
+ Copyright: 2022,2023 by Chrles Gentry
+ You should have received a copy of the GNU General Public License
+ along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+ This file is part of Sheetmusic.
+
+"""
+
+import os
+import struct
+import threading
+
+from PySide6.QtGui import QImage, Qt
+
+
+class ThumbnailIndex():
+    """ Packed file of page thumbnails. This is safe to use from worker threads """
+    MAGIC = b'SMTI'
+    VERSION = 1
+    # magic, version, (unused), thumbnail width, height, page count, source digest
+    HEADER = struct.Struct('<4sHHIII20s')
+    # width, height of the thumbnail in the cell
+    INDEX = struct.Struct('<HH')
+    THUMB_WIDTH = 120
+    THUMB_HEIGHT = 160
+    EXTENSION = '.sti'
+
+    def __init__(self, width: int = THUMB_WIDTH, height: int = THUMB_HEIGHT):
+        self.width = width
+        self.height = height
+        self.bytes_per_line = (width + 3) & ~3
+        self.cell_size = self.bytes_per_line * height
+        self.filename = None
+        self._count = 0
+        self._sizes = []
+        self._file = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def filename_for_book(directory: str, book_id: int) -> str:
+        """ Return the name of the thumbnail index for a book """
+        return os.path.join(directory, f'{book_id}{ThumbnailIndex.EXTENSION}')
+
+    def _cells_offset(self) -> int:
+        return self.HEADER.size + self._count * self.INDEX.size
+
+    # -----------------------------------------------
+    #        OPEN / CLOSE
+    # -----------------------------------------------
+
+    def open(self, filename: str, count: int, digest: bytes | None = None) -> bool:
+        """Open the index for a book. If there isn't one, or it is for
+        a different version of the book, an empty one is created.
+
+        Args:
+            filename (str): Thumbnail index file
+            count (int): Number of pages in the book
+            digest (bytes | None, optional): Digest of the book source
+
+        Returns:
+            bool: True if the index can be used
+        """
+        self.close()
+        digest = (digest or b'').ljust(20, b'\0')[0:20]
+        with self._lock:
+            self._count = count
+            try:
+                self._file = open(filename, 'r+b')
+                if not self._read_index(digest):
+                    self._file.close()
+                    self._file = None
+            except OSError:
+                self._file = None
+            if self._file is None and not self._create(filename, digest):
+                return False
+        self.filename = filename
+        return True
+
+    def _read_index(self, digest: bytes) -> bool:
+        """ Read the header and sizes and check they match this book """
+        header = self._file.read(self.HEADER.size)
+        if len(header) != self.HEADER.size:
+            return False
+        magic, version, _, width, height, count, source = self.HEADER.unpack(header)
+        if magic != self.MAGIC or version != self.VERSION or source != digest or \
+                width != self.width or height != self.height or count != self._count:
+            return False
+        index = self._file.read(count * self.INDEX.size)
+        if len(index) != count * self.INDEX.size:
+            return False
+        self._sizes = [self.INDEX.unpack_from(index, page * self.INDEX.size)
+                       for page in range(count)]
+        return True
+
+    def _create(self, filename: str, digest: bytes) -> bool:
+        """ Create an empty index (all cells are allocated) """
+        try:
+            os.makedirs(os.path.dirname(filename) or '.', exist_ok=True)
+            self._file = open(filename, 'w+b')
+            self._file.write(self.HEADER.pack(self.MAGIC, self.VERSION, 0,
+                                              self.width, self.height, self._count, digest))
+            self._file.write(b'\0' * (self._count * self.INDEX.size))
+            self._file.truncate(self._cells_offset() + self._count * self.cell_size)
+            self._file.flush()
+        except OSError:
+            self._file = None
+            return False
+        self._sizes = [(0, 0)] * self._count
+        return True
+
+    def close(self) -> None:
+        """ Close the index file """
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+            self._file = None
+            self._sizes = []
+            self._count = 0
+            self.filename = None
+
+    # -----------------------------------------------
+    #        ACCESS
+    # -----------------------------------------------
+
+    def is_open(self) -> bool:
+        """ Return True if an index is open """
+        return self._file is not None
+
+    def has(self, page: int) -> bool:
+        """ Return True if the thumbnail for the page (1 to n) has been made """
+        return 0 < page <= len(self._sizes) and self._sizes[page-1][0] > 0
+
+    def missing(self) -> list[int]:
+        """ Return the pages that don't have a thumbnail yet """
+        return [page for page in range(1, len(self._sizes) + 1) if not self.has(page)]
+
+    def image(self, page: int) -> QImage | None:
+        """ Return the thumbnail for a page or None if it hasn't been made """
+        if not self.has(page):
+            return None
+        width, height = self._sizes[page-1]
+        with self._lock:
+            if self._file is None:
+                return None
+            self._file.seek(self._cells_offset() + (page-1) * self.cell_size)
+            data = self._file.read(self.bytes_per_line * height)
+        if len(data) != self.bytes_per_line * height:
+            return None
+        return QImage(data, width, height, self.bytes_per_line,
+                      QImage.Format_Grayscale8).copy()
+
+    def put(self, page: int, qimage: QImage) -> bool:
+        """ Scale a page image to fit a cell and save it """
+        if not 0 < page <= self._count or qimage is None or qimage.isNull():
+            return False
+        if qimage.width() > self.width or qimage.height() > self.height:
+            qimage = qimage.scaled(self.width, self.height,
+                                   Qt.KeepAspectRatio, Qt.SmoothTransformation)
+        qimage = qimage.convertToFormat(QImage.Format_Grayscale8)
+        bpl = qimage.bytesPerLine()
+        data = qimage.constBits().tobytes()
+        cell = b''.join(data[row * bpl: row * bpl + qimage.width()].ljust(
+            self.bytes_per_line, b'\0') for row in range(qimage.height()))
+        with self._lock:
+            if self._file is None:
+                return False
+            # Write the cell first so a partly written thumbnail is never used
+            self._file.seek(self._cells_offset() + (page-1) * self.cell_size)
+            self._file.write(cell)
+            self._file.seek(self.HEADER.size + (page-1) * self.INDEX.size)
+            self._file.write(self.INDEX.pack(qimage.width(), qimage.height()))
+            self._file.flush()
+            self._sizes[page-1] = (qimage.width(), qimage.height())
+        return True
@@ -29,6 +29,7 @@ from qdb.keys import DbKeys
 from qdb.log import DbLog
 from qdb.mixin.fieldcleanup import MixinFieldCleanup
 from qdb.mixin.tomlbook import MixinTomlBook
+from qdb.util import DbHelper
 
 from qdb.fields.book import BookField
 from qdil.dil import Dils
@@ -369,52 +370,53 @@ class UiBaseConvert(MixinFilterFiles,
 
         counter = 0
         if self.status:
-            bookmarks = {}
-            for loc in self.get_duplicatelist():
-                bookmark = self.dil.books.lookup_book_by_column(
-                    BookField.SOURCE, loc)
-                if bookmark is not None:
-                    bookmarks[loc] = bookmark
-                self.logger.debug('fDelete current book entry {loc}')
-                self.dil.books.delete(BookField.SOURCE, loc)
-
-            if len(self.data) > 0:
-                self._setsourcetype()
-                plural = ('s' if counter > 1 else '')
-                status_dlg = UiStatus()
-                status_dlg.setWindowTitle(f"Add book{plural} to library")
-                status_dlg.maximum = len(self.data)
-                label_format = '{:4d}: {:<100s} '
-                for book_data in self.data:
-                    if status_dlg.was_canceled():
-                        self.status = ProgramConstants.RETURN_CANCEL
-                        break
-
-                    status_dlg.set_value(counter)
-                    counter += 1
-                    status_dlg.title = label_format.format(
-                        counter, book_data[BookField.TITLE])
-                    # pylint: disable=C0209
-                    self.logger.debug('Add new book {} Location {} Type {}'.format(
-                        book_data[BookField.BOOK],
-                        book_data[BookField.LOCATION],
-                        book_data[BookField.SOURCE_TYPE]))
-                    # pylint: enable=C0209
-                    self.dil.books.delete(
-                        BookField.SOURCE, book_data[BookField.SOURCE])
-                    new_book = self.dil.books.new_book(**book_data)
-                    if book_data[BookField.SOURCE] in bookmarks:
-                        for marks in bookmarks[book_data[BookField.SOURCE]]:
-                            self.dil.booksmarks.add(
+            # One transaction for the whole import: rows are written in a
+            # single commit, and nothing is changed if the import fails
+            with DbHelper.transaction():
+                bookmarks = {}
+                for loc in self.get_duplicatelist():
+                    bookmark = self.dil.books.lookup_book_by_column(
+                        BookField.SOURCE, loc)
+                    if bookmark is not None:
+                        bookmarks[loc] = bookmark
+                    self.logger.debug('fDelete current book entry {loc}')
+                    self.dil.books.delete(BookField.SOURCE, loc)
+
+                if len(self.data) > 0:
+                    self._setsourcetype()
+                    plural = ('s' if counter > 1 else '')
+                    status_dlg = UiStatus()
+                    status_dlg.setWindowTitle(f"Add book{plural} to library")
+                    status_dlg.maximum = len(self.data)
+                    label_format = '{:4d}: {:<100s} '
+                    for book_data in self.data:
+                        if status_dlg.was_canceled():
+                            self.status = ProgramConstants.RETURN_CANCEL
+                            break
+
+                        status_dlg.set_value(counter)
+                        counter += 1
+                        status_dlg.title = label_format.format(
+                            counter, book_data[BookField.TITLE])
+                        # pylint: disable=C0209
+                        self.logger.debug('Add new book {} Location {} Type {}'.format(
+                            book_data[BookField.BOOK],
+                            book_data[BookField.LOCATION],
+                            book_data[BookField.SOURCE_TYPE]))
+                        # pylint: enable=C0209
+                        self.dil.books.delete(
+                            BookField.SOURCE, book_data[BookField.SOURCE])
+                        new_book = self.dil.books.new_book(**book_data)
+                        if book_data[BookField.SOURCE] in bookmarks:
+                            self.dil.booksmarks.add_many(
                                 new_book[BookField.ID],
-                                marks[BookmarkField.NAME],
-                                marks[BookmarkField.PAGE]
-                            )
-                status_dlg.title = f'{counter} Book{plural} added.'
-                status_dlg.information = ""
-                status_dlg.button_text = 'Close'
-                status_dlg.set_value(len(self.data))
-                status_dlg.show()
+                                [(marks[BookmarkField.NAME], marks[BookmarkField.PAGE])
+                                 for marks in bookmarks[book_data[BookField.SOURCE]]])
+                    status_dlg.title = f'{counter} Book{plural} added.'
+                    status_dlg.information = ""
+                    status_dlg.button_text = 'Close'
+                    status_dlg.set_value(len(self.data))
+                    status_dlg.show()
         return (self.status and len(self.data) > 0)
 
     def update_file_properties(self) -> bool:
@@ -0,0 +1,176 @@
+"""
+Utility: Recently opened books kept in memory
+
+ Switching between a few books (e.g. during a service) would normally
+ read the book again, parse the PDF again and decode the pages again.
+ When a book is closed, the last few are kept 'warm': the book session
+ (see qdb.dbbooksession), a reference to the shared PDF document (see
+ util.pdfregistry) and the images of the pages that were shown and the
+ next ones. Opening the book again takes them back.
+
+ The number of books and the memory used by the page images are limited;
+ the least recently closed books are dropped first.
+
+ This file is part of SheetMusic
+ Copyright: 2022,2023 by Chrles Gentry
+ You should have received a copy of the GNU General Public License
+ along with this program.  If not, see <http://www.gnu.org/licenses/>.
+
+ This file is part of Sheetmusic.
+
+"""
+
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable
+
+from qdb.dbbooksession import BookSession
+from util.pdfregistry import PdfDocumentRegistry
+
+
+@dataclass
+class WarmBook():
+    """ What is kept for one book. Call 'release' when finished with it """
+    name: str
+    session: BookSession | None = None
+    pdf_path: str | None = None
+    pages: dict = field(default_factory=dict)
+    size: int = 0
+
+    def restore(self, page_cache) -> int:
+        """ Put the page images back in the page cache. Return the number restored """
+        restored = 0
+        for key, qimage in self.pages.items():
+            if key not in page_cache and page_cache.put(key, qimage):
+                restored += 1
+        return restored
+
+    def release(self) -> None:
+        """ Give up the PDF document and the page images """
+        if self.pdf_path is not None:
+            PdfDocumentRegistry.release(self.pdf_path)
+            self.pdf_path = None
+        self.pages = {}
+        self.size = 0
+
+
+class WarmBooks():
+    """ LRU of recently closed books, limited by count and by page image bytes """
+    MEGABYTE = 1024 * 1024
+    DEFAULT_BOOKS = 3
+    DEFAULT_BUDGET_MB = 128
+
+    _shared = None
+
+    def __init__(self,
+                 max_books: int = DEFAULT_BOOKS,
+                 budget: int = DEFAULT_BUDGET_MB * MEGABYTE,
+                 sizeof: Callable[[object], int] = None):
+        self._books = OrderedDict()
+        self._max_books = max(0, int(max_books))
+        self._budget = max(0, int(budget))
+        self._used = 0
+        self._sizeof = sizeof if sizeof is not None else WarmBooks._image_size
+
+    @staticmethod
+    def shared() -> 'WarmBooks':
+        """ Return the list used by the program """
+        if WarmBooks._shared is None:
+            WarmBooks._shared = WarmBooks()
+        return WarmBooks._shared
+
+    @staticmethod
+    def setup(max_books: int, budget_mb: int = DEFAULT_BUDGET_MB) -> 'WarmBooks':
+        """ Set the number of books kept (0 is off) and the memory for their pages """
+        warm = WarmBooks.shared()
+        warm._max_books = max(0, int(max_books))
+        warm._budget = max(0, int(budget_mb)) * WarmBooks.MEGABYTE
+        warm._trim()
+        return warm
+
+    @staticmethod
+    def _image_size(image) -> int:
+        if hasattr(image, 'sizeInBytes'):
+            return int(image.sizeInBytes())
+        return 0
+
+    @property
+    def max_books(self) -> int:
+        """ Maximum number of books kept """
+        return self._max_books
+
+    @property
+    def used(self) -> int:
+        """ Bytes held by page images """
+        return self._used
+
+    def __len__(self) -> int:
+        return len(self._books)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._books
+
+    def names(self) -> list[str]:
+        """ Book names, least recently closed first """
+        return list(self._books)
+
+    def _trim(self) -> None:
+        while self._books and \
+                (len(self._books) > self._max_books or self._used > self._budget):
+            _, book = self._books.popitem(last=False)
+            self._used -= book.size
+            book.release()
+
+    def keep(self, name: str,
+             session: BookSession | None = None,
+             pdf_path: str | None = None,
+             pages: dict | None = None) -> bool:
+        """Keep a book that is being closed
+
+        Args:
+            name (str): Book name
+            session (BookSession | None, optional): Book data, as it is now
+            pdf_path (str | None, optional): PDF file. The document is only
+                kept if it is still open (e.g. by the pager); it is never loaded here
+            pages (dict | None, optional): Page cache keys and images, most
+                important first. Pages that don't fit in the budget are dropped
+
+        Returns:
+            bool: True if the book is kept
+        """
+        self.discard(name)
+        if self._max_books == 0 or not name:
+            return False
+        book = WarmBook(name, session)
+        if pdf_path is not None and PdfDocumentRegistry.references(pdf_path) > 0:
+            PdfDocumentRegistry.acquire(pdf_path)
+            book.pdf_path = pdf_path
+        for key, qimage in (pages or {}).items():
+            size = self._sizeof(qimage)
+            if qimage is None or book.size + size > self._budget:
+                continue
+            book.pages[key] = qimage
+            book.size += size
+        self._books[name] = book
+        self._used += book.size
+        self._trim()
+        return name in self._books
+
+    def take(self, name: str) -> WarmBook | None:
+        """ Remove the book and return it (None if it isn't kept).
+            Call its 'release' once the book has been opened """
+        book = self._books.pop(name, None)
+        if book is not None:
+            self._used -= book.size
+        return book
+
+    def discard(self, name: str) -> None:
+        """ Drop a book (e.g. it was changed or deleted) """
+        book = self.take(name)
+        if book is not None:
+            book.release()
+
+    def clear(self) -> None:
+        """ Drop all the books """
+        for name in list(self._books):
+            self.discard(name)